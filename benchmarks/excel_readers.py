@@ -0,0 +1,97 @@
+"""
+Banc d'essai des lecteurs Excel (controllers/excel_controller.py).
+Génère des classeurs de tailles croissantes au format de l'application, puis
+mesure chaque lecteur disponible sur les mêmes fichiers : aperçu (5 lignes)
+et chargement complet, ainsi que le choix automatique.
+
+Usage :
+    python benchmarks/excel_readers.py [--rows 1000 20000 100000] [--repeat 3] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.excel_controller import EXCEL_READERS, read_excel_file  # noqa: E402
+
+# Lignes lues pour un aperçu (page Importation)
+PREVIEW_ROWS = 5
+
+
+def make_fixture(directory, rows):
+    """
+    Crée un classeur de test (format standard : Nom, Email, Salaire, Téléphone, Département).
+
+    Returns:
+        str: Chemin du fichier
+    """
+    path = os.path.join(directory, f"employees-{rows}.xlsx")
+    if not os.path.exists(path):
+        rng = np.random.default_rng(rows)
+        pd.DataFrame({
+            'Nom': [f"Employé {i}" for i in range(rows)],
+            'Email': [f"employe{i}@exemple.ga" for i in range(rows)],
+            'Salaire': rng.integers(150000, 5000000, rows),
+            'Téléphone': [f"+241 0{i % 10} {i % 100:02d} {i % 97:02d}" for i in range(rows)],
+            'Département': rng.choice(['Informatique', 'Ressources Humaines', 'Finance', 'Ventes'], rows),
+        }).to_excel(path, index=False)
+    return path
+
+
+def measure(path, engine, nrows, repeat):
+    """
+    Meilleur temps (secondes) de lecture d'un fichier par un lecteur.
+
+    Returns:
+        dict: {'lecteur', 'secondes', 'lignes'} ou {'lecteur', 'erreur'}
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            df, used = read_excel_file(path, nrows=nrows, engine=engine)
+        except Exception as e:
+            return {'lecteur': engine or 'auto', 'erreur': f"{type(e).__name__}: {e}"}
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {'lecteur': used if engine else f"auto ({used})", 'secondes': round(best, 4), 'lignes': len(df)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 20000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--dir', help="Répertoire des classeurs générés (réutilisés d'un passage à l'autre)")
+    parser.add_argument('--json', action='store_true', help="Résultats au format JSON")
+    args = parser.parse_args()
+
+    directory = args.dir or os.path.join(tempfile.gettempdir(), 'edm-excel-bench')
+    os.makedirs(directory, exist_ok=True)
+
+    results = []
+    for rows in args.rows:
+        path = make_fixture(directory, rows)
+        for mode, nrows in (('apercu', PREVIEW_ROWS), ('complet', None)):
+            for engine in list(EXCEL_READERS) + [None]:
+                result = measure(path, engine, nrows, args.repeat)
+                result.update({'fichier': os.path.basename(path), 'octets': os.path.getsize(path), 'mode': mode})
+                results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    for result in results:
+        outcome = (f"{result['secondes']:>9.4f} s  {result['lignes']:>7} lignes"
+                   if 'secondes' in result else result['erreur'])
+        print(f"{result['fichier']:<24} {result['mode']:<8} {result['lecteur']:<30} {outcome}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,505 @@
+"""
+Test de charge de l'application Streamlit (main.py) avec AppTest.
+Plusieurs sessions simulées tournent en parallèle (un thread chacune) sur une
+base générée : navigation, recherche, modification, import et export.
+Pour chaque scénario, le rapport donne les percentiles de latence des reruns,
+les attentes de verrou SQLite, l'attente dans la file de l'écrivain et le pic
+de mémoire. Le rapport JSON peut être comparé à celui d'une autre version.
+
+Usage :
+    python benchmarks/load_test.py [--sessions 10] [--actions 20] [--rows 20000]
+                                   [--scenarios consultation fin_de_mois] [--output rapport.json]
+                                   [--compare ancien_rapport.json]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Windows : ni /proc ni resource, le pic de mémoire n'est pas mesuré
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from models.database import EmployeeDatabase  # noqa: E402
+from models.datasets import DATA_DIR_ENV, DEFAULT_DATASET  # noqa: E402
+from models.writer import DatabaseWriter  # noqa: E402
+
+# Scénarios : poids relatifs des actions tirées par chaque session
+SCENARIOS = {
+    'consultation': {'navigation': 1},
+    'recherche': {'recherche': 1},
+    'edition': {'edition': 1},
+    'import': {'import': 1},
+    'export': {'export': 1},
+    'fin_de_mois': {'navigation': 4, 'recherche': 3, 'edition': 2, 'export': 1, 'import': 1},
+}
+
+PAGES = ["Tableau de Bord", "Importation", "Gestion", "Exportation"]
+
+# Instructions dont la durée mesure l'attente d'un verrou SQLite (au-delà du seuil)
+LOCKING_STATEMENTS = ('BEGIN IMMEDIATE', 'BEGIN EXCLUSIVE', 'COMMIT')
+LOCK_WAIT_THRESHOLD = 0.001
+
+# Délai maximal d'un rerun (secondes)
+RUN_TIMEOUT = 300
+
+DEPARTEMENTS = ['Informatique', 'Ressources Humaines', 'Finance', 'Ventes', 'Logistique', 'Juridique']
+POSTES = ['Développeur', 'Analyste', 'Chef de projet', 'Assistant', 'Directeur', 'Comptable']
+NOMS = ['Nze', 'Mba', 'Obame', 'Ndong', 'Moussavou', 'Ella', 'Bongo', 'Mintsa', 'Ondo', 'Nguema']
+PRENOMS = ['Sabrina', 'Jean', 'Hélène', 'Paul', 'Aïcha', 'Marc', 'Léa', 'Serge', 'Inès', 'Yves']
+
+
+def generate_employees(rows, seed):
+    """
+    Génère des employés au format de la base (noms, départements et salaires variés).
+
+    Returns:
+        pandas.DataFrame: Colonnes de la table employees (sans id)
+    """
+    rng = np.random.default_rng(seed)
+    prenoms = rng.choice(PRENOMS, rows)
+    noms = rng.choice(NOMS, rows)
+    return pd.DataFrame({
+        'nom': [f"{prenom} {nom} {i}" for i, (prenom, nom) in enumerate(zip(prenoms, noms))],
+        'email': [f"{prenom.lower()}.{nom.lower()}{i}@exemple.ga" for i, (prenom, nom) in enumerate(zip(prenoms, noms))],
+        'telephone': [f"+241 0{i % 10} {i % 100:02d} {i % 97:02d}" for i in range(rows)],
+        'departement': rng.choice(DEPARTEMENTS, rows),
+        'poste': rng.choice(POSTES, rows),
+        'salaire': rng.integers(150000, 5000000, rows).astype(float),
+    })
+
+
+def excel_bytes(df):
+    """Classeur Excel (format d'import standard) en mémoire."""
+    buffer = io.BytesIO()
+    df.rename(columns={
+        'nom': 'Nom', 'email': 'Email', 'salaire': 'Salaire', 'telephone': 'Téléphone',
+        'departement': 'Département', 'poste': 'Poste'
+    }).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+class Metrics:
+    """Mesures partagées par les sessions d'un scénario (protégées par un verrou)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = []
+        self.lock_waits = 0
+        self.lock_wait_seconds = 0.0
+        self.lock_errors = 0
+        self.queue_waits = []
+
+    def add_latency(self, action, seconds):
+        with self.lock:
+            self.latencies.setdefault(action, []).append(seconds)
+
+    def add_error(self, action, message):
+        with self.lock:
+            self.errors.append(f"{action}: {message}")
+
+
+# Scénario en cours (les connexions et l'écrivain y consignent leurs mesures)
+_current = {'metrics': None}
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connexion SQLite qui chronomètre les instructions prenant un verrou d'écriture."""
+
+    def execute(self, sql, *args):
+        metrics = _current['metrics']
+        if metrics is None or not sql.lstrip().upper().startswith(LOCKING_STATEMENTS):
+            return self._execute(sql, *args)
+        started = time.perf_counter()
+        try:
+            return self._execute(sql, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed > LOCK_WAIT_THRESHOLD:
+                with metrics.lock:
+                    metrics.lock_waits += 1
+                    metrics.lock_wait_seconds += elapsed
+
+    def _execute(self, sql, *args):
+        try:
+            return super().execute(sql, *args)
+        except sqlite3.OperationalError as e:
+            metrics = _current['metrics']
+            if metrics is not None and ('locked' in str(e) or 'busy' in str(e)):
+                with metrics.lock:
+                    metrics.lock_errors += 1
+            raise
+
+
+def install_instrumentation():
+    """Branche le chronométrage sur sqlite3.connect et sur la file de l'écrivain."""
+    connect = sqlite3.connect
+
+    def instrumented_connect(*args, **kwargs):
+        kwargs.setdefault('factory', InstrumentedConnection)
+        return connect(*args, **kwargs)
+    sqlite3.connect = instrumented_connect
+
+    submit = DatabaseWriter.submit
+
+    def instrumented_submit(self, operation, *args, transactional=True):
+        submitted = time.perf_counter()
+
+        def timed(conn, *op_args):
+            metrics = _current['metrics']
+            if metrics is not None:
+                with metrics.lock:
+                    metrics.queue_waits.append(time.perf_counter() - submitted)
+            return operation(conn, *op_args)
+        return submit(self, timed, *args, transactional=transactional)
+    DatabaseWriter.submit = instrumented_submit
+
+    # Chaque AppTest compile main.py ; ast.parse n'est pas sûr entre threads
+    # sous CPython 3.11 ("AST constructor recursion depth mismatch")
+    from streamlit.runtime.scriptrunner import magic
+    add_magic = magic.add_magic
+    compile_lock = threading.Lock()
+
+    def serialized_add_magic(*args, **kwargs):
+        with compile_lock:
+            return add_magic(*args, **kwargs)
+    magic.add_magic = serialized_add_magic
+
+
+class MemorySampler(threading.Thread):
+    """Relève la mémoire résidente du processus pendant un scénario."""
+
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = self.current()
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def current():
+        """Mémoire résidente actuelle en octets (pic du processus si /proc est absent)."""
+        try:
+            with open('/proc/self/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        if resource is None:
+            return 0
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self.current())
+        return self.peak
+
+
+class Session:
+    """Session utilisateur simulée : une instance AppTest et ses actions."""
+
+    def __init__(self, number, rng, metrics, import_file):
+        from streamlit.testing.v1 import AppTest
+        self.number = number
+        self.rng = rng
+        self.metrics = metrics
+        self.import_file = import_file
+        self.at = AppTest.from_file(os.path.join(ROOT, 'main.py'), default_timeout=RUN_TIMEOUT)
+        self.page = None
+
+    def _run(self, action, widget=None):
+        """Rerun chronométré (après interaction éventuelle avec un widget)."""
+        started = time.perf_counter()
+        try:
+            (widget.run() if widget is not None else self.at.run())
+        except Exception as e:
+            self.metrics.add_error(action, f"{type(e).__name__}: {e}")
+            return
+        self.metrics.add_latency(action, time.perf_counter() - started)
+        for exception in self.at.exception:
+            self.metrics.add_error(action, exception.value)
+        for error in self.at.error:
+            self.metrics.add_error(action, error.value)
+
+    def _widget(self, kind, label=None, key=None):
+        """Premier widget d'un type par libellé ou clé (None s'il est absent de la page)."""
+        for widget in getattr(self.at, kind):
+            if (key is not None and widget.key == key) or (label is not None and widget.label == label):
+                return widget
+        return None
+
+    def start(self):
+        self._run('demarrage')
+        self.page = PAGES[0]
+
+    def goto(self, page, action='navigation'):
+        if self.page != page:
+            self._run(action, self.at.button(key=f"nav_{page}").click())
+            self.page = page
+
+    def navigation(self):
+        self.goto(self.rng.choice([page for page in PAGES if page != self.page]))
+
+    def recherche(self):
+        self.goto("Gestion")
+        terms = self.rng.choice(PRENOMS + NOMS)
+        # Fautes de frappe occasionnelles : la recherche tolère les approximations
+        if self.rng.random() < 0.3 and len(terms) > 3:
+            position = self.rng.randrange(len(terms))
+            terms = terms[:position] + terms[position + 1:]
+        search = self._widget('text_input', label="Rechercher (nom ou email)")
+        if search is not None:
+            self._run('recherche', search.input(terms))
+        picker = self._widget('text_input', key="employee_picker_query")
+        if picker is not None:
+            self._run('recherche', picker.input(terms[:4]))
+
+    def edition(self):
+        self.goto("Gestion")
+        select = self._widget('selectbox', key="employee_picker_select")
+        if select is None or not select.options:
+            return
+        # Sélection par ID : avec format_func, select_index d'AppTest retiendrait le libellé affiché
+        label = self.rng.choice(select.options)
+        self._run('edition', select.select(int(label.split()[1])))
+        salary = self._widget('number_input', label="Salaire")
+        submit = self._widget('button', label="METTRE À JOUR")
+        if salary is None or submit is None:
+            return
+        salary.set_value(float(self.rng.randrange(150000, 5000000, 1000)))
+        self._run('edition', submit.click())
+
+    def import_(self):
+        self.goto("Importation")
+        uploader = self.at.get('file_uploader')
+        if not uploader:
+            return
+        uploader[0].set_value((f"lot-{self.number}.xlsx", self.import_file,
+                               "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"))
+        self._run('import')
+        button = self._widget('button', label="IMPORTER")
+        if button is not None:
+            self._run('import', button.click())
+
+    def export(self):
+        self.goto("Exportation")
+        filename = self._widget('text_input', label="Nom du fichier")
+        button = self._widget('button', label="GÉNÉRER FICHIER EXCEL")
+        if filename is None or button is None:
+            return
+        # Nom de téléchargement propre à la session (le fichier vient du cache des exports)
+        filename.input(f"export-session-{self.number}.xlsx")
+        self._run('export', button.click())
+
+    def perform(self, action):
+        getattr(self, 'import_' if action == 'import' else action)()
+
+
+def percentiles(values):
+    """Percentiles de latence en millisecondes."""
+    if not values:
+        return {}
+    milliseconds = np.array(values) * 1000
+    return {
+        'nombre': len(values),
+        'p50': round(float(np.percentile(milliseconds, 50)), 1),
+        'p90': round(float(np.percentile(milliseconds, 90)), 1),
+        'p95': round(float(np.percentile(milliseconds, 95)), 1),
+        'p99': round(float(np.percentile(milliseconds, 99)), 1),
+        'max': round(float(milliseconds.max()), 1),
+    }
+
+
+def run_scenario(name, sessions, actions, seed, import_file, db_path):
+    """
+    Exécute un scénario : `sessions` sessions en parallèle, `actions` actions chacune.
+
+    Returns:
+        dict: Mesures du scénario
+    """
+    weights = SCENARIOS[name]
+    metrics = Metrics()
+    _current['metrics'] = metrics
+    sampler = MemorySampler()
+    rss_start = sampler.current()
+    employees_before = _count_employees(db_path)
+
+    def session_main(number):
+        rng = random.Random(f"{seed}-{name}-{number}")
+        try:
+            session = Session(number, rng, metrics, import_file)
+            session.start()
+            for action in rng.choices(list(weights), weights=list(weights.values()), k=actions):
+                session.perform(action)
+        except Exception as e:
+            metrics.add_error('session', f"{type(e).__name__}: {e}")
+
+    threads = [threading.Thread(target=session_main, args=(number,), name=f"session-{number}")
+               for number in range(sessions)]
+    sampler.start()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+    peak = sampler.stop()
+    _current['metrics'] = None
+
+    all_latencies = [value for action, values in metrics.latencies.items() if action != 'demarrage'
+                     for value in values]
+    return {
+        'sessions': sessions,
+        'actions_par_session': actions,
+        'employes_avant': employees_before,
+        'employes_apres': _count_employees(db_path),
+        'duree_s': round(duration, 2),
+        'reruns_par_s': round(len(all_latencies) / duration, 2) if duration else None,
+        'latence_ms': percentiles(all_latencies),
+        'latence_par_action_ms': {action: percentiles(values) for action, values in sorted(metrics.latencies.items())},
+        'attentes_verrou': metrics.lock_waits,
+        'attente_verrou_ms': round(metrics.lock_wait_seconds * 1000, 1),
+        'erreurs_verrou': metrics.lock_errors,
+        'file_ecriture_ms': percentiles(metrics.queue_waits),
+        'rss_debut_mo': round(rss_start / 2 ** 20, 1),
+        'rss_pic_mo': round(peak / 2 ** 20, 1),
+        'erreurs': len(metrics.errors),
+        'exemples_erreurs': sorted(set(metrics.errors))[:5],
+    }
+
+
+def _count_employees(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _revision():
+    """Révision git du code testé (None hors dépôt)."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, reference):
+    """Affiche l'évolution des indicateurs principaux par rapport à un rapport précédent."""
+    print(f"\nComparaison avec {reference.get('revision') or '?'} ({reference.get('date')})")
+    for name, current in report['scenarios'].items():
+        previous = reference.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        print(f"  {name}")
+        for label, path in (('latence p50 (ms)', ('latence_ms', 'p50')), ('latence p95 (ms)', ('latence_ms', 'p95')),
+                            ('attentes de verrou', ('attentes_verrou',)), ('pic RSS (Mo)', ('rss_pic_mo',))):
+            old, new = previous, current
+            for key in path:
+                old = old.get(key) if isinstance(old, dict) else None
+                new = new.get(key) if isinstance(new, dict) else None
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+            print(f"    {label:<20} {old:>10} -> {new:<10} {change}")
+
+
+def print_report(report):
+    for name, result in report['scenarios'].items():
+        latency = result['latence_ms']
+        print(f"\n[{name}] {result['sessions']} sessions x {result['actions_par_session']} actions, "
+              f"{result['duree_s']} s, {result['reruns_par_s']} reruns/s")
+        if latency:
+            print(f"  latence (ms) p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} max={latency['max']}")
+        for action, stats in result['latence_par_action_ms'].items():
+            print(f"    {action:<11} n={stats['nombre']:<5} p50={stats['p50']:<8} p95={stats['p95']}")
+        print(f"  verrous : {result['attentes_verrou']} attente(s), {result['attente_verrou_ms']} ms, "
+              f"{result['erreurs_verrou']} erreur(s) ; file d'écriture p95="
+              f"{result['file_ecriture_ms'].get('p95', 0)} ms")
+        print(f"  mémoire : {result['rss_debut_mo']} -> pic {result['rss_pic_mo']} Mo ; "
+              f"employés {result['employes_avant']} -> {result['employes_apres']}")
+        if result['erreurs']:
+            print(f"  {result['erreurs']} erreur(s) : {result['exemples_erreurs']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=10, help="Sessions simultanées")
+    parser.add_argument('--actions', type=int, default=20, help="Actions par session")
+    parser.add_argument('--rows', type=int, default=20000, help="Employés de la base générée")
+    parser.add_argument('--import-rows', type=int, default=200, help="Lignes du fichier importé")
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--workdir', help="Répertoire de travail (par défaut : temporaire, supprimé)")
+    parser.add_argument('--output', help="Fichier du rapport JSON")
+    parser.add_argument('--compare', help="Rapport JSON d'une version précédente")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='edm-load-')
+    os.makedirs(workdir, exist_ok=True)
+    shutil.copytree(os.path.join(ROOT, 'assets'), os.path.join(workdir, 'assets'), dirs_exist_ok=True)
+    os.chdir(workdir)
+    data_dir = os.path.join(workdir, 'data')
+    os.environ[DATA_DIR_ENV] = data_dir
+    os.makedirs(data_dir, exist_ok=True)
+
+    # Base générée avant tout démarrage de l'application
+    db_path = os.path.join(data_dir, f"{DEFAULT_DATASET}.db")
+    db = EmployeeDatabase(db_path)
+    db.clear_all_data()
+    db.bulk_load(generate_employees(args.rows, args.seed))
+    db.close()
+    import_file = excel_bytes(generate_employees(args.import_rows, args.seed + 1))
+
+    install_instrumentation()
+    report = {
+        'revision': _revision(),
+        'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'parametres': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'workdir')},
+        'scenarios': {},
+    }
+    try:
+        for name in args.scenarios:
+            report['scenarios'][name] = run_scenario(name, args.sessions, args.actions, args.seed,
+                                                     import_file, db_path)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        print(f"\nRapport écrit dans {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as reference:
+            compare(report, json.load(reference))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Banc d'essai de la canonicalisation à l'import (ExcelController.normalize_data).
+Génère des colonnes au format de l'application (noms et emails accentués en
+partie, téléphones en texte ou lus comme nombres), puis mesure chaque étape
+de la canonicalisation et la normalisation complète.
+
+Usage :
+    python benchmarks/normalization.py [--rows 100000 1000000] [--repeat 3] [--accents 0.4] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.excel_controller import (  # noqa: E402
+    ExcelController, _canonical_emails, _canonical_phones, _collapse_labels, _collapse_whitespace
+)
+from models.search import search_key_series  # noqa: E402
+
+FIRST_NAMES = ['Marie', 'Paul', 'Jean', 'Claire', 'Olivier']
+ACCENTED_FIRST_NAMES = ['Léa', 'Hélène', 'Éloïse']
+LAST_NAMES = ['Ndong', 'Obiang', 'Moussavou', 'Nze', 'Mba', 'Ondo', 'Mintsa']
+
+
+def make_fixture(rows, accents):
+    """
+    Crée un DataFrame tel que lu depuis Excel (format standard de l'application).
+
+    Args:
+        rows (int): Nombre de lignes
+        accents (float): Part des prénoms accentués (repris dans l'email)
+
+    Returns:
+        pandas.DataFrame: Données brutes
+    """
+    rng = np.random.default_rng(rows)
+    first = np.where(rng.random(rows) < accents,
+                     rng.choice(ACCENTED_FIRST_NAMES, rows), rng.choice(FIRST_NAMES, rows))
+    last = rng.choice(LAST_NAMES, rows)
+    national = rng.integers(60000000, 80000000, rows)
+    phone_format = rng.integers(0, 4, rows)
+    phones = np.empty(rows, dtype=object)
+    phones[phone_format == 0] = [f"0{n}" for n in national[phone_format == 0]]
+    phones[phone_format == 1] = [f"+241 0{n}" for n in national[phone_format == 1]]
+    # Cellule numérique : le 0 initial est perdu
+    phones[phone_format == 2] = national[phone_format == 2].astype(float)
+    phones[phone_format == 3] = None
+    return pd.DataFrame({
+        'Nom': [f"{l}  {f} " for l, f in zip(last, first)],
+        'Email': [f" {f.lower()}.{l.upper()}{i}@Exemple.ga" for i, (l, f) in enumerate(zip(last, first))],
+        'Salaire': rng.integers(150000, 5000000, rows),
+        'Téléphone': phones,
+        'Département': rng.choice(['Finance', ' RH', 'Informatique  ', 'Ventes'], rows),
+        'Poste': rng.choice(['Comptable', 'Développeur', 'Chargée  RH'], rows),
+    })
+
+
+def measure(step, repeat):
+    """Meilleur temps (secondes) d'une étape sans argument."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        step()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--accents', type=float, default=0.4, help="Part des prénoms accentués")
+    parser.add_argument('--json', action='store_true', help="Résultats au format JSON")
+    args = parser.parse_args()
+
+    controller = ExcelController.__new__(ExcelController)
+    results = []
+    for rows in args.rows:
+        df = make_fixture(rows, args.accents)
+        noms = _collapse_whitespace(df['Nom'])
+        emails = _canonical_emails(df['Email'])
+        steps = {
+            'nom': lambda: _collapse_whitespace(df['Nom']),
+            'email': lambda: _canonical_emails(df['Email']),
+            'telephone': lambda: _canonical_phones(df['Téléphone']),
+            'departement': lambda: _collapse_labels(df['Département']),
+            'cle_recherche': lambda: search_key_series(noms, emails),
+            'total': lambda: controller.normalize_data(df),
+        }
+        for name, step in steps.items():
+            results.append({'lignes': rows, 'etape': name, 'secondes': measure(step, args.repeat)})
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    for result in results:
+        print(f"{result['lignes']:>9} lignes  {result['etape']:<14} {result['secondes']:>9.4f} s")
+
+
+if __name__ == '__main__':
+    main()
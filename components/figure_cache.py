@@ -0,0 +1,90 @@
+"""
+Cache des figures Plotly du tableau de bord, partagé entre les sessions.
+Les figures sont indexées par type de graphique, révision des données et
+paramètres de mise en page : une réexécution sans changement de données
+(case à cocher, navigation...) réutilise la figure déjà construite.
+Hackathon Codon 2025
+"""
+import threading
+from collections import OrderedDict
+
+
+class FigureCache:
+    """
+    Cache LRU de figures Plotly borné en taille (octets du JSON sérialisé).
+    Chaque entrée conserve la figure construite et la taille de sa sérialisation :
+    le JSON lui-même n'est pas gardé, st.plotly_chart le refait à l'affichage.
+    """
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes (int): Taille maximale cumulée des figures sérialisées
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    @staticmethod
+    def make_key(chart_type, revision, params=None):
+        """
+        Construit la clé d'une figure.
+        
+        Args:
+            chart_type (str): Type de graphique (nom de la fonction de tracé)
+            revision: Révision des données (voir ExcelController.get_data_revision)
+            params (dict): Paramètres de mise en page ou variante du graphique
+        
+        Returns:
+            tuple: Clé hashable
+        """
+        return (chart_type, revision, tuple(sorted((params or {}).items())))
+    
+    def get_or_build(self, chart_type, revision, params, builder):
+        """
+        Retourne la figure en cache ou la construit puis la met en cache.
+        
+        Args:
+            chart_type (str): Type de graphique
+            revision: Révision des données
+            params (dict): Paramètres de mise en page ou variante
+            builder (callable): Fonction sans argument qui construit la figure
+        
+        Returns:
+            plotly.graph_objects.Figure: Figure (à ne pas modifier : elle est partagée)
+        """
+        key = self.make_key(chart_type, revision, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[0]
+            self.stats['misses'] += 1
+        
+        # Construction hors verrou (les autres sessions ne sont pas bloquées)
+        figure = builder()
+        size = len(figure.to_json())
+        
+        with self._lock:
+            # Une figure plus grande que le budget n'est pas conservée
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (figure, size)
+                self._size += size
+                self._evict()
+        return figure
+    
+    def clear(self):
+        """Vide le cache."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    
+    def _evict(self):
+        """Retire les figures les moins récemment utilisées au-delà de la taille maximale."""
+        while self._size > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self.stats['evictions'] += 1
@@ -0,0 +1,255 @@
+"""
+Profilage à la demande des réexécutions (reruns) Streamlit.
+Quand l'administrateur l'active, les N prochains reruns de sa session sont
+exécutés sous cProfile ; le temps est aussi attribué aux sections de page
+(mark) et aux graphiques (section, via render_chart_container). Les profils
+sont conservés sur disque (JSON + .prof pour snakeviz/pstats) avec une rétention.
+Désactivé, chaque point de mesure se réduit à une lecture de variable locale au thread.
+Hackathon Codon 2025
+"""
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from datetime import datetime
+
+import streamlit as st
+
+# Nombre de profils conservés
+DEFAULT_RETENTION = 20
+
+# Nombre de reruns profilés par défaut après activation
+DEFAULT_PROFILED_RERUNS = 5
+
+# Fonctions les plus coûteuses conservées dans le résumé
+TOP_FUNCTIONS = 30
+
+# Racine du projet : les fonctions de l'application sont distinguées des bibliothèques
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Profil du rerun en cours d'exécution sur ce thread (chaque session a son thread de script)
+_local = threading.local()
+_NULL_SECTION = contextlib.nullcontext()
+
+
+def mark(name):
+    """Débute une section de page (la précédente se termine) si le rerun est profilé."""
+    profile = getattr(_local, 'profile', None)
+    if profile is not None:
+        profile.mark(name)
+
+
+def section(name):
+    """
+    Contexte chronométrant un bloc (graphique...) si le rerun est profilé.
+    
+    Returns:
+        Contexte à utiliser dans un bloc with
+    """
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return _NULL_SECTION
+    return profile.section(name)
+
+
+class RerunProfile:
+    """Profil d'un rerun : cProfile et arbre des sections chronométrées."""
+    
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self.root = {'nom': 'rerun', 'ms': 0.0, 'enfants': []}
+        self._stack = [self.root]
+        self._mark = None
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError:
+            # Python 3.12+ : un seul profileur à la fois dans le processus (autre session profilée)
+            self._profiler = None
+        _local.profile = self
+    
+    def _open(self, name, parent):
+        node = {'nom': name, 'ms': 0.0, 'enfants': [], '_debut': time.perf_counter()}
+        parent['enfants'].append(node)
+        return node
+    
+    @staticmethod
+    def _close(node):
+        node['ms'] = round((time.perf_counter() - node.pop('_debut')) * 1000, 2)
+    
+    def mark(self, name):
+        if self._mark is not None:
+            self._close(self._mark)
+        self._mark = self._open(name, self.root)
+        self._stack = [self.root, self._mark]
+    
+    @contextlib.contextmanager
+    def section(self, name):
+        node = self._open(name, self._stack[-1])
+        self._stack.append(node)
+        try:
+            yield
+        finally:
+            self._close(node)
+            if self._stack and self._stack[-1] is node:
+                self._stack.pop()
+    
+    def stop(self, page, interrupted=False):
+        """
+        Termine le profil.
+        
+        Args:
+            page (str): Page affichée pendant le rerun
+            interrupted (bool): Rerun interrompu (st.rerun, st.stop) avant la fin du script
+        
+        Returns:
+            tuple: (résumé JSON-sérialisable, statistiques pstats ou None)
+        """
+        if getattr(_local, 'profile', None) is self:
+            _local.profile = None
+        stats = None
+        if self._profiler is not None:
+            self._profiler.disable()
+            stats = pstats.Stats(self._profiler)
+        if self._mark is not None and '_debut' in self._mark:
+            self._close(self._mark)
+        self.root['ms'] = round((time.perf_counter() - self._started) * 1000, 2)
+        summary = {
+            'date': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'page': page,
+            'duree_ms': self.root['ms'],
+            'interrompu': interrupted,
+            'sections': self.root,
+            'fonctions': _top_functions(stats) if stats is not None else [],
+        }
+        return summary, stats
+
+
+def _top_functions(stats, limit=TOP_FUNCTIONS):
+    """Fonctions les plus coûteuses (temps cumulé), avec leur temps propre et leurs appels."""
+    functions = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        in_project = filename.startswith(PROJECT_ROOT)
+        location = os.path.relpath(filename, PROJECT_ROOT) if in_project else os.path.basename(filename)
+        functions.append({
+            'fonction': f"{name} ({location}:{line})" if line else name,
+            'cumule_ms': round(cumulative * 1000, 2),
+            'propre_ms': round(own * 1000, 2),
+            'appels': calls,
+            'projet': in_project,
+        })
+    functions.sort(key=lambda function: function['cumule_ms'], reverse=True)
+    return functions[:limit]
+
+
+class ProfileStore:
+    """Profils enregistrés sur disque, du plus récent au plus ancien, avec rétention."""
+    
+    def __init__(self, directory, retention=DEFAULT_RETENTION):
+        """
+        Args:
+            directory (str): Répertoire des profils
+            retention (int): Nombre de profils conservés
+        """
+        self.directory = directory
+        self.retention = retention
+        self._lock = threading.Lock()
+    
+    def save(self, summary, stats=None):
+        """
+        Enregistre un profil (résumé JSON et, si disponible, statistiques .prof).
+        
+        Returns:
+            str: Nom du profil
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', summary['page'] or 'page').strip('-').lower()
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{slug}"
+        with open(os.path.join(self.directory, f"{name}.json"), 'w', encoding='utf-8') as output:
+            json.dump(summary, output, ensure_ascii=False)
+        if stats is not None:
+            stats.dump_stats(os.path.join(self.directory, f"{name}.prof"))
+        self._apply_retention()
+        return name
+    
+    def _apply_retention(self):
+        with self._lock:
+            for name in self.list_profiles()[self.retention:]:
+                for extension in ('.json', '.prof'):
+                    path = os.path.join(self.directory, name + extension)
+                    if os.path.exists(path):
+                        os.remove(path)
+    
+    def list_profiles(self):
+        """
+        Returns:
+            list: Noms des profils, du plus récent au plus ancien
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        names = [filename[:-5] for filename in os.listdir(self.directory) if filename.endswith('.json')]
+        return sorted(names, reverse=True)
+    
+    def load(self, name):
+        """
+        Returns:
+            dict: Résumé du profil (voir RerunProfile.stop)
+        """
+        with open(os.path.join(self.directory, os.path.basename(name) + '.json'), encoding='utf-8') as source:
+            return json.load(source)
+
+
+def begin_rerun(store):
+    """
+    Démarre le profil du rerun si la session l'a demandé (à appeler en début de script).
+    Un profil resté ouvert par un rerun interrompu est d'abord enregistré.
+    
+    Args:
+        store (ProfileStore): Stockage des profils
+    
+    Returns:
+        RerunProfile: Profil en cours, None si le rerun n'est pas profilé
+    """
+    _local.profile = None
+    pending = st.session_state.pop('profiling_active', None)
+    if pending is not None:
+        store.save(*pending[0].stop(pending[1], interrupted=True))
+    
+    if not st.session_state.get('profiling_enabled'):
+        return None
+    remaining = st.session_state.get('profiling_remaining', 0)
+    if remaining <= 0:
+        # Reruns demandés épuisés : l'interrupteur repasse à l'arrêt
+        st.session_state['profiling_enabled'] = False
+        return None
+    st.session_state['profiling_remaining'] = remaining - 1
+    profile = RerunProfile()
+    st.session_state['profiling_active'] = (profile, None)
+    return profile
+
+
+def end_rerun(store, profile, page):
+    """
+    Termine et enregistre le profil du rerun (à appeler en fin de script).
+    
+    Args:
+        store (ProfileStore): Stockage des profils
+        profile (RerunProfile): Profil retourné par begin_rerun (None : rien à faire)
+        page (str): Page affichée
+    """
+    if profile is None:
+        return
+    st.session_state.pop('profiling_active', None)
+    store.save(*profile.stop(page))
+
+
+def set_profiled_page(page):
+    """Note la page du rerun profilé (utilisée si le rerun est interrompu)."""
+    active = st.session_state.get('profiling_active')
+    if active is not None:
+        st.session_state['profiling_active'] = (active[0], page)
@@ -4,8 +4,11 @@ Architecture MVC - Séparation des responsabilités
 Hackathon Codon 2025
 """
 import streamlit as st
+import plotly.graph_objects as go
 import os
 
+from components.profiling import DEFAULT_PROFILED_RERUNS, section
+
 def load_styles():
     """Charge le CSS externe depuis assets/styles.css"""
     css_path = os.path.join("assets", "styles.css")
@@ -55,6 +58,86 @@ def render_navigation_sidebar():
     
     return st.session_state.current_page
 
+def render_dataset_selector(dataset_names, default_dataset):
+    """
+    Sélection du jeu de données actif dans la sidebar, avec création et suppression
+    (confirmée par la saisie du nom ; impossible pour le jeu par défaut).
+    
+    Args:
+        dataset_names (list): Jeux de données existants
+        default_dataset (str): Jeu sélectionné par défaut
+        
+    Returns:
+        tuple: (jeu actif, nom du jeu à créer ou None, suppression confirmée)
+    """
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### Jeu de données")
+    
+    if st.session_state.get('current_dataset') not in dataset_names:
+        st.session_state.current_dataset = default_dataset
+    
+    # Sans clé : le widget est recréé quand la liste des jeux change (création, suppression)
+    dataset = st.sidebar.selectbox(
+        "Jeu actif",
+        dataset_names,
+        index=dataset_names.index(st.session_state.current_dataset),
+        label_visibility="collapsed"
+    )
+    st.session_state.current_dataset = dataset
+    
+    new_dataset = None
+    drop_clicked = False
+    with st.sidebar.expander("Gérer les jeux"):
+        name = st.text_input("Nouveau jeu", placeholder="ex: societe-a_2025-01")
+        if st.button("Créer", use_container_width=True) and name.strip():
+            new_dataset = name.strip()
+        
+        # Suppression en deux temps : demande, puis confirmation par la saisie du nom
+        if dataset == default_dataset:
+            st.caption("Le jeu par défaut ne peut pas être supprimé")
+        elif st.session_state.get('drop_pending') != dataset:
+            st.button(f"Supprimer « {dataset} »", use_container_width=True,
+                      help="Supprime le jeu actif et toutes ses données (après confirmation)",
+                      on_click=lambda: st.session_state.update(drop_pending=dataset))
+        else:
+            st.warning(f"Supprimer « {dataset} » et toutes ses données ? "
+                       "Un instantané est conservé dans backups/_supprimes.")
+            confirmation = st.text_input("Saisir le nom du jeu pour confirmer", key="drop_confirmation")
+            col1, col2 = st.columns(2)
+            with col1:
+                drop_clicked = st.button("Confirmer", type="primary", use_container_width=True,
+                                         disabled=confirmation != dataset)
+            with col2:
+                st.button("Annuler", use_container_width=True,
+                          on_click=lambda: st.session_state.pop('drop_pending', None))
+    
+    return dataset, new_dataset, drop_clicked
+
+def render_employee_picker(lookup, limit=20, key="employee_picker"):
+    """
+    Sélecteur d'employé avec saisie assistée : seules les `limit` meilleures
+    correspondances sont demandées à la base à chaque saisie.
+    
+    Args:
+        lookup (callable): Fonction lookup(texte, limit) retournant un DataFrame
+            avec au moins les colonnes 'id' et 'nom' (texte vide : premiers employés)
+        limit (int): Nombre maximum de propositions
+        key (str): Préfixe des clés des widgets
+        
+    Returns:
+        int: ID de l'employé choisi, None si aucun
+    """
+    query = st.text_input("Rechercher un employé (nom ou email)", key=f"{key}_query",
+                          placeholder="Tapez quelques lettres...")
+    matches = lookup(query, limit)
+    if matches.empty:
+        st.caption("Aucun employé ne correspond à la saisie")
+        return None
+    
+    labels = {int(employee_id): f"ID {employee_id} - {nom}"
+              for employee_id, nom in zip(matches['id'], matches['nom'])}
+    return st.selectbox("Choisir un employé", list(labels), format_func=labels.get, key=f"{key}_select")
+
 def render_admin_controls():
     """Contrôles d'administration dans la sidebar"""
     st.sidebar.markdown("---")
@@ -68,7 +151,120 @@ def render_admin_controls():
                                      help="Vider le cache et supprimer toutes les données",
                                      use_container_width=True)
     
-    return refresh_clicked, clear_clicked
+    # Profilage à la demande : les N prochains reruns de la session
+    def arm_profiling():
+        enabled = st.session_state.get('profiling_enabled')
+        st.session_state['profiling_remaining'] = st.session_state.get('profiling_reruns', DEFAULT_PROFILED_RERUNS) if enabled else 0
+    
+    st.sidebar.toggle("Profiler les reruns", key='profiling_enabled', on_change=arm_profiling,
+                      help="Enregistre un profil (sections, graphiques, fonctions) pour les prochains reruns")
+    if st.session_state.get('profiling_enabled'):
+        st.sidebar.number_input("Reruns à profiler", min_value=1, max_value=100,
+                                value=DEFAULT_PROFILED_RERUNS, key='profiling_reruns', on_change=arm_profiling)
+        st.sidebar.caption(f"Reruns restants : {st.session_state.get('profiling_remaining', 0)}")
+    show_profiles = st.sidebar.checkbox("Afficher les profils", key='profiling_show')
+    
+    return refresh_clicked, clear_clicked, show_profiles
+
+def render_maintenance_panel(reports, churn, churn_threshold):
+    """
+    État de la maintenance de la base dans la sidebar.
+    
+    Args:
+        reports (list): Derniers rapports de maintenance (du plus récent au plus ancien)
+        churn (int): Modifications depuis la dernière maintenance
+        churn_threshold (int): Seuil de déclenchement automatique
+        
+    Returns:
+        bool: True si une maintenance immédiate est demandée
+    """
+    with st.sidebar.expander("Maintenance de la base"):
+        st.caption(f"Modifications depuis la dernière maintenance : {churn} / {churn_threshold}")
+        if reports:
+            last = reports[0]
+            st.caption(f"Dernière exécution : {last['debut']} ({last['raison']}, {last['duree_ms']:.0f} ms)")
+            for step in last['etapes']:
+                st.caption(f"• {step['etape']} ({step['duree_ms']:.0f} ms) : {step['detail']}")
+            st.caption(f"Taille : {last['taille_avant'] / 1e6:.1f} Mo → {last['taille_apres'] / 1e6:.1f} Mo")
+        else:
+            st.caption("Aucune maintenance effectuée")
+        return st.button("Lancer la maintenance", use_container_width=True)
+
+def render_backup_panel(backups):
+    """
+    Sauvegardes de la base dans la sidebar : instantané immédiat et restauration.
+    
+    Args:
+        backups (list): Instantanés disponibles (du plus récent au plus ancien)
+        
+    Returns:
+        tuple: (sauvegarde demandée, nom de l'instantané à restaurer ou None)
+    """
+    restore_name = None
+    with st.sidebar.expander("Sauvegardes"):
+        backup_clicked = st.button("Sauvegarder maintenant", use_container_width=True)
+        if backups:
+            labels = {
+                backup['nom']: f"{backup['date']}{' · ' + backup['libelle'] if backup['libelle'] else ''} "
+                               f"({backup['taille'] / 1e6:.1f} Mo)"
+                for backup in backups
+            }
+            selected = st.selectbox("Instantané", list(labels), format_func=labels.get)
+            if st.button("Restaurer", use_container_width=True,
+                         help="Remplace les données actuelles (l'état courant est sauvegardé avant)"):
+                restore_name = selected
+        else:
+            st.caption("Aucune sauvegarde")
+    return backup_clicked, restore_name
+
+def render_profiling_panel(profile_names, load_profile):
+    """
+    Résumé d'un profil de rerun : sections en icicle (style flame graph) et fonctions les plus coûteuses.
+    
+    Args:
+        profile_names (list): Profils enregistrés (du plus récent au plus ancien)
+        load_profile (callable): Charge le résumé d'un profil à partir de son nom
+    """
+    with st.expander("Profils d'exécution", expanded=True):
+        if not profile_names:
+            st.caption("Aucun profil enregistré : activez « Profiler les reruns » dans la barre latérale")
+            return
+        name = st.selectbox("Profil", profile_names)
+        profile = load_profile(name)
+        st.caption(f"{profile['date']} · {profile['page']} · {profile['duree_ms']:.0f} ms"
+                   f"{' · rerun interrompu' if profile['interrompu'] else ''}")
+        
+        # Arbre des sections : valeur = temps propre (hors sous-sections), le total est en survol
+        ids, labels, parents, values, totals = [], [], [], [], []
+        def add(node, parent_id):
+            node_id = f"{parent_id}/{len(ids)}"
+            ids.append(node_id)
+            labels.append(node['nom'])
+            parents.append(parent_id)
+            totals.append(node['ms'])
+            values.append(max(node['ms'] - sum(child['ms'] for child in node['enfants']), 0))
+            for child in node['enfants']:
+                add(child, node_id)
+        add(profile['sections'], "")
+        
+        fig = go.Figure(go.Icicle(
+            ids=ids, labels=labels, parents=parents, values=values, customdata=totals,
+            branchvalues='remainder', tiling=dict(orientation='v'),
+            hovertemplate="%{label}<br>%{customdata:.1f} ms<extra></extra>"
+        ))
+        fig.update_layout(height=350, margin=dict(t=10, l=10, r=10, b=10))
+        st.plotly_chart(fig, use_container_width=True)
+        
+        if profile['fonctions']:
+            project_only = st.checkbox("Fonctions de l'application uniquement", value=True)
+            functions = [function for function in profile['fonctions'] if function['projet'] or not project_only]
+            st.dataframe(
+                [{'Fonction': function['fonction'], 'Cumulé (ms)': function['cumule_ms'],
+                  'Propre (ms)': function['propre_ms'], 'Appels': function['appels']} for function in functions],
+                use_container_width=True, hide_index=True
+            )
+        else:
+            st.caption("Statistiques cProfile indisponibles pour ce rerun (un autre profil était en cours)")
 
 def render_metric_card(title, value, description, color="#667eea"):
     """Affiche une carte métrique moderne avec alignement parfait"""
@@ -83,7 +279,9 @@ def render_metric_card(title, value, description, color="#667eea"):
 def render_chart_container(content):
     """Conteneur pour les graphiques"""
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    content()
+    # Temps attribué au graphique quand le rerun est profilé
+    with section(content.__name__):
+        content()
     st.markdown('</div>', unsafe_allow_html=True)
 
 def show_empty_state():
@@ -117,13 +315,14 @@ def show_warning(message):
     st.warning(message)
 
 def create_download_button(data, filename, label="Télécharger", mime_type="application/octet-stream"):
-    """Bouton de téléchargement standardisé"""
+    """Bouton de téléchargement standardisé (sans rerun au clic ; data peut être une fonction appelée au clic)"""
     return st.download_button(
         label=label,
         data=data,
         file_name=filename,
         mime=mime_type,
         type="primary",
+        on_click="ignore",
         use_container_width=True
     )
 
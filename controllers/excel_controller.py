@@ -1,5 +1,374 @@
+import importlib.util
+import io
+import itertools
+import os
+import tempfile
+import zipfile
+import numpy as np
 import pandas as pd
-from models.database import EmployeeDatabase
+from openpyxl import Workbook, load_workbook
+from models.database import EmployeeDatabase, EMPLOYEE_COLUMNS
+from models.aggregation import AggregationEngine, DASHBOARD_GROUPINGS
+from models.export_cache import ExportCache
+from models.search import STRING_DTYPE, search_key_series
+
+# Nombre de lignes à partir duquel un import passe en chargement en masse
+BULK_LOAD_THRESHOLD = 50000
+
+# Taille (octets) à partir de laquelle un classeur est lu en flux plutôt que par pandas/openpyxl
+LARGE_EXCEL_BYTES = 1024 * 1024
+
+# Caractères interdits dans un nom de feuille Excel
+INVALID_SHEET_CHARS = '[]:*?/\\'
+
+# Lignes de données par feuille Excel (1 048 576 lignes, en-tête compris)
+EXCEL_MAX_DATA_ROWS = 1048576 - 1
+
+# Lignes par partie (feuille ou fichier) d'un export découpé
+EXPORT_ROWS_PER_PART = 500000
+
+# Découpages d'un export au-delà de la taille d'une partie
+EXPORT_SPLIT_MODES = ('fichiers', 'feuilles')
+
+# Taille des blocs copiés dans une archive ZIP produite en flux
+ZIP_CHUNK_BYTES = 1024 * 1024
+
+# Indicatif des numéros saisis sans indicatif (Gabon : pas de préfixe national, le 0 initial fait partie du numéro)
+DEFAULT_COUNTRY_CODE = '241'
+
+# Chiffres d'un numéro national : au-delà, un numéro commençant par l'indicatif le contient déjà
+NATIONAL_NUMBER_MAX_DIGITS = 8
+
+# Chiffres d'un numéro E.164 complet (indicatif compris)
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+
+# Expressions de la canonicalisation à l'import (RE2, compilées une fois par colonne Arrow)
+# Espaces Unicode compris (insécable...) : \s de RE2 ne couvre que l'ASCII
+WHITESPACE_REGEX = r'[\s\p{Z}]+'
+# Espaces à remplacer par une espace simple : répétitions et espaces autres que ' '
+# (une espace simple entre deux mots, cas le plus courant, n'est pas réécrite)
+IRREGULAR_WHITESPACE_REGEX = (r'[\s\p{Z}]{2,}|[\t\n\v\f\r\x{85}\x{a0}\x{1680}\x{2000}-\x{200a}'
+                              r'\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}]')
+NON_DIGIT_REGEX = r'\D+'
+# Numéro lu comme nombre par Excel ("77123456.0")
+NUMERIC_PHONE_REGEX = r'^(\d+)\.0+$'
+
+# Types des cellules numériques d'une colonne object (lecteurs Excel, pandas)
+NUMERIC_CELL_TYPES = [int, float, np.int64, np.float64]
+
+# Valeurs textuelles tenues pour vides (téléphone, département, poste)
+EMPTY_TEXT_VALUES = ['', 'None', 'none', 'NONE']
+
+
+def _sheet_title(name, used_titles):
+    """
+    Construit un nom de feuille Excel valide (31 caractères max) et unique.
+    
+    Args:
+        name (str): Nom souhaité
+        used_titles (set): Noms déjà utilisés dans le classeur (mis à jour)
+        
+    Returns:
+        str: Nom de feuille utilisable
+    """
+    base = ''.join('_' if char in INVALID_SHEET_CHARS else char for char in name).strip() or "Feuille"
+    base = base[:31]
+    title = base
+    suffix = 2
+    while title.lower() in used_titles:
+        title = f"{base[:31 - len(str(suffix)) - 1]}~{suffix}"
+        suffix += 1
+    used_titles.add(title.lower())
+    return title
+
+
+def _nonempty_batches(batches):
+    """
+    Lit le premier lot avant la création d'un classeur : un classeur en écriture
+    seule jamais enregistré laisse un flux ouvert sur un fichier temporaire.
+    
+    Returns:
+        iterator: Tous les lots (premier compris), None s'il n'y a aucune ligne
+    """
+    first = next(batches, None)
+    if not first:
+        return None
+    return itertools.chain([first], batches)
+
+
+def _as_text(values):
+    """Colonne en chaînes Arrow (valeurs manquantes : <NA>)."""
+    return values.astype(STRING_DTYPE)
+
+
+def _to_python(values):
+    """Colonne Arrow en chaînes Python (dtype object), None pour les valeurs manquantes ou vides."""
+    return values.astype(object).where((values.str.len() > 0).fillna(False), None)
+
+
+def _collapse_whitespace(values):
+    """Espaces superflus retirés (début, fin, répétitions)."""
+    return _to_python(_as_text(values).str.replace(IRREGULAR_WHITESPACE_REGEX, ' ', regex=True).str.strip(' '))
+
+
+def _collapse_labels(values):
+    """
+    _collapse_whitespace pour une colonne à peu de valeurs distinctes (département,
+    poste) : seules les valeurs distinctes sont canonicalisées, puis redistribuées.
+    """
+    codes, uniques = pd.factorize(values)
+    canonical = np.append(_collapse_whitespace(pd.Series(uniques, dtype=object)).to_numpy(dtype=object), None)
+    # Code -1 (valeur manquante) : dernier élément, None
+    return pd.Series(canonical[codes], index=values.index, dtype=object)
+
+
+def _canonical_emails(values):
+    """Emails sans espaces et en minuscules ; vides -> None."""
+    emails = _as_text(values).str.strip().str.replace(WHITESPACE_REGEX, '', regex=True)
+    return _to_python(emails.str.lower())
+
+
+def _numeric_cells(values):
+    """Cellules lues comme nombres (booléens exclus), en tableau numpy de booléens."""
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return np.zeros(len(values), dtype=bool)
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return values.notna().to_numpy()
+    if values.dtype != object:
+        return np.zeros(len(values), dtype=bool)
+    return values.map(type).isin(NUMERIC_CELL_TYPES).to_numpy()
+
+
+def _canonical_phones(values, country_code=DEFAULT_COUNTRY_CODE):
+    """
+    Numéros au format E.164 (+<indicatif><numéro>, chiffres uniquement).
+    Les numéros sans indicatif reçoivent country_code ; "00" vaut "+". Un numéro
+    hors des longueurs E.164 est conservé tel quel (espaces retirés aux extrémités).
+    Une cellule numérique sans indicatif a perdu le 0 initial du numéro national
+    (077123456 lu 77123456.0) : il est rétabli, comme pour le même numéro saisi en texte.
+    
+    Args:
+        values (pandas.Series): Numéros dans des formats mixtes
+        country_code (str): Indicatif des numéros nationaux
+        
+    Returns:
+        pandas.Series: Numéros canoniques (None pour les valeurs vides)
+    """
+    text = _as_text(values).str.strip()
+    # Nombres, y compris déjà convertis en texte ("77123456.0" : réécrit par l'expression)
+    unformatted = text.str.replace(NUMERIC_PHONE_REGEX, r'\1', regex=True)
+    numeric = _numeric_cells(values) | (unformatted != text).fillna(False).to_numpy(dtype=bool)
+    text = unformatted
+    digits = text.str.replace(NON_DIGIT_REGEX, '', regex=True)
+    plus = text.str.startswith('+').fillna(False)
+    double_zero = ~plus & digits.str.startswith('00').fillna(False)
+    digits = digits.where(~double_zero, digits.str.slice(2))
+    
+    # Indicatif déjà présent sans "+" : numéro plus long qu'un numéro national
+    has_country = plus | double_zero | (digits.str.startswith(country_code).fillna(False)
+                                        & (digits.str.len() > NATIONAL_NUMBER_MAX_DIGITS).fillna(False))
+    lost_zero = numeric & ~has_country.to_numpy(dtype=bool)
+    if lost_zero.any():
+        digits = digits.where(~lost_zero, '0' + digits)
+    e164 = ('+' + digits).where(has_country, '+' + country_code + digits)
+    
+    length = digits.str.len() + (~has_country) * len(country_code)
+    valid = ((length >= E164_MIN_DIGITS) & (length <= E164_MAX_DIGITS)).fillna(False)
+    return _to_python(e164.where(valid, text))
+
+
+class _SplitSheet:
+    """
+    Feuille en écriture seule prolongée dans une nouvelle feuille (« Nom (2) »...)
+    tous les max_rows lignes, l'en-tête étant répété en tête de chaque feuille.
+    """
+    
+    def __init__(self, workbook, title, header, used_titles, max_rows=EXCEL_MAX_DATA_ROWS):
+        """
+        Args:
+            workbook (Workbook): Classeur en écriture seule
+            title (str): Nom de la première feuille
+            header (list): En-tête répété sur chaque feuille
+            used_titles (set): Noms déjà utilisés dans le classeur (mis à jour)
+            max_rows (int): Lignes de données par feuille
+        """
+        self.workbook = workbook
+        self.title = title
+        self.header = header
+        self.used_titles = used_titles
+        self.max_rows = max_rows
+        self.sheets = 0
+        self._new_sheet()
+    
+    def _new_sheet(self):
+        self.sheets += 1
+        name = self.title if self.sheets == 1 else f"{self.title} ({self.sheets})"
+        self._sheet = self.workbook.create_sheet(_sheet_title(name, self.used_titles))
+        self._sheet.append(self.header)
+        self._rows = 0
+    
+    def append(self, row):
+        if self._rows >= self.max_rows:
+            self._new_sheet()
+        self._sheet.append(row)
+        self._rows += 1
+
+
+class _ZipChunkSink(io.RawIOBase):
+    """
+    Destination non positionnable d'une archive ZIP : zipfile écrit alors chaque
+    entrée en flux (descripteur de données) et les octets sont récupérés par blocs.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self):
+        """Retourne et oublie les octets écrits depuis le dernier appel."""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _read_openpyxl(source, nrows=None):
+    """Lecture pandas avec openpyxl (moteur historique, conversions de cellules pandas)."""
+    return pd.read_excel(source, engine='openpyxl', nrows=nrows)
+
+
+def _read_openpyxl_streaming(source, nrows=None):
+    """
+    Lecture en flux avec openpyxl en lecture seule : les lignes sont lues une à une,
+    sans conversion par cellule, et la lecture s'arrête après nrows lignes.
+    """
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # Dimensions parfois absentes ou fausses dans les fichiers produits par d'autres outils
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        data = []
+        for row in rows:
+            if nrows is not None and len(data) >= nrows:
+                break
+            # Lignes entièrement vides ignorées, comme pandas
+            if any(value is not None for value in row):
+                data.append(row[:len(columns)] + (None,) * (len(columns) - len(row)))
+        return pd.DataFrame(data, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _read_calamine(source, nrows=None):
+    """Lecture pandas avec calamine (lecteur natif, paquet python-calamine)."""
+    return pd.read_excel(source, engine='calamine', nrows=nrows)
+
+
+# Lecteurs de classeurs disponibles, par nom
+EXCEL_READERS = {
+    'openpyxl': _read_openpyxl,
+    'openpyxl_streaming': _read_openpyxl_streaming,
+    'calamine': _read_calamine,
+}
+
+
+def _source_size(source):
+    """Taille en octets d'un chemin ou d'un fichier uploadé (None si inconnue)."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    size = getattr(source, 'size', None)
+    if size is None and hasattr(source, 'seek') and hasattr(source, 'tell'):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+    return size
+
+
+def choose_excel_engines(size=None, preview=False):
+    """
+    Ordonne les lecteurs selon le travail demandé : le premier est préféré,
+    les suivants servent de repli.
+    - Aperçu : lecture en flux, qui s'arrête après les premières lignes
+      (calamine analyse toute la feuille avant de rendre la première ligne)
+    - Chargement complet : calamine s'il est installé, sinon pandas/openpyxl
+      pour les petits fichiers et la lecture en flux au-delà de LARGE_EXCEL_BYTES
+    
+    Args:
+        size (int): Taille du fichier en octets (None si inconnue)
+        preview (bool): Seules les premières lignes sont lues
+        
+    Returns:
+        list: Noms de lecteurs (clés de EXCEL_READERS)
+    """
+    calamine = ['calamine'] if importlib.util.find_spec('python_calamine') else []
+    if preview:
+        return ['openpyxl_streaming'] + calamine + ['openpyxl']
+    if size is not None and size < LARGE_EXCEL_BYTES:
+        return calamine + ['openpyxl', 'openpyxl_streaming']
+    return calamine + ['openpyxl_streaming', 'openpyxl']
+
+
+def read_excel_file(source, nrows=None, engine=None):
+    """
+    Lit la première feuille d'un classeur Excel avec le lecteur le plus adapté.
+    En cas d'échec d'un lecteur (paquet absent, fichier mal interprété), les
+    lecteurs suivants sont essayés ; l'erreur du premier est levée si tous échouent.
+    
+    Args:
+        source: Chemin ou fichier (ex: fichier uploadé via Streamlit)
+        nrows (int): Nombre de lignes lues (None : toutes, aperçu sinon)
+        engine (str): Lecteur imposé (clé de EXCEL_READERS), sans repli
+        
+    Returns:
+        tuple: (DataFrame lu, nom du lecteur utilisé)
+    """
+    if engine is not None:
+        if engine not in EXCEL_READERS:
+            raise ValueError(f"Lecteur Excel inconnu: {engine}")
+        engines = [engine]
+    else:
+        engines = choose_excel_engines(_source_size(source), preview=nrows is not None)
+    
+    first_error = None
+    for name in engines:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        try:
+            return EXCEL_READERS[name](source, nrows=nrows), name
+        except Exception as e:
+            # Paquet absent : erreur peu informative, celle d'un vrai lecteur est préférée
+            if first_error is None or isinstance(first_error, ImportError):
+                first_error = e
+    raise first_error
+
+
+def _accumulate_salary(stats, key, salary):
+    """
+    Met à jour les agrégats [effectif, somme, max, min] d'un groupe.
+    Les groupes et salaires NULL sont ignorés, comme dans pandas.groupby.
+    """
+    if key is None or salary is None:
+        return
+    if key not in stats:
+        stats[key] = [0, 0.0, salary, salary]
+    group = stats[key]
+    group[0] += 1
+    group[1] += salary
+    group[2] = max(group[2], salary)
+    group[3] = min(group[3], salary)
+
 
 class ExcelController:
     """
@@ -8,33 +377,50 @@ class ExcelController:
     Architecture MVC : ce contrôleur fait le lien entre la Vue (Streamlit) et le Modèle (Database).
     """
     
-    def __init__(self):
+    def __init__(self, db=None):
         """
         Initialise le contrôleur avec une instance de la base de données.
+        
+        Args:
+            db (EmployeeDatabase): Base à utiliser (par défaut : employees.db,
+                moteur analytique selon EDM_ANALYTICS_BACKEND)
         """
         # Création de l'instance de base de données (Modèle)
-        self.db = EmployeeDatabase()
+        self.db = db if db is not None else EmployeeDatabase()
+        
+        # Moteur d'agrégation en une passe pour le tableau de bord
+        self.aggregations = AggregationEngine(self.db)
+        self._dashboard_aggregates = (None, None)
+        
+        # Fichiers d'export réutilisés tant que les données et les paramètres sont inchangés
+        base_dir, db_filename = os.path.split(os.path.abspath(self.db.db_path))
+        self.export_cache = ExportCache(os.path.join(base_dir, 'exports', os.path.splitext(db_filename)[0]))
     
-    def import_excel(self, uploaded_file):
+    def import_excel(self, uploaded_file, bulk=None, on_insert=None):
         """
         Importe un fichier Excel vers la base de données SQLite.
         Fonctionnalité 1 du hackathon : IMPORTATION .xlsx
         
         Args:
             uploaded_file: Fichier Excel uploadé via Streamlit
-            
+            bulk (bool): Chargement en masse (voir EmployeeDatabase.bulk_load) ;
+                par défaut, activé au-delà de BULK_LOAD_THRESHOLD lignes
+            on_insert (callable): Fonction on_insert(conn, nombre de lignes) exécutée
+                dans la transaction de l'insertion (voir controllers/ingestion.py)
+        
         Returns:
             dict: {
                 "success": bool,
                 "message": str,
                 "imported": int,
                 "errors": int,
-                "error_details": list
+                "error_details": list,
+                "engine": str (lecteur Excel utilisé, en cas de succès)
             }
         """
         try:
-            # Étape 1: Lecture du fichier Excel avec pandas
-            df = pd.read_excel(uploaded_file)
+            # Étape 1: Lecture du fichier Excel (lecteur choisi selon la taille)
+            df, engine = self.read_excel(uploaded_file)
             
             # Étape 2: Validation basique du fichier
             if df.empty:
@@ -50,7 +436,12 @@ class ExcelController:
             normalized_df = self.normalize_data(df)
             
             # Étape 4: Insertion en base de données SQLite
-            count = self.db.insert_from_dataframe(normalized_df)
+            if bulk is None:
+                bulk = len(normalized_df) >= BULK_LOAD_THRESHOLD
+            if bulk:
+                count = self.db.bulk_load(normalized_df, on_insert)
+            else:
+                count = self.db.insert_from_dataframe(normalized_df, on_insert)
             
             # Succès : retour des informations
             return {
@@ -58,7 +449,8 @@ class ExcelController:
                 "message": f"{count} employés importés avec succès",
                 "imported": count,
                 "errors": 0,
-                "error_details": []
+                "error_details": [],
+                "engine": engine
             }
             
         except FileNotFoundError:
@@ -94,11 +486,30 @@ class ExcelController:
                 "error_details": [f"Erreur: {str(e)}"]
             }
     
+    def read_excel(self, source, nrows=None, engine=None):
+        """
+        Lit un classeur Excel (voir read_excel_file).
+        
+        Args:
+            source: Chemin ou fichier uploadé
+            nrows (int): Nombre de lignes lues (None : toutes)
+            engine (str): Lecteur imposé ('openpyxl', 'openpyxl_streaming', 'calamine')
+            
+        Returns:
+            tuple: (DataFrame lu, nom du lecteur utilisé)
+        """
+        return read_excel_file(source, nrows=nrows, engine=engine)
+    
     def normalize_data(self, df):
         """
         Normalise les différents formats Excel vers une structure unique.
         Gère vos 2 formats : employees-1.xlsx et employees-2.xlsx
         
+        Les valeurs sont ensuite canonicalisées colonne par colonne : téléphones
+        E.164 (indicatif DEFAULT_COUNTRY_CODE par défaut), emails en minuscules
+        sans espaces, espaces superflus retirés des noms, départements et postes,
+        et clé de recherche sans accents (cle_recherche).
+        
         Args:
             df (pandas.DataFrame): DataFrame lu depuis Excel
             
@@ -137,64 +548,435 @@ class ExcelController:
         else:
             normalized['poste'] = None
         
+        # Salaire numérique (colonne REAL typée) : les valeurs non numériques deviennent vides
+        normalized['salaire'] = pd.to_numeric(normalized['salaire'], errors='coerce')
+        
+        # Canonicalisation (opérations vectorisées, sans parcours ligne à ligne) :
+        # doublons, index et regroupements ne dépendent plus de la saisie
+        normalized['nom'] = _collapse_whitespace(normalized['nom'])
+        normalized['email'] = _canonical_emails(normalized['email'])
+        normalized['telephone'] = _canonical_phones(normalized['telephone'])
+        for col in ['departement', 'poste']:
+            normalized[col] = _collapse_labels(normalized[col])
+        
         # Nettoyage des données : remplacement des NaN et valeurs vides par None
         normalized = normalized.where(pd.notnull(normalized), None)
         
-        # Nettoyage spécifique des chaînes vides et 'None' 
+        # Nettoyage spécifique des chaînes vides et 'None' (isin : table de hachage, plus rapide que replace)
         for col in ['telephone', 'departement', 'poste']:
             if col in normalized.columns:
-                normalized[col] = normalized[col].replace(['', 'None', 'none', 'NONE'], None)
+                normalized[col] = normalized[col].where(~normalized[col].isin(EMPTY_TEXT_VALUES), None)
+        
+        # Clé de recherche calculée sur la colonne entière (identique à search_key ligne à ligne)
+        normalized['cle_recherche'] = search_key_series(normalized['nom'], normalized['email'])
         
         return normalized
     
-    def export_to_excel(self, filename="export_employees.xlsx"):
+    @staticmethod
+    def canonicalize_employee_fields(values):
         """
-        Exporte toutes les données de la base SQLite vers un fichier Excel.
+        Canonicalise des champs saisis un à un (formulaire de la page Gestion)
+        avec les mêmes règles que l'import (voir normalize_data).
+        
+        Args:
+            values (dict): Valeurs saisies {champ: valeur} (nom, email, telephone,
+                departement, poste ; les autres champs sont repris tels quels)
+                
+        Returns:
+            dict: Valeurs canoniques (None pour les champs vides)
+            
+        Raises:
+            ValueError: Si le nom est vide
+        """
+        canonicalizers = {
+            'nom': _collapse_whitespace,
+            'email': _canonical_emails,
+            'telephone': _canonical_phones,
+            'departement': _collapse_whitespace,
+            'poste': _collapse_whitespace,
+        }
+        canonical = {}
+        for field, value in values.items():
+            if field in canonicalizers:
+                value = canonicalizers[field](pd.Series([value])).iloc[0]
+            canonical[field] = value
+        if 'nom' in canonical and canonical['nom'] is None:
+            raise ValueError("Le nom est obligatoire")
+        return canonical
+    
+    def _cached_export(self, kind, params, builder, filename, use_cache):
+        """
+        Génère un export via le cache disque (ou directement dans filename sans cache).
+        
+        Args:
+            kind (str): Type d'export et format (clé du cache)
+            params (dict): Paramètres de l'export (clé du cache)
+            builder (callable): Écrit le classeur au chemin reçu et retourne ses
+                métadonnées, ou None s'il n'y a aucune donnée
+            filename (str): Nom du fichier (écrit seulement sans cache, sinon nom de téléchargement)
+            use_cache (bool): Réutiliser un fichier déjà généré
+            
+        Returns:
+            tuple: (chemin du fichier ou None, métadonnées, True si réutilisé)
+        """
+        if not use_cache or self.export_cache is None:
+            info = builder(filename)
+            return (filename if info is not None else None), info, False
+        key = self.export_cache.make_key(self.get_data_revision(), kind, params)
+        return self.export_cache.get_or_create(key, os.path.splitext(filename)[1] or '.xlsx', builder)
+    
+    @staticmethod
+    def _export_filters_key(filters):
+        """Filtres normalisés pour la clé du cache (valeurs vides retirées, listes triées)."""
+        normalized = {}
+        for name, value in (filters or {}).items():
+            if value is None or value == '' or value == []:
+                continue
+            normalized[name] = sorted(value, key=str) if isinstance(value, (list, tuple, set)) else value
+        return normalized
+    
+    def export_to_excel(self, filename="export_employees.xlsx", filters=None, columns=None,
+                        sort_by=None, ascending=True, use_cache=True, rows_per_part=EXPORT_ROWS_PER_PART,
+                        split='fichiers', progress=None):
+        """
+        Exporte les données de la base SQLite vers un fichier Excel.
         Fonctionnalité 4 du hackathon : EXPORT vers Excel
         
+        Les filtres, la projection et le tri sont compilés en requête SQL
+        paramétrée (voir EmployeeDatabase.build_filtered_query) ; les lignes
+        sont écrites au fil de la lecture dans un classeur en mode écriture
+        seule, sans DataFrame intermédiaire. Le fichier est conservé dans le
+        cache des exports : une demande identique sur des données inchangées
+        le réutilise sans relire la base.
+        
+        Au-delà de rows_per_part lignes (au plus la limite d'une feuille Excel),
+        l'export est découpé : en fichiers réunis dans une archive ZIP produite
+        en flux (voir iter_export_archive), ou en feuilles du même classeur.
+        
         Args:
-            filename (str): Nom du fichier Excel à créer
+            filename (str): Nom du fichier Excel (nom de téléchargement ; écrit tel quel sans cache).
+                Un export découpé en fichiers prend l'extension .zip
+            filters (dict): Filtres optionnels (departement, poste, salaire_min,
+                salaire_max, recherche)
+            columns (list): Colonnes à exporter (toutes par défaut)
+            sort_by (str): Colonne de tri optionnelle
+            ascending (bool): Ordre croissant si True
+            use_cache (bool): Réutiliser un export identique déjà généré
+            rows_per_part (int): Lignes par feuille ou par fichier d'un export découpé
+            split (str): Découpage au-delà de rows_per_part : 'fichiers' ou 'feuilles'
+            progress (callable): Appelée avec (lignes exportées, total) au fil de l'écriture
             
         Returns:
             dict: {
                 "success": bool,
                 "message": str,
-                "filename": str ou None
+                "filename": str ou None,
+                "path": chemin du fichier généré ou None,
+                "cached": True si le fichier a été réutilisé,
+                "format": 'xlsx' ou 'zip',
+                "parts": nombre de feuilles ou de fichiers
             }
         """
         try:
-            # Étape 1: Récupération de toutes les données depuis la base
-            df = self.db.get_all_data()
+            if split not in EXPORT_SPLIT_MODES:
+                raise ValueError(f"Découpage inconnu: {split} (attendu : {', '.join(EXPORT_SPLIT_MODES)})")
             
-            # Étape 2: Vérification qu'il y a des données à exporter
-            if df.empty:
+            # Étape 1: Compilation de la requête (valide colonnes et tri)
+            _, _, selected_columns = self.db.build_filtered_query(filters, columns, sort_by, ascending)
+            
+            # Étape 2: Découpage selon le volume à exporter
+            rows_per_part = max(1, min(int(rows_per_part or EXCEL_MAX_DATA_ROWS), EXCEL_MAX_DATA_ROWS))
+            total = self.db.count_filtered(filters)
+            split = split if total > rows_per_part else None
+            if split == 'fichiers':
+                filename = f"{os.path.splitext(filename)[0]}.zip"
+            
+            def report_progress(exported):
+                if progress is not None:
+                    progress(exported, total)
+            
+            def build(path):
+                if split == 'fichiers':
+                    exported = 0
+                    def count_rows(done, _):
+                        nonlocal exported
+                        exported = done
+                        report_progress(done)
+                    with open(path, 'wb') as output:
+                        for chunk in self.iter_export_archive(filters, selected_columns, sort_by, ascending,
+                                                              rows_per_part, os.path.splitext(os.path.basename(filename))[0],
+                                                              count_rows):
+                            output.write(chunk)
+                    if exported == 0:
+                        return None
+                    return {'lignes': exported, 'parties': -(-exported // rows_per_part)}
+                
+                # Étape 3: Rien à conserver s'il n'y a aucune donnée (vérifié avant de créer le classeur)
+                batches = _nonempty_batches(self.db.iter_filtered_rows(filters, selected_columns, sort_by, ascending))
+                if batches is None:
+                    return None
+                
+                # Étape 4: Classeur en écriture seule (les lignes ne restent pas en mémoire)
+                workbook = Workbook(write_only=True)
+                sheet = _SplitSheet(workbook, "Employés", selected_columns, set(), rows_per_part)
+                
+                # Étape 5: Lecture par lots et écriture directe dans la feuille
+                exported = 0
+                for rows in batches:
+                    for row in rows:
+                        sheet.append(row)
+                    exported += len(rows)
+                    report_progress(exported)
+                workbook.save(path)
+                return {'lignes': exported, 'parties': sheet.sheets}
+            
+            params = {
+                'filtres': self._export_filters_key(filters),
+                'colonnes': selected_columns,
+                'tri': sort_by,
+                'croissant': bool(ascending),
+                'decoupage': split,
+                'lignes_par_partie': rows_per_part if split else None,
+                # Les fichiers de l'archive portent le nom demandé
+                'nom': os.path.splitext(os.path.basename(filename))[0] if split == 'fichiers' else None,
+            }
+            export_format = 'zip' if split == 'fichiers' else 'xlsx'
+            path, info, cached = self._cached_export(f"donnees.{export_format}", params, build, filename, use_cache)
+            
+            if path is None:
                 return {
                     "success": False,
                     "message": "Aucune donnée à exporter",
-                    "filename": None
+                    "filename": None,
+                    "path": None,
+                    "cached": False
                 }
             
-            # Étape 3: Export vers Excel avec pandas
-            df.to_excel(filename, index=False, engine='openpyxl')
-            
             # Succès
+            if split == 'fichiers':
+                detail = f" ({info['parties']} fichiers de {rows_per_part} lignes au plus)"
+            elif info['parties'] > 1:
+                detail = f" ({info['parties']} feuilles de {rows_per_part} lignes au plus)"
+            else:
+                detail = ""
             return {
                 "success": True,
-                "message": f"{len(df)} employés exportés vers {filename}",
-                "filename": filename
+                "message": f"{info['lignes']} employés exportés vers {filename}{detail}"
+                           f"{' (fichier réutilisé, données inchangées)' if cached else ''}",
+                "filename": filename,
+                "path": path,
+                "cached": cached,
+                "format": export_format,
+                "parts": info['parties']
             }
             
         except PermissionError:
             return {
                 "success": False,
                 "message": f"Permission refusée : le fichier {filename} est peut-être ouvert",
-                "filename": None
+                "filename": None,
+                "path": None,
+                "cached": False
             }
         except Exception as e:
             return {
                 "success": False,
                 "message": f"Erreur lors de l'export: {str(e)}",
-                "filename": None
+                "filename": None,
+                "path": None,
+                "cached": False
+            }
+    
+    def iter_export_archive(self, filters=None, columns=None, sort_by=None, ascending=True,
+                            rows_per_part=EXPORT_ROWS_PER_PART, stem="export_employees", progress=None):
+        """
+        Produit en flux une archive ZIP d'un export découpé en fichiers Excel.
+        Chaque fichier est écrit au fil de la lecture (rows_per_part lignes au plus),
+        ajouté à l'archive puis supprimé : la mémoire et le disque temporaire restent
+        bornés à une partie, et les premiers octets sont disponibles dès la
+        première partie terminée (réponse HTTP, fichier, etc.).
+        
+        Args:
+            filters (dict): Filtres optionnels (voir export_to_excel)
+            columns (list): Colonnes à exporter (toutes par défaut)
+            sort_by (str): Colonne de tri optionnelle
+            ascending (bool): Ordre croissant si True
+            rows_per_part (int): Lignes par fichier (au plus la limite d'une feuille Excel)
+            stem (str): Préfixe des fichiers de l'archive (<stem>-partie-001.xlsx...)
+            progress (callable): Appelée avec (lignes exportées, None) après chaque lot
+            
+        Yields:
+            bytes: Blocs successifs de l'archive
+        """
+        _, _, selected_columns = self.db.build_filtered_query(filters, columns, sort_by, ascending)
+        rows_per_part = max(1, min(int(rows_per_part), EXCEL_MAX_DATA_ROWS))
+        sink = _ZipChunkSink()
+        
+        with tempfile.TemporaryDirectory(prefix="export-") as work_dir:
+            # Les fichiers xlsx sont déjà compressés : compression minimale de l'archive
+            with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+                part = 0
+                sheet = None
+                exported = 0
+                for rows in self.db.iter_filtered_rows(filters, selected_columns, sort_by, ascending):
+                    for row in rows:
+                        if sheet is None:
+                            part += 1
+                            workbook = Workbook(write_only=True)
+                            sheet = workbook.create_sheet("Employés")
+                            sheet.append(selected_columns)
+                            part_rows = 0
+                        sheet.append(row)
+                        part_rows += 1
+                        if part_rows == rows_per_part:
+                            yield from self._add_archive_part(archive, sink, workbook, work_dir,
+                                                              f"{stem}-partie-{part:03d}.xlsx")
+                            sheet = None
+                    exported += len(rows)
+                    if progress is not None:
+                        progress(exported, None)
+                if sheet is not None:
+                    yield from self._add_archive_part(archive, sink, workbook, work_dir,
+                                                      f"{stem}-partie-{part:03d}.xlsx")
+            
+            # Répertoire central, écrit à la fermeture de l'archive
+            yield sink.drain()
+    
+    @staticmethod
+    def _add_archive_part(archive, sink, workbook, work_dir, name):
+        """Enregistre une partie, la copie par blocs dans l'archive et rend les octets produits."""
+        part_path = os.path.join(work_dir, name)
+        workbook.save(part_path)
+        try:
+            with open(part_path, 'rb') as source, archive.open(name, 'w') as target:
+                while True:
+                    chunk = source.read(ZIP_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+        finally:
+            os.remove(part_path)
+        data = sink.drain()
+        if data:
+            yield data
+    
+    def export_report(self, filename="rapport_employees.xlsx", filters=None, use_cache=True):
+        """
+        Exporte un rapport analytique multi-feuilles en une seule lecture de la base.
+        Équivalent tableur du tableau de bord : données brutes, une feuille par
+        département et les tableaux Effectif/Moyen/Max/Min des "Analyses Détaillées".
+        
+        Les lignes sont lues une seule fois, triées par département (index), puis
+        routées vers les feuilles en écriture seule (prolongées dans une nouvelle
+        feuille au-delà de la limite d'Excel) ; les synthèses sont calculées au fil
+        de la lecture. Le rapport passe par le cache des exports (voir export_to_excel).
+        
+        Args:
+            filename (str): Nom du fichier Excel (nom de téléchargement ; écrit tel quel sans cache)
+            filters (dict): Filtres optionnels (voir export_to_excel)
+            use_cache (bool): Réutiliser un rapport identique déjà généré
+            
+        Returns:
+            dict: {
+                "success": bool,
+                "message": str,
+                "filename": str ou None,
+                "path": chemin du fichier généré ou None,
+                "cached": True si le fichier a été réutilisé,
+                "format": 'xlsx'
+            }
+        """
+        try:
+            columns = EMPLOYEE_COLUMNS
+            dept_index = columns.index('departement')
+            poste_index = columns.index('poste')
+            salary_index = columns.index('salaire')
+            
+            def build(path):
+                # Lecture unique, ordonnée par département (rien à écrire s'il n'y a aucune ligne)
+                batches = _nonempty_batches(self.db.iter_filtered_rows(filters, columns, sort_by='departement'))
+                if batches is None:
+                    return None
+                
+                # Feuilles créées dans l'ordre d'affichage ; les synthèses sont remplies à la fin
+                workbook = Workbook(write_only=True)
+                used_titles = set()
+                dept_summary_sheet = workbook.create_sheet(_sheet_title("Stats Départements", used_titles))
+                poste_summary_sheet = workbook.create_sheet(_sheet_title("Stats Postes", used_titles))
+                data_sheet = _SplitSheet(workbook, "Données", columns, used_titles)
+                
+                dept_sheets = {}
+                dept_stats = {}
+                poste_stats = {}
+                exported = 0
+                
+                for rows in batches:
+                    for row in rows:
+                        data_sheet.append(row)
+                        
+                        # Routage vers la feuille du département (créée à la première ligne)
+                        departement = row[dept_index]
+                        if departement not in dept_sheets:
+                            title = departement if departement is not None else "Sans département"
+                            dept_sheets[departement] = _SplitSheet(workbook, str(title), columns, used_titles)
+                        dept_sheets[departement].append(row)
+                        
+                        # Accumulation des synthèses (mêmes règles que groupby : NULL exclus)
+                        _accumulate_salary(dept_stats, departement, row[salary_index])
+                        _accumulate_salary(poste_stats, row[poste_index], row[salary_index])
+                    exported += len(rows)
+                
+                # Écriture des tableaux de synthèse
+                for sheet, label, stats in [(dept_summary_sheet, 'Département', dept_stats),
+                                            (poste_summary_sheet, 'Poste', poste_stats)]:
+                    sheet.append([label, 'Effectif', 'Salaire Moyen', 'Salaire Max', 'Salaire Min'])
+                    for key in sorted(stats):
+                        count, total, maximum, minimum = stats[key]
+                        sheet.append([key, count, round(total / count), round(maximum), round(minimum)])
+                
+                workbook.save(path)
+                return {'lignes': exported, 'departements': len(dept_sheets)}
+            
+            params = {'filtres': self._export_filters_key(filters)}
+            path, info, cached = self._cached_export('rapport.xlsx', params, build, filename, use_cache)
+            
+            if path is None:
+                return {
+                    "success": False,
+                    "message": "Aucune donnée à exporter",
+                    "filename": None,
+                    "path": None,
+                    "cached": False
+                }
+            
+            return {
+                "success": True,
+                "message": f"Rapport de {info['lignes']} employés ({info['departements']} départements) "
+                           f"exporté vers {filename}{' (fichier réutilisé, données inchangées)' if cached else ''}",
+                "filename": filename,
+                "path": path,
+                "cached": cached,
+                "format": 'xlsx'
+            }
+            
+        except PermissionError:
+            return {
+                "success": False,
+                "message": f"Permission refusée : le fichier {filename} est peut-être ouvert",
+                "filename": None,
+                "path": None,
+                "cached": False
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Erreur lors de l'export du rapport: {str(e)}",
+                "filename": None,
+                "path": None,
+                "cached": False
             }
     
     def get_statistics(self):
@@ -202,36 +984,40 @@ class ExcelController:
         Calcule des statistiques sur les données pour le dashboard.
         Utilisé pour l'affichage structuré (Fonctionnalité 2).
         
+        Les indicateurs exacts sont calculés en SQL ; médiane, P10 et P90 sont
+        estimés par les sketches de quantiles (erreur relative <= 1 %), sans tri
+        de la colonne salaire.
+        
         Returns:
             dict: Dictionnaire contenant les statistiques principales
         """
-        # Récupération des données
-        df = self.db.get_all_data()
+        empty_stats = {
+            'total_employes': 0,
+            'salaire_moyen': 0,
+            'salaire_min': 0,
+            'salaire_max': 0,
+            'salaire_median': 0,
+            'salaire_p10': 0,
+            'salaire_p90': 0,
+            'nombre_departements': 0,
+            'nombre_postes': 0
+        }
         
-        # Si pas de données, retourner des statistiques vides
-        if df.empty:
-            return {
-                'total_employes': 0,
-                'salaire_moyen': 0,
-                'salaire_min': 0,
-                'salaire_max': 0,
-                'nombre_departements': 0,
-                'nombre_postes': 0
-            }
-        
-        # Calcul des statistiques avec gestion des erreurs
         try:
-            stats = {
-                'total_employes': len(df),
-                'salaire_moyen': df['salaire'].mean() if 'salaire' in df.columns else 0,
-                'salaire_min': df['salaire'].min() if 'salaire' in df.columns else 0,
-                'salaire_max': df['salaire'].max() if 'salaire' in df.columns else 0,
-                'nombre_departements': df['departement'].nunique() if 'departement' in df.columns else 0,
-                'nombre_postes': df['poste'].nunique() if 'poste' in df.columns else 0
-            }
+            stats = self.db.get_salary_summary()
+            
+            # Si pas de données, retourner des statistiques vides
+            if stats['total_employes'] == 0:
+                return empty_stats
+            
+            quantiles = self.db.get_salary_quantiles((0.1, 0.5, 0.9))
+            stats['salaire_p10'] = quantiles[0.1] or 0
+            stats['salaire_median'] = quantiles[0.5] or 0
+            stats['salaire_p90'] = quantiles[0.9] or 0
             
             # Arrondir les valeurs monétaires
-            for key in ['salaire_moyen', 'salaire_min', 'salaire_max']:
+            for key in ['salaire_moyen', 'salaire_min', 'salaire_max',
+                        'salaire_median', 'salaire_p10', 'salaire_p90']:
                 if stats[key]:
                     stats[key] = round(stats[key], 2)
                     
@@ -239,15 +1025,64 @@ class ExcelController:
             
         except Exception as e:
             # En cas d'erreur, retourner des stats par défaut
-            return {
-                'total_employes': len(df),
-                'salaire_moyen': 0,
-                'salaire_min': 0, 
-                'salaire_max': 0,
-                'nombre_departements': 0,
-                'nombre_postes': 0,
-                'erreur': str(e)
+            empty_stats['total_employes'] = self.db.get_employee_count()
+            empty_stats['erreur'] = str(e)
+            return empty_stats
+    
+    def get_dashboard_aggregates(self):
+        """
+        Calcule en une seule passe toutes les vues agrégées du tableau de bord.
+        
+        Returns:
+            dict: {
+                "total": DataFrame (1 ligne),
+                "par_departement": DataFrame indexé par département,
+                "par_poste": DataFrame indexé par poste,
+                "departement_poste": DataFrame indexé par (département, poste)
+            }
+            Colonnes : effectif, nb_salaires, salaire_somme, salaire_moyen, salaire_max, salaire_min
+        """
+        # Réutilisation tant que les données n'ont pas changé
+        revision = self.get_data_revision()
+        cached_revision, aggregates = self._dashboard_aggregates
+        if cached_revision != revision:
+            aggregates = self.aggregations.run(DASHBOARD_GROUPINGS)
+            self._dashboard_aggregates = (revision, aggregates)
+        return aggregates
+    
+    def get_data_revision(self):
+        """
+        Identifiant de révision des données : change à chaque modification
+        (séquence du journal des modifications de la base).
+        
+        Returns:
+            str: Révision "chemin-de-la-base#séquence"
+        """
+        return f"{os.path.abspath(self.db.db_path)}#{self.db.get_change_seq()}"
+    
+    def get_salary_quartiles(self, scope='departement'):
+        """
+        Quartiles de salaire estimés par département ou par poste.
+        
+        Args:
+            scope (str): 'departement' ou 'poste'
+            
+        Returns:
+            pandas.DataFrame: Effectif, Q1, Médiane et Q3 par groupe
+        """
+        quartiles = self.db.get_group_salary_quantiles(scope, (0.25, 0.5, 0.75))
+        rows = [
+            {
+                'Groupe': group,
+                'Effectif': values['effectif'],
+                'Q1': round(values[0.25]),
+                'Médiane': round(values[0.5]),
+                'Q3': round(values[0.75])
             }
+            for group, values in quartiles.items()
+        ]
+        df = pd.DataFrame(rows, columns=['Groupe', 'Effectif', 'Q1', 'Médiane', 'Q3'])
+        return df.set_index('Groupe')
     
     def validate_excel_format(self, df):
         """
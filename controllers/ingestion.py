@@ -0,0 +1,369 @@
+"""
+Ingestion automatique d'un dossier de dépôt (exports nocturnes du SIRH).
+Le dossier est scruté à intervalle régulier : un fichier correspondant au motif
+n'est importé qu'une fois stable (taille et date inchangées pendant un délai),
+les fichiers déjà importés sont reconnus à leur empreinte SHA-256, et les
+imports s'exécutent en parallèle dans un pool borné (lecture et normalisation
+concurrentes, écritures sérialisées par l'écrivain unique de la base).
+Chaque fichier est ensuite déplacé dans traites/ ou echecs/ avec son rapport JSON.
+
+Usage :
+    python -m controllers.ingestion /chemin/depot [--dataset employees] [--workers 4] [--once]
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from controllers.excel_controller import ExcelController
+from models.datasets import DatasetRegistry, DEFAULT_DATASET
+
+# Motif des fichiers déposés par le SIRH
+DEFAULT_PATTERN = 'employees-*.xlsx'
+
+# Délai (secondes) sans modification avant qu'un fichier soit considéré comme complet
+DEFAULT_SETTLE_SECONDS = 5
+
+# Intervalle (secondes) entre deux scrutations du dossier
+DEFAULT_POLL_INTERVAL = 2
+
+# Imports simultanés
+DEFAULT_WORKERS = 4
+
+# Sous-dossiers de destination des fichiers traités
+PROCESSED_DIRNAME = 'traites'
+FAILED_DIRNAME = 'echecs'
+
+# Suffixe du rapport écrit à côté de chaque fichier déplacé
+REPORT_SUFFIX = '.rapport.json'
+
+# Taille des blocs lus pour le calcul de l'empreinte
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_sha256(path):
+    """
+    Empreinte SHA-256 du contenu d'un fichier.
+    
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        while True:
+            chunk = source.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DropFolderIngester:
+    """
+    Importe les fichiers déposés dans un dossier via ExcelController.import_excel.
+    run_once() traite les fichiers présents puis rend la main ; start() lance la
+    scrutation en tâche de fond.
+    """
+    
+    def __init__(self, controller, watch_dir, pattern=DEFAULT_PATTERN, workers=DEFAULT_WORKERS,
+                 settle_seconds=DEFAULT_SETTLE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL,
+                 processed_dir=None, failed_dir=None, on_report=None):
+        """
+        Args:
+            controller (ExcelController): Contrôleur du jeu de données cible
+            watch_dir (str): Dossier de dépôt scruté
+            pattern (str): Motif des fichiers à importer (fnmatch)
+            workers (int): Imports simultanés
+            settle_seconds (float): Délai sans modification avant import
+            poll_interval (float): Intervalle entre deux scrutations
+            processed_dir (str): Destination des fichiers importés ou doublons (par défaut : <dépôt>/traites)
+            failed_dir (str): Destination des fichiers en échec (par défaut : <dépôt>/echecs)
+            on_report (callable): Appelée avec le rapport de chaque fichier traité
+        """
+        self.controller = controller
+        self.watch_dir = watch_dir
+        self.pattern = pattern
+        self.workers = max(1, int(workers))
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.processed_dir = processed_dir or os.path.join(watch_dir, PROCESSED_DIRNAME)
+        self.failed_dir = failed_dir or os.path.join(watch_dir, FAILED_DIRNAME)
+        self.on_report = on_report
+        self.reports = deque(maxlen=100)
+        self.last_error = None
+        
+        # Signature (taille, date) de chaque fichier vu et instant depuis lequel elle est stable
+        self._seen = {}
+        # Fichiers impossibles à traiter (illisibles, non déplaçables) : ignorés tant qu'ils ne changent pas
+        self._skipped = {}
+        self._in_flight = set()
+        self._hashes_in_flight = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingestion")
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def scan(self):
+        """
+        Scrute le dossier et retourne les fichiers prêts à importer.
+        Un fichier nouveau ou modifié recommence son délai de stabilité.
+        
+        Returns:
+            list: Chemins des fichiers stables, non encore en cours de traitement
+        """
+        now = time.time()
+        present = set()
+        ready = []
+        with os.scandir(self.watch_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or not fnmatch.fnmatch(entry.name, self.pattern):
+                    continue
+                path = entry.path
+                present.add(path)
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if self._skipped.get(path) == signature:
+                    continue
+                previous = self._seen.get(path)
+                if previous is None or previous[0] != signature:
+                    self._seen[path] = (signature, now)
+                    continue
+                stable_since = previous[1]
+                if now - stable_since >= self.settle_seconds and now - stat.st_mtime >= self.settle_seconds:
+                    with self._lock:
+                        if path not in self._in_flight:
+                            ready.append(path)
+        # Fichiers retirés du dossier (déplacés, supprimés)
+        for known in (self._seen, self._skipped):
+            for path in list(known):
+                if path not in present:
+                    del known[path]
+        return sorted(ready)
+    
+    def poll(self):
+        """
+        Scrute le dossier et soumet les fichiers prêts au pool (au plus deux fois
+        le nombre d'imports simultanés en attente).
+        
+        Returns:
+            list: Futures des fichiers soumis
+        """
+        futures = []
+        for path in self.scan():
+            with self._lock:
+                if len(self._in_flight) >= 2 * self.workers:
+                    break
+                self._in_flight.add(path)
+            futures.append(self._executor.submit(self._process, path, self._seen[path][0]))
+        return futures
+    
+    def pending(self):
+        """Retourne le nombre de fichiers correspondant au motif encore à traiter dans le dossier."""
+        count = 0
+        with os.scandir(self.watch_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                    stat = entry.stat()
+                    if self._skipped.get(entry.path) != (stat.st_size, stat.st_mtime_ns):
+                        count += 1
+        return count
+    
+    def run_once(self, timeout=None):
+        """
+        Traite les fichiers présents dans le dossier (en attendant qu'ils soient
+        stables), puis rend la main : adapté à une tâche planifiée (cron).
+        
+        Args:
+            timeout (float): Durée maximale (secondes), None pour attendre tous les fichiers
+        
+        Returns:
+            list: Rapports des fichiers traités
+        """
+        started = time.monotonic()
+        reports = []
+        futures = []
+        while True:
+            futures.extend(self.poll())
+            done = [future for future in futures if future.done()]
+            for future in done:
+                futures.remove(future)
+                report = future.result()
+                if report is not None:
+                    reports.append(report)
+            if not futures and not self.pending():
+                return reports
+            if timeout is not None and time.monotonic() - started >= timeout:
+                for future in futures:
+                    report = future.result()
+                    if report is not None:
+                        reports.append(report)
+                return reports
+            time.sleep(min(self.poll_interval, 0.2) if futures else self.poll_interval)
+    
+    def start(self):
+        """Lance la scrutation en tâche de fond (sans effet si déjà lancée)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name=f"ingestion:{self.watch_dir}")
+        self._thread.start()
+    
+    def stop(self):
+        """Arrête la scrutation et attend les imports en cours."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=True)
+    
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                # Dossier indisponible (partage réseau...) : nouvel essai à la prochaine scrutation
+                self.last_error = str(e)
+            self._stop.wait(self.poll_interval)
+    
+    def _process(self, path, signature):
+        """Importe un fichier (exécuté par le pool) et le déplace avec son rapport."""
+        try:
+            return self._ingest(path, signature)
+        except Exception as e:
+            # Fichier illisible ou déplacement impossible : laissé en place, ignoré jusqu'à sa prochaine modification
+            self.last_error = f"{os.path.basename(path)}: {e}"
+            self._skipped[path] = signature
+            return None
+        finally:
+            with self._lock:
+                self._in_flight.discard(path)
+    
+    def _ingest(self, path, signature):
+        started = time.perf_counter()
+        digest = file_sha256(path)
+        
+        # Fichier modifié depuis la scrutation : il recommencera son délai de stabilité
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != signature:
+            return None
+        
+        with self._lock:
+            # Même contenu en cours d'import (copie déposée deux fois) : nouvel essai à la prochaine scrutation
+            if digest in self._hashes_in_flight:
+                return None
+            duplicate = self._already_ingested(digest)
+            if not duplicate:
+                self._hashes_in_flight.add(digest)
+        try:
+            if duplicate:
+                status, result = 'doublon', {"message": "Contenu déjà importé", "imported": 0, "errors": 0}
+            else:
+                # Lignes et inscription au registre validées dans la même transaction :
+                # un arrêt entre les deux ne peut pas laisser un import sans empreinte
+                def record(conn, imported):
+                    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+                    self._record(conn, digest, os.path.basename(path), imported, duration_ms)
+                result = self.controller.import_excel(path, on_insert=record)
+                status = 'importé' if result["success"] else 'échec'
+        finally:
+            with self._lock:
+                self._hashes_in_flight.discard(digest)
+        
+        report = {
+            'fichier': os.path.basename(path),
+            'sha256': digest,
+            'statut': status,
+            'importes': result["imported"],
+            'erreurs': result["errors"],
+            'message': result["message"],
+            'lecteur': result.get("engine"),
+            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'duree_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+        report['destination'] = self._move(path, self.failed_dir if status == 'échec' else self.processed_dir, report)
+        self.reports.append(report)
+        if self.on_report is not None:
+            self.on_report(report)
+        return report
+    
+    def _already_ingested(self, digest):
+        return self.controller.db.storage.fetchone(
+            "SELECT 1 FROM ingested_files WHERE sha256 = ?", [digest]
+        ) is not None
+    
+    @staticmethod
+    def _record(conn, digest, filename, imported, duration_ms):
+        """Inscrit le fichier au registre des ingestions (dans la transaction de l'import)."""
+        conn.execute(
+            "INSERT OR REPLACE INTO ingested_files (sha256, filename, ingested_at, imported, duration_ms) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (digest, filename, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), imported, duration_ms)
+        )
+    
+    @staticmethod
+    def _move(path, directory, report):
+        """Déplace le fichier (nom horodaté, sans écraser) et écrit son rapport à côté."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        destination = os.path.join(directory, f"{stamp}-{os.path.basename(path)}")
+        shutil.move(path, destination)
+        with open(destination + REPORT_SUFFIX, 'w', encoding='utf-8') as output:
+            json.dump(dict(report, destination=destination), output, ensure_ascii=False, indent=2)
+        return destination
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion automatique d'un dossier de dépôt Excel")
+    parser.add_argument('directory', help="Dossier de dépôt scruté")
+    parser.add_argument('--dataset', default=DEFAULT_DATASET, help="Jeu de données cible")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help="Motif des fichiers à importer")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Imports simultanés")
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="Secondes sans modification avant import")
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="Secondes entre deux scrutations")
+    parser.add_argument('--once', action='store_true',
+                        help="Traite les fichiers présents puis s'arrête (tâche planifiée)")
+    parser.add_argument('--timeout', type=float, default=None, help="Durée maximale avec --once (secondes)")
+    args = parser.parse_args(argv)
+    
+    def print_report(report):
+        # Une seule écriture par ligne : les rapports arrivent de plusieurs threads
+        sys.stdout.write(f"[{report['statut']}] {report['fichier']} : {report['message']} "
+                         f"({report['duree_ms']:.0f} ms)\n")
+        sys.stdout.flush()
+    
+    registry = DatasetRegistry()
+    db = registry.open(args.dataset)
+    ingester = DropFolderIngester(ExcelController(db), args.directory, pattern=args.pattern,
+                                  workers=args.workers, settle_seconds=args.settle,
+                                  poll_interval=args.interval, on_report=print_report)
+    try:
+        if args.once:
+            reports = ingester.run_once(timeout=args.timeout)
+            failed = sum(1 for report in reports if report['statut'] == 'échec')
+            imported = sum(report['importes'] for report in reports)
+            print(f"{len(reports)} fichier(s) traité(s), {imported} employés importés, {failed} échec(s)")
+            return 1 if failed else 0
+        ingester.start()
+        print(f"Scrutation de {args.directory} ({args.pattern}), Ctrl+C pour arrêter", flush=True)
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        ingester.stop()
+        registry.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
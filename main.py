@@ -3,18 +3,32 @@ Excel Data Manager Pro - Application principale
 Architecture MVC propre avec séparation des responsabilités
 Hackathon Codon 2025
 """
+import math
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from controllers.excel_controller import ExcelController
+from controllers.excel_controller import ExcelController, EXCEL_MAX_DATA_ROWS, EXPORT_ROWS_PER_PART
+from models.datasets import DatasetRegistry, DEFAULT_DATASET, DATA_DIR_ENV
+from components.figure_cache import FigureCache
+from components.profiling import ProfileStore, begin_rerun, end_rerun, mark, set_profiled_page
+from models.database import EMPLOYEE_COLUMNS, ConcurrentModificationError
 from components.ui_components import (
     load_styles, render_main_header, render_navigation_sidebar,
-    render_admin_controls, render_metric_card, render_chart_container,
+    render_dataset_selector, render_admin_controls, render_employee_picker,
+    render_maintenance_panel, render_backup_panel, render_profiling_panel, render_metric_card,
+    render_chart_container,
     show_empty_state, show_loading, show_success, show_error, show_info,
     create_download_button
 )
 
+# Nombre d'employés par page de la liste (page Gestion)
+EMPLOYEE_PAGE_SIZE = 50
+
+# Points du nuage de salaires (échantillon régulier au-delà)
+SCATTER_SAMPLE_ROWS = 2000
+
 # Configuration de la page Streamlit
 st.set_page_config(
     page_title="Excel Data Manager Pro", 
@@ -23,22 +37,110 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Profils des reruns enregistrés à côté des bases
+@st.cache_resource
+def init_profile_store():
+    return ProfileStore(os.path.join(os.environ.get(DATA_DIR_ENV) or '.', 'profiles'))
+
+# Profilage à la demande (contrôles d'administration) : sans effet s'il n'est pas activé
+profile_store = init_profile_store()
+rerun_profile = begin_rerun(profile_store)
+mark("Mise en page")
+
 # Chargement des styles CSS
 load_styles()
 
 # En-tête principal
 render_main_header()
 
-# Initialisation du contrôleur
+# Registre des jeux de données (un fichier SQLite par jeu)
 @st.cache_resource
-def init_controller():
-    return ExcelController()
+def init_datasets():
+    return DatasetRegistry()
 
-controller = init_controller()
+# Initialisation du contrôleur d'un jeu de données
+@st.cache_resource
+def init_controller(dataset):
+    controller = ExcelController(init_datasets().open(dataset))
+    # Maintenance planifiée en tâche de fond (après les imports et suppressions massives)
+    controller.db.maintenance.start()
+    # Instantanés périodiques (seulement si les données ont changé)
+    controller.db.backups.start()
+    return controller
+
+datasets = init_datasets()
+
+# Cache des figures Plotly partagé entre les sessions
+@st.cache_resource
+def init_figure_cache():
+    return FigureCache()
 
 # Navigation et contrôles
+mark("Barre latérale")
 page = render_navigation_sidebar()
-refresh_clicked, clear_clicked = render_admin_controls()
+set_profiled_page(page)
+dataset_names = datasets.list_datasets()
+dataset, new_dataset, drop_clicked = render_dataset_selector(dataset_names, DEFAULT_DATASET)
+refresh_clicked, clear_clicked, show_profiles = render_admin_controls()
+
+# Création et suppression de jeux de données
+if new_dataset:
+    try:
+        if datasets.exists(new_dataset):
+            show_error(f"Le jeu « {new_dataset} » existe déjà")
+        else:
+            datasets.open(new_dataset)
+            st.session_state.current_dataset = new_dataset
+            st.rerun()
+    except ValueError as e:
+        show_error(str(e))
+
+if drop_clicked:
+    try:
+        # Instantané de sécurité (backups/_supprimes), puis effacement des fichiers du jeu
+        with show_loading("Sauvegarde puis suppression du jeu..."):
+            datasets.drop(dataset)
+        init_controller.clear()
+        st.session_state.current_dataset = DEFAULT_DATASET
+        st.session_state.pop('drop_pending', None)
+        st.session_state.pop('drop_confirmation', None)
+    except Exception as e:
+        show_error(f"Erreur lors de la suppression : {str(e)}")
+    else:
+        st.rerun()
+
+# Changement de jeu : la fiche en cours d'édition appartient à l'ancien jeu
+if st.session_state.get('edit_dataset') != dataset:
+    st.session_state.pop('edit_snapshot', None)
+    st.session_state.pop('edit_conflict', None)
+    st.session_state['edit_dataset'] = dataset
+
+controller = init_controller(dataset)
+
+# Maintenance de la base du jeu actif
+maintenance = controller.db.maintenance
+if render_maintenance_panel(maintenance.reports(limit=1), maintenance.churn(), maintenance.churn_threshold):
+    with show_loading("Maintenance en cours..."):
+        report = maintenance.run()
+    show_success(f"Maintenance terminée en {report['duree_ms']:.0f} ms")
+
+# Sauvegardes à chaud et restauration
+backup_clicked, restore_name = render_backup_panel(controller.db.backups.list_backups())
+if backup_clicked:
+    try:
+        with show_loading("Sauvegarde en cours..."):
+            snapshot = controller.db.backups.backup().result()
+        show_success(f"Sauvegarde créée : {snapshot['nom']}")
+    except Exception as e:
+        show_error(f"Erreur lors de la sauvegarde : {str(e)}")
+if restore_name:
+    try:
+        with show_loading("Restauration en cours..."):
+            restored = controller.db.backups.restore(restore_name)
+        st.session_state.pop('edit_snapshot', None)
+        show_success(f"{restored} employés restaurés depuis {restore_name}")
+    except Exception as e:
+        show_error(f"Erreur lors de la restauration : {str(e)}")
 
 # Gestion des boutons d'administration
 if refresh_clicked:
@@ -46,19 +148,30 @@ if refresh_clicked:
 
 if clear_clicked:
     st.cache_data.clear()
-    st.cache_resource.clear()
+    init_figure_cache().clear()
+    controller.export_cache.clear()
     try:
+        # Filet de sécurité : instantané de l'état courant avant le vidage
+        controller.db.backups.backup('avant-vidage').result()
         controller.db.clear_all_data()
-        show_success("Cache vidé et données supprimées !")
+        show_success("Cache vidé et données supprimées (sauvegarde « avant-vidage » disponible) !")
     except Exception as e:
         show_error(f"Erreur lors de la suppression : {str(e)}")
 
+mark(f"Page : {page}")
+
 # PAGE 1: TABLEAU DE BORD
 if page == "Tableau de Bord":
     st.header("Tableau de Bord Exécutif")
     
     stats = controller.get_statistics()
-    df = controller.db.get_all_data()
+    
+    # Figures partagées entre sessions, indexées par la révision des données
+    revision = controller.get_data_revision()
+    figure_cache = init_figure_cache()
+    
+    def cached_figure(chart_type, builder, **params):
+        return figure_cache.get_or_build(chart_type, revision, params, builder)
     
     if stats['total_employes'] > 0:
         # Métriques principales
@@ -75,17 +188,36 @@ if page == "Tableau de Bord":
             total_cat = stats['nombre_departements'] + stats['nombre_postes']
             render_metric_card("Catégories", total_cat, "Dép. + Postes", "#6f42c1")
         
+        # Distribution des salaires (quantiles estimés par les sketches)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            render_metric_card("Salaire Médian", f"{stats['salaire_median']:,.0f} FCFA", "50 % gagnent moins", "#17a2b8")
+        with col2:
+            render_metric_card("P10", f"{stats['salaire_p10']:,.0f} FCFA", "10 % gagnent moins", "#20c997")
+        with col3:
+            render_metric_card("P90", f"{stats['salaire_p90']:,.0f} FCFA", "10 % gagnent plus", "#e83e8c")
+        with col4:
+            render_metric_card("Salaire Minimum", f"{stats['salaire_min']:,.0f} FCFA", "Plus basse rémunération", "#6c757d")
+        
         # Graphiques
         st.markdown('<div class="section-spacing"></div>', unsafe_allow_html=True)
         st.markdown("### Analyses Visuelles")
-        has_dept = ('departement' in df.columns and 
-                   df['departement'].notna().sum() > 0 and 
-                   (df['departement'] != 'None').sum() > 0 and
-                   (df['departement'] != '').sum() > 0)
-        has_poste = ('poste' in df.columns and 
-                    df['poste'].notna().sum() > 0 and 
-                    (df['poste'] != 'None').sum() > 0 and
-                    (df['poste'] != '').sum() > 0)
+        
+        # Toutes les vues agrégées de la page, calculées en une seule passe
+        aggregates = controller.get_dashboard_aggregates()
+        dept_view = aggregates['par_departement']
+        poste_view = aggregates['par_poste']
+        has_dept = any(key not in ('None', '') for key in dept_view.index)
+        has_poste = any(key not in ('None', '') for key in poste_view.index)
+        dept_count = dept_view['effectif'].sort_values(ascending=False)
+        poste_count = poste_view['effectif'].sort_values(ascending=False)
+        avg_salary = aggregates['total']['salaire_moyen'].iloc[0]
+        
+        # Tableaux "Analyses Détaillées" (partagés entre les colonnes)
+        detailed_columns = {'nb_salaires': 'Effectif', 'salaire_moyen': 'Salaire Moyen',
+                            'salaire_max': 'Salaire Max', 'salaire_min': 'Salaire Min'}
+        dept_detailed = dept_view[list(detailed_columns)].round(0).rename(columns=detailed_columns)
+        poste_detailed = poste_view[list(detailed_columns)].round(0).rename(columns=detailed_columns)
         
         # Première ligne - Distribution principale
         col1, col2 = st.columns(2)
@@ -95,84 +227,88 @@ if page == "Tableau de Bord":
                 if has_dept:
                     # Distribution par département (prioritaire)
                     st.markdown("**Distribution par Département**")
-                    dept_count = df['departement'].value_counts()
-                    total_emp = len(df)
-                    
-                    # Créer un graphique donut avec go.Figure
-                    fig = go.Figure(data=[go.Pie(
-                        labels=dept_count.index, 
-                        values=dept_count.values,
-                        hole=0.4,
-                        marker=dict(
-                            colors=px.colors.qualitative.Set3,
-                            line=dict(color='#FFFFFF', width=2)
-                        ),
-                        textinfo='label+percent+value',
-                        textposition='outside',
-                        hovertemplate='<b>%{label}</b><br>' +
-                                    'Employés: %{value}<br>' +
-                                    'Pourcentage: %{percent}<br>' +
-                                    '<extra></extra>'
-                    )])
-                    
-                    # Ajouter une annotation centrale
-                    fig.add_annotation(
-                        text=f"<b>Total<br>{total_emp}</b><br>employés",
-                        x=0.5, y=0.5,
-                        font_size=14,
-                        showarrow=False,
-                        font_color="darkblue"
-                    )
-                    
-                    fig.update_layout(
-                        title="Répartition par Département",
-                        height=350,
-                        showlegend=True,
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        font=dict(size=11)
-                    )
+                    def build_figure():
+                        total_emp = stats['total_employes']
+                        
+                        # Créer un graphique donut avec go.Figure
+                        fig = go.Figure(data=[go.Pie(
+                            labels=dept_count.index, 
+                            values=dept_count.values,
+                            hole=0.4,
+                            marker=dict(
+                                colors=px.colors.qualitative.Set3,
+                                line=dict(color='#FFFFFF', width=2)
+                            ),
+                            textinfo='label+percent+value',
+                            textposition='outside',
+                            hovertemplate='<b>%{label}</b><br>' +
+                                        'Employés: %{value}<br>' +
+                                        'Pourcentage: %{percent}<br>' +
+                                        '<extra></extra>'
+                        )])
+                        
+                        # Ajouter une annotation centrale
+                        fig.add_annotation(
+                            text=f"<b>Total<br>{total_emp}</b><br>employés",
+                            x=0.5, y=0.5,
+                            font_size=14,
+                            showarrow=False,
+                            font_color="darkblue"
+                        )
+                        
+                        fig.update_layout(
+                            title="Répartition par Département",
+                            height=350,
+                            showlegend=True,
+                            plot_bgcolor='rgba(0,0,0,0)',
+                            paper_bgcolor='rgba(0,0,0,0)',
+                            font=dict(size=11)
+                        )
+                        return fig
+                    fig = cached_figure('main_distribution_chart', build_figure, variante=0)
                     st.plotly_chart(fig, use_container_width=True)
                 elif has_poste:
                     # Seulement poste si pas de département
                     st.markdown("**Distribution par Poste**")
-                    poste_count = df['poste'].value_counts()
-                    total_emp = len(df)
-                    
-                    # Créer un graphique donut avec go.Figure
-                    fig = go.Figure(data=[go.Pie(
-                        labels=poste_count.index, 
-                        values=poste_count.values,
-                        hole=0.4,
-                        marker=dict(
-                            colors=px.colors.qualitative.Pastel,
-                            line=dict(color='#FFFFFF', width=2)
-                        ),
-                        textinfo='label+percent+value',
-                        textposition='outside',
-                        hovertemplate='<b>%{label}</b><br>' +
-                                    'Employés: %{value}<br>' +
-                                    'Pourcentage: %{percent}<br>' +
-                                    '<extra></extra>'
-                    )])
-                    
-                    # Ajouter une annotation centrale
-                    fig.add_annotation(
-                        text=f"<b>Total<br>{total_emp}</b><br>employés",
-                        x=0.5, y=0.5,
-                        font_size=14,
-                        showarrow=False,
-                        font_color="darkblue"
-                    )
-                    
-                    fig.update_layout(
-                        title="Répartition par Poste",
-                        height=350,
-                        showlegend=True,
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        font=dict(size=11)
-                    )
+                    def build_figure():
+                        total_emp = stats['total_employes']
+                        
+                        # Créer un graphique donut avec go.Figure
+                        fig = go.Figure(data=[go.Pie(
+                            labels=poste_count.index, 
+                            values=poste_count.values,
+                            hole=0.4,
+                            marker=dict(
+                                colors=px.colors.qualitative.Pastel,
+                                line=dict(color='#FFFFFF', width=2)
+                            ),
+                            textinfo='label+percent+value',
+                            textposition='outside',
+                            hovertemplate='<b>%{label}</b><br>' +
+                                        'Employés: %{value}<br>' +
+                                        'Pourcentage: %{percent}<br>' +
+                                        '<extra></extra>'
+                        )])
+                        
+                        # Ajouter une annotation centrale
+                        fig.add_annotation(
+                            text=f"<b>Total<br>{total_emp}</b><br>employés",
+                            x=0.5, y=0.5,
+                            font_size=14,
+                            showarrow=False,
+                            font_color="darkblue"
+                        )
+                        
+                        fig.update_layout(
+                            title="Répartition par Poste",
+                            height=350,
+                            showlegend=True,
+                            plot_bgcolor='rgba(0,0,0,0)',
+                            paper_bgcolor='rgba(0,0,0,0)',
+                            font=dict(size=11)
+                        )
+                        return fig
+                    fig = cached_figure('main_distribution_chart', build_figure, variante=1)
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     show_info("Aucune donnée de département ou poste disponible")
@@ -183,74 +319,78 @@ if page == "Tableau de Bord":
                 if has_poste:
                     # Graphique par poste (prioritaire pour la complémentarité)
                     st.markdown("**Salaires Moyens par Poste**")
-                    poste_stats = df.groupby('poste')['salaire'].mean().sort_values(ascending=False)
-                    
-                    # Graphique en barres amélioré avec couleurs multiples
-                    colors = ['#FF7F0E', '#2CA02C', '#D62728', '#9467BD', '#8C564B', '#E377C2', '#7F7F7F', '#BCBD22']
-                    bar_colors = [colors[i % len(colors)] for i in range(len(poste_stats))]
-                    
-                    fig = go.Figure(go.Bar(
-                        x=poste_stats.values, 
-                        y=poste_stats.index, 
-                        orientation='h',
-                        marker=dict(color=bar_colors, line=dict(color='white', width=1)),
-                        text=[f'{val:,.0f} FCFA' for val in poste_stats.values],
-                        textposition='auto',
-                        hovertemplate='<b>%{y}</b><br>' +
-                                    'Salaire moyen: %{x:,.0f} FCFA<br>' +
-                                    '<extra></extra>'
-                    ))
-                    
-                    # Ajouter ligne de référence pour la moyenne générale
-                    avg_salary = df['salaire'].mean()
-                    fig.add_vline(x=avg_salary, line_dash="dash", line_color="red", 
-                                 annotation_text=f"Moyenne: {avg_salary:,.0f}")
-                    
-                    fig.update_layout(
-                        title="Salaires par Poste", 
-                        height=350,
-                        xaxis_title="Salaire (FCFA)", 
-                        yaxis_title="Poste",
-                        plot_bgcolor='rgba(248,248,255,0.8)',
-                        font=dict(size=11)
-                    )
-                    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                    def build_figure():
+                        poste_stats = poste_view['salaire_moyen'].dropna().sort_values(ascending=False)
+                        
+                        # Graphique en barres amélioré avec couleurs multiples
+                        colors = ['#FF7F0E', '#2CA02C', '#D62728', '#9467BD', '#8C564B', '#E377C2', '#7F7F7F', '#BCBD22']
+                        bar_colors = [colors[i % len(colors)] for i in range(len(poste_stats))]
+                        
+                        fig = go.Figure(go.Bar(
+                            x=poste_stats.values, 
+                            y=poste_stats.index, 
+                            orientation='h',
+                            marker=dict(color=bar_colors, line=dict(color='white', width=1)),
+                            text=[f'{val:,.0f} FCFA' for val in poste_stats.values],
+                            textposition='auto',
+                            hovertemplate='<b>%{y}</b><br>' +
+                                        'Salaire moyen: %{x:,.0f} FCFA<br>' +
+                                        '<extra></extra>'
+                        ))
+                        
+                        # Ajouter ligne de référence pour la moyenne générale
+                        fig.add_vline(x=avg_salary, line_dash="dash", line_color="red", 
+                                     annotation_text=f"Moyenne: {avg_salary:,.0f}")
+                        
+                        fig.update_layout(
+                            title="Salaires par Poste", 
+                            height=350,
+                            xaxis_title="Salaire (FCFA)", 
+                            yaxis_title="Poste",
+                            plot_bgcolor='rgba(248,248,255,0.8)',
+                            font=dict(size=11)
+                        )
+                        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        return fig
+                    fig = cached_figure('salary_comparison_chart', build_figure, variante=0)
                     st.plotly_chart(fig, use_container_width=True)
                 elif has_dept:
                     # Seulement département si pas de poste
                     st.markdown("**Salaires Moyens par Département**")
-                    dept_stats = df.groupby('departement')['salaire'].mean().sort_values(ascending=False)
-                    
-                    # Graphique en barres amélioré avec couleurs multiples
-                    colors = ['#1F77B4', '#FF7F0E', '#2CA02C', '#D62728', '#9467BD', '#8C564B', '#E377C2', '#7F7F7F']
-                    bar_colors = [colors[i % len(colors)] for i in range(len(dept_stats))]
-                    
-                    fig = go.Figure(go.Bar(
-                        x=dept_stats.values, 
-                        y=dept_stats.index, 
-                        orientation='h',
-                        marker=dict(color=bar_colors, line=dict(color='white', width=1)),
-                        text=[f'{val:,.0f} FCFA' for val in dept_stats.values],
-                        textposition='auto',
-                        hovertemplate='<b>%{y}</b><br>' +
-                                    'Salaire moyen: %{x:,.0f} FCFA<br>' +
-                                    '<extra></extra>'
-                    ))
-                    
-                    # Ajouter ligne de référence pour la moyenne générale
-                    avg_salary = df['salaire'].mean()
-                    fig.add_vline(x=avg_salary, line_dash="dash", line_color="red", 
-                                 annotation_text=f"Moyenne: {avg_salary:,.0f}")
-                    
-                    fig.update_layout(
-                        title="Salaires par Département", 
-                        height=350,
-                        xaxis_title="Salaire (FCFA)", 
-                        yaxis_title="Département",
-                        plot_bgcolor='rgba(248,248,255,0.8)',
-                        font=dict(size=11)
-                    )
-                    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                    def build_figure():
+                        dept_stats = dept_view['salaire_moyen'].dropna().sort_values(ascending=False)
+                        
+                        # Graphique en barres amélioré avec couleurs multiples
+                        colors = ['#1F77B4', '#FF7F0E', '#2CA02C', '#D62728', '#9467BD', '#8C564B', '#E377C2', '#7F7F7F']
+                        bar_colors = [colors[i % len(colors)] for i in range(len(dept_stats))]
+                        
+                        fig = go.Figure(go.Bar(
+                            x=dept_stats.values, 
+                            y=dept_stats.index, 
+                            orientation='h',
+                            marker=dict(color=bar_colors, line=dict(color='white', width=1)),
+                            text=[f'{val:,.0f} FCFA' for val in dept_stats.values],
+                            textposition='auto',
+                            hovertemplate='<b>%{y}</b><br>' +
+                                        'Salaire moyen: %{x:,.0f} FCFA<br>' +
+                                        '<extra></extra>'
+                        ))
+                        
+                        # Ajouter ligne de référence pour la moyenne générale
+                        fig.add_vline(x=avg_salary, line_dash="dash", line_color="red", 
+                                     annotation_text=f"Moyenne: {avg_salary:,.0f}")
+                        
+                        fig.update_layout(
+                            title="Salaires par Département", 
+                            height=350,
+                            xaxis_title="Salaire (FCFA)", 
+                            yaxis_title="Département",
+                            plot_bgcolor='rgba(248,248,255,0.8)',
+                            font=dict(size=11)
+                        )
+                        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        return fig
+                    fig = cached_figure('salary_comparison_chart', build_figure, variante=1)
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     show_info("Aucune donnée de département ou poste disponible")
@@ -264,77 +404,84 @@ if page == "Tableau de Bord":
                 if has_dept and has_poste:
                     # Cas complet : graphique croisé département vs poste
                     st.markdown("**Effectifs Croisés Département-Poste**")
-                    cross_tab = pd.crosstab(df['departement'], df['poste'])
-                    fig = px.imshow(cross_tab.values,
-                                  x=cross_tab.columns,
-                                  y=cross_tab.index,
-                                  title="Répartition Croisée",
-                                  aspect="auto",
-                                  color_continuous_scale="Blues")
-                    fig.update_layout(height=350)
-                    fig.update_xaxes(tickangle=-45)
+                    def build_figure():
+                        cross_tab = aggregates['departement_poste']['effectif'].unstack(fill_value=0)
+                        fig = px.imshow(cross_tab.values,
+                                      x=cross_tab.columns,
+                                      y=cross_tab.index,
+                                      title="Répartition Croisée",
+                                      aspect="auto",
+                                      color_continuous_scale="Blues")
+                        fig.update_layout(height=350)
+                        fig.update_xaxes(tickangle=-45)
+                        return fig
+                    fig = cached_figure('secondary_analysis_chart', build_figure, variante=0)
                     st.plotly_chart(fig, use_container_width=True)
                 elif has_dept:
                     # Seulement département : effectifs par département
                     st.markdown("**Effectifs par Département**")
-                    dept_count = df['departement'].value_counts()
-                    
-                    # Graphique en barres amélioré avec couleurs multiples
-                    colors = ['#1F77B4', '#FF7F0E', '#2CA02C', '#D62728', '#9467BD', '#8C564B']
-                    bar_colors = [colors[i % len(colors)] for i in range(len(dept_count))]
-                    
-                    fig = go.Figure(go.Bar(
-                        x=dept_count.index, 
-                        y=dept_count.values,
-                        marker=dict(color=bar_colors, line=dict(color='white', width=1)),
-                        text=dept_count.values,
-                        textposition='auto',
-                        hovertemplate='<b>%{x}</b><br>' +
-                                    'Nombre d\'employés: %{y}<br>' +
-                                    '<extra></extra>'
-                    ))
+                    def build_figure():
                     
-                    fig.update_layout(
-                        title="Nombre d'Employés par Département",
-                        height=350,
-                        xaxis_title="Département", 
-                        yaxis_title="Nombre d'Employés",
-                        plot_bgcolor='rgba(248,248,255,0.8)',
-                        font=dict(size=11)
-                    )
-                    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
-                    fig.update_xaxes(tickangle=-45)
+                        # Graphique en barres amélioré avec couleurs multiples
+                        colors = ['#1F77B4', '#FF7F0E', '#2CA02C', '#D62728', '#9467BD', '#8C564B']
+                        bar_colors = [colors[i % len(colors)] for i in range(len(dept_count))]
+                        
+                        fig = go.Figure(go.Bar(
+                            x=dept_count.index, 
+                            y=dept_count.values,
+                            marker=dict(color=bar_colors, line=dict(color='white', width=1)),
+                            text=dept_count.values,
+                            textposition='auto',
+                            hovertemplate='<b>%{x}</b><br>' +
+                                        'Nombre d\'employés: %{y}<br>' +
+                                        '<extra></extra>'
+                        ))
+                        
+                        fig.update_layout(
+                            title="Nombre d'Employés par Département",
+                            height=350,
+                            xaxis_title="Département", 
+                            yaxis_title="Nombre d'Employés",
+                            plot_bgcolor='rgba(248,248,255,0.8)',
+                            font=dict(size=11)
+                        )
+                        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        fig.update_xaxes(tickangle=-45)
+                        return fig
+                    fig = cached_figure('secondary_analysis_chart', build_figure, variante=1)
                     st.plotly_chart(fig, use_container_width=True)
                 elif has_poste:
                     # Seulement poste : effectifs par poste
                     st.markdown("**Effectifs par Poste**")
-                    poste_count = df['poste'].value_counts()
-                    
-                    # Graphique en barres amélioré avec couleurs multiples
-                    colors = ['#FF7F0E', '#2CA02C', '#D62728', '#9467BD', '#8C564B', '#E377C2']
-                    bar_colors = [colors[i % len(colors)] for i in range(len(poste_count))]
+                    def build_figure():
                     
-                    fig = go.Figure(go.Bar(
-                        x=poste_count.index, 
-                        y=poste_count.values,
-                        marker=dict(color=bar_colors, line=dict(color='white', width=1)),
-                        text=poste_count.values,
-                        textposition='auto',
-                        hovertemplate='<b>%{x}</b><br>' +
-                                    'Nombre d\'employés: %{y}<br>' +
-                                    '<extra></extra>'
-                    ))
-                    
-                    fig.update_layout(
-                        title="Nombre d'Employés par Poste",
-                        height=350,
-                        xaxis_title="Poste", 
-                        yaxis_title="Nombre d'Employés",
-                        plot_bgcolor='rgba(248,248,255,0.8)',
-                        font=dict(size=11),
-                        xaxis_tickangle=-45
-                    )
-                    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        # Graphique en barres amélioré avec couleurs multiples
+                        colors = ['#FF7F0E', '#2CA02C', '#D62728', '#9467BD', '#8C564B', '#E377C2']
+                        bar_colors = [colors[i % len(colors)] for i in range(len(poste_count))]
+                        
+                        fig = go.Figure(go.Bar(
+                            x=poste_count.index, 
+                            y=poste_count.values,
+                            marker=dict(color=bar_colors, line=dict(color='white', width=1)),
+                            text=poste_count.values,
+                            textposition='auto',
+                            hovertemplate='<b>%{x}</b><br>' +
+                                        'Nombre d\'employés: %{y}<br>' +
+                                        '<extra></extra>'
+                        ))
+                        
+                        fig.update_layout(
+                            title="Nombre d'Employés par Poste",
+                            height=350,
+                            xaxis_title="Poste", 
+                            yaxis_title="Nombre d'Employés",
+                            plot_bgcolor='rgba(248,248,255,0.8)',
+                            font=dict(size=11),
+                            xaxis_tickangle=-45
+                        )
+                        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        return fig
+                    fig = cached_figure('secondary_analysis_chart', build_figure, variante=2)
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     show_info("Aucune donnée de catégorie disponible")
@@ -343,79 +490,84 @@ if page == "Tableau de Bord":
         with col4:
             def scatter_chart():
                 st.markdown("**Nuage de Points - Analyse des Salaires**")
-                if len(df) > 1:
-                    df_scatter = df.copy()
-                    df_scatter['index'] = range(len(df_scatter))
-                    
-                    # Choisir la couleur selon les données disponibles
-                    color_col = None
-                    if has_dept and has_poste:
-                        color_col = 'departement'  # Priorité au département si les deux existent
-                    elif has_dept:
-                        color_col = 'departement'
-                    elif has_poste:
-                        color_col = 'poste'
-                    
-                    # Normaliser les tailles des marqueurs
-                    min_salary = df['salaire'].min()
-                    max_salary = df['salaire'].max()
-                    size_range = [8, 25]
-                    
-                    if color_col:
-                        # Créer des couleurs distinctes pour chaque catégorie
-                        categories = df_scatter[color_col].unique()
-                        color_map = {cat: px.colors.qualitative.Set1[i % len(px.colors.qualitative.Set1)] 
-                                   for i, cat in enumerate(categories)}
+                if stats['total_employes'] > 1:
+                    def build_figure():
+                        # Échantillon régulier (au plus SCATTER_SAMPLE_ROWS points), pas de lecture de toute la table
+                        df = controller.db.get_salary_sample(max_rows=SCATTER_SAMPLE_ROWS)
+                        df_scatter = df.copy()
+                        df_scatter['index'] = range(len(df_scatter))
                         
-                        fig = go.Figure()
+                        # Choisir la couleur selon les données disponibles
+                        color_col = None
+                        if has_dept and has_poste:
+                            color_col = 'departement'  # Priorité au département si les deux existent
+                        elif has_dept:
+                            color_col = 'departement'
+                        elif has_poste:
+                            color_col = 'poste'
+                        
+                        # Normaliser les tailles des marqueurs
+                        min_salary = df['salaire'].min()
+                        max_salary = df['salaire'].max()
+                        size_range = [8, 25]
                         
-                        for cat in categories:
-                            df_cat = df_scatter[df_scatter[color_col] == cat]
-                            fig.add_trace(go.Scatter(
-                                x=df_cat['index'],
-                                y=df_cat['salaire'],
+                        if color_col:
+                            # Créer des couleurs distinctes pour chaque catégorie
+                            categories = df_scatter[color_col].unique()
+                            color_map = {cat: px.colors.qualitative.Set1[i % len(px.colors.qualitative.Set1)] 
+                                       for i, cat in enumerate(categories)}
+                            
+                            fig = go.Figure()
+                            
+                            for cat in categories:
+                                df_cat = df_scatter[df_scatter[color_col] == cat]
+                                fig.add_trace(go.Scatter(
+                                    x=df_cat['index'],
+                                    y=df_cat['salaire'],
+                                    mode='markers',
+                                    name=cat,
+                                    marker=dict(
+                                        size=[(s - min_salary) / (max_salary - min_salary) * (size_range[1] - size_range[0]) + size_range[0] 
+                                              for s in df_cat['salaire']],
+                                        color=color_map[cat],
+                                        line=dict(width=1, color='white'),
+                                        opacity=0.8
+                                    ),
+                                    hovertemplate='<b>Employé %{x}</b><br>' +
+                                                f'{color_col.capitalize()}: {cat}<br>' +
+                                                'Salaire: %{y:,.0f} FCFA<br>' +
+                                                '<extra></extra>'
+                                ))
+                        else:
+                            # Pas de catégorie de couleur
+                            fig = go.Figure(go.Scatter(
+                                x=df_scatter['index'],
+                                y=df_scatter['salaire'],
                                 mode='markers',
-                                name=cat,
                                 marker=dict(
                                     size=[(s - min_salary) / (max_salary - min_salary) * (size_range[1] - size_range[0]) + size_range[0] 
-                                          for s in df_cat['salaire']],
-                                    color=color_map[cat],
-                                    line=dict(width=1, color='white'),
-                                    opacity=0.8
+                                          for s in df_scatter['salaire']],
+                                    color='rgba(102, 126, 234, 0.8)',
+                                    line=dict(width=1, color='white')
                                 ),
                                 hovertemplate='<b>Employé %{x}</b><br>' +
-                                            f'{color_col.capitalize()}: {cat}<br>' +
                                             'Salaire: %{y:,.0f} FCFA<br>' +
                                             '<extra></extra>'
                             ))
-                    else:
-                        # Pas de catégorie de couleur
-                        fig = go.Figure(go.Scatter(
-                            x=df_scatter['index'],
-                            y=df_scatter['salaire'],
-                            mode='markers',
-                            marker=dict(
-                                size=[(s - min_salary) / (max_salary - min_salary) * (size_range[1] - size_range[0]) + size_range[0] 
-                                      for s in df_scatter['salaire']],
-                                color='rgba(102, 126, 234, 0.8)',
-                                line=dict(width=1, color='white')
-                            ),
-                            hovertemplate='<b>Employé %{x}</b><br>' +
-                                        'Salaire: %{y:,.0f} FCFA<br>' +
-                                        '<extra></extra>'
-                        ))
-                    
-                    fig.update_layout(
-                        title="Distribution des Salaires",
-                        height=350,
-                        xaxis_title="Employé", 
-                        yaxis_title="Salaire (FCFA)",
-                        plot_bgcolor='rgba(248,248,255,0.8)',
-                        showlegend=bool(color_col),
-                        font=dict(size=11)
-                    )
-                    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
-                    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        
+                        fig.update_layout(
+                            title="Distribution des Salaires",
+                            height=350,
+                            xaxis_title="Employé", 
+                            yaxis_title="Salaire (FCFA)",
+                            plot_bgcolor='rgba(248,248,255,0.8)',
+                            showlegend=bool(color_col),
+                            font=dict(size=11)
+                        )
+                        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        return fig
+                    fig = cached_figure('scatter_chart', build_figure, variante=0)
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     show_info("Pas assez de données pour le nuage de points")
@@ -427,69 +579,72 @@ if page == "Tableau de Bord":
         with col5:
             def line_chart():
                 st.markdown("**Tendance des Salaires**")
-                if len(df) > 2:
-                    df_sorted = df.sort_values('salaire').reset_index(drop=True)
-                    df_sorted['rang'] = range(1, len(df_sorted) + 1)
-                    
-                    # Créer le graphique linéaire avec go.Figure
-                    fig = go.Figure()
-                    
-                    # Ligne principale
-                    fig.add_trace(go.Scatter(
-                        x=df_sorted['rang'],
-                        y=df_sorted['salaire'],
-                        mode='lines+markers',
-                        name='Progression',
-                        line=dict(color='rgba(102, 126, 234, 0.8)', width=3),
-                        marker=dict(size=6, color='rgba(102, 126, 234, 1)', 
-                                  line=dict(width=1, color='white')),
-                        hovertemplate='<b>Rang %{x}</b><br>' +
-                                    'Salaire: %{y:,.0f} FCFA<br>' +
-                                    '<extra></extra>'
-                    ))
-                    
-                    # Ajouter des annotations pour min et max
-                    min_salary = df_sorted['salaire'].min()
-                    max_salary = df_sorted['salaire'].max()
-                    min_pos = df_sorted[df_sorted['salaire'] == min_salary]['rang'].iloc[0]
-                    max_pos = df_sorted[df_sorted['salaire'] == max_salary]['rang'].iloc[0]
-                    
-                    fig.add_annotation(
-                        x=min_pos, y=min_salary,
-                        text=f"Min: {min_salary:,.0f}",
-                        showarrow=True,
-                        arrowhead=2,
-                        arrowcolor="red",
-                        bgcolor="rgba(255,255,255,0.8)",
-                        bordercolor="red"
-                    )
-                    
-                    fig.add_annotation(
-                        x=max_pos, y=max_salary,
-                        text=f"Max: {max_salary:,.0f}",
-                        showarrow=True,
-                        arrowhead=2,
-                        arrowcolor="green",
-                        bgcolor="rgba(255,255,255,0.8)",
-                        bordercolor="green"
-                    )
-                    
-                    # Ligne de référence pour la moyenne
-                    avg_salary = df['salaire'].mean()
-                    fig.add_hline(y=avg_salary, line_dash="dash", line_color="orange",
-                                 annotation_text=f"Moyenne: {avg_salary:,.0f} FCFA")
-                    
-                    fig.update_layout(
-                        title="Progression des Salaires",
-                        height=350,
-                        xaxis_title="Rang", 
-                        yaxis_title="Salaire (FCFA)",
-                        plot_bgcolor='rgba(248,248,255,0.8)',
-                        showlegend=False,
-                        font=dict(size=11)
-                    )
-                    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
-                    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                if stats['total_employes'] > 2:
+                    def build_figure():
+                        # Courbe lue dans l'ordre de l'index (échantillonnée pour les grandes tables)
+                        df_sorted = controller.db.get_salary_curve(points=200)
+                        
+                        # Créer le graphique linéaire avec go.Figure
+                        fig = go.Figure()
+                        
+                        # Ligne principale
+                        fig.add_trace(go.Scatter(
+                            x=df_sorted['rang'],
+                            y=df_sorted['salaire'],
+                            mode='lines+markers',
+                            name='Progression',
+                            line=dict(color='rgba(102, 126, 234, 0.8)', width=3),
+                            marker=dict(size=6, color='rgba(102, 126, 234, 1)', 
+                                      line=dict(width=1, color='white')),
+                            hovertemplate='<b>Rang %{x}</b><br>' +
+                                        'Salaire: %{y:,.0f} FCFA<br>' +
+                                        '<extra></extra>'
+                        ))
+                        
+                        # Ajouter des annotations pour min et max (extrémités de la courbe triée)
+                        min_salary = stats['salaire_min']
+                        max_salary = stats['salaire_max']
+                        min_pos = df_sorted['rang'].iloc[0]
+                        max_pos = df_sorted['rang'].iloc[-1]
+                        
+                        fig.add_annotation(
+                            x=min_pos, y=min_salary,
+                            text=f"Min: {min_salary:,.0f}",
+                            showarrow=True,
+                            arrowhead=2,
+                            arrowcolor="red",
+                            bgcolor="rgba(255,255,255,0.8)",
+                            bordercolor="red"
+                        )
+                        
+                        fig.add_annotation(
+                            x=max_pos, y=max_salary,
+                            text=f"Max: {max_salary:,.0f}",
+                            showarrow=True,
+                            arrowhead=2,
+                            arrowcolor="green",
+                            bgcolor="rgba(255,255,255,0.8)",
+                            bordercolor="green"
+                        )
+                        
+                        # Ligne de référence pour la moyenne
+                        avg_salary = stats['salaire_moyen']
+                        fig.add_hline(y=avg_salary, line_dash="dash", line_color="orange",
+                                     annotation_text=f"Moyenne: {avg_salary:,.0f} FCFA")
+                        
+                        fig.update_layout(
+                            title="Progression des Salaires",
+                            height=350,
+                            xaxis_title="Rang", 
+                            yaxis_title="Salaire (FCFA)",
+                            plot_bgcolor='rgba(248,248,255,0.8)',
+                            showlegend=False,
+                            font=dict(size=11)
+                        )
+                        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        return fig
+                    fig = cached_figure('line_chart', build_figure, variante=0)
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     show_info("Pas assez de données pour le graphique linéaire")
@@ -498,42 +653,48 @@ if page == "Tableau de Bord":
         with col6:
             def histogram_chart():
                 st.markdown("**Histogramme des Salaires**")
-                if len(df) > 0:
-                    nbins = min(10, max(3, len(df) // 2))
-                    
-                    # Créer l'histogramme avec go.Figure
-                    fig = go.Figure(data=[go.Histogram(
-                        x=df['salaire'],
-                        nbinsx=nbins,
-                        marker=dict(
-                            color='rgba(102, 126, 234, 0.7)',
-                            line=dict(color='white', width=1)
-                        ),
-                        hovertemplate='Salaire: %{x:,.0f} FCFA<br>' +
-                                    'Nombre d\'employés: %{y}<br>' +
-                                    '<extra></extra>'
-                    )])
-                    
-                    # Ajouter des lignes de référence
-                    mean_salary = df['salaire'].mean()
-                    median_salary = df['salaire'].median()
-                    
-                    fig.add_vline(x=mean_salary, line_dash="dash", line_color="red",
-                                 annotation_text=f"Moyenne: {mean_salary:,.0f}")
-                    fig.add_vline(x=median_salary, line_dash="dot", line_color="orange",
-                                 annotation_text=f"Médiane: {median_salary:,.0f}")
-                    
-                    fig.update_layout(
-                        title="Distribution des Salaires",
-                        height=350,
-                        xaxis_title="Salaire (FCFA)", 
-                        yaxis_title="Nombre d'employés",
-                        plot_bgcolor='rgba(248,248,255,0.8)',
-                        showlegend=False,
-                        font=dict(size=11)
-                    )
-                    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
-                    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                if stats['total_employes'] > 0:
+                    def build_figure():
+                        # Tranches comptées en SQL (GROUP BY), sans charger les salaires
+                        nbins = min(10, max(3, stats['total_employes'] // 2))
+                        bins = controller.db.get_salary_histogram(nbins)
+                        
+                        # Créer l'histogramme avec go.Figure
+                        fig = go.Figure(data=[go.Bar(
+                            x=(bins['debut'] + bins['fin']) / 2,
+                            y=bins['effectif'],
+                            width=bins['fin'] - bins['debut'],
+                            marker=dict(
+                                color='rgba(102, 126, 234, 0.7)',
+                                line=dict(color='white', width=1)
+                            ),
+                            hovertemplate='Salaire: %{x:,.0f} FCFA<br>' +
+                                        'Nombre d\'employés: %{y}<br>' +
+                                        '<extra></extra>'
+                        )])
+                        
+                        # Ajouter des lignes de référence
+                        mean_salary = avg_salary
+                        median_salary = stats['salaire_median']
+                        
+                        fig.add_vline(x=mean_salary, line_dash="dash", line_color="red",
+                                     annotation_text=f"Moyenne: {mean_salary:,.0f}")
+                        fig.add_vline(x=median_salary, line_dash="dot", line_color="orange",
+                                     annotation_text=f"Médiane: {median_salary:,.0f}")
+                        
+                        fig.update_layout(
+                            title="Distribution des Salaires",
+                            height=350,
+                            xaxis_title="Salaire (FCFA)", 
+                            yaxis_title="Nombre d'employés",
+                            plot_bgcolor='rgba(248,248,255,0.8)',
+                            showlegend=False,
+                            font=dict(size=11)
+                        )
+                        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                        return fig
+                    fig = cached_figure('histogram_chart', build_figure, variante=0)
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     show_info("Aucune donnée de salaire disponible")
@@ -545,11 +706,11 @@ if page == "Tableau de Bord":
         show_all = st.checkbox("Afficher toutes les données", value=False)
         
         if show_all:
-            st.dataframe(df, use_container_width=True, height=400)
+            st.dataframe(controller.db.get_all_data(), use_container_width=True, height=400)
         else:
-            st.dataframe(df.head(10), use_container_width=True)
-            if len(df) > 10:
-                show_info(f"Affichage de 10 lignes sur {len(df)} au total")
+            st.dataframe(controller.db.get_filtered_data(limit=10), use_container_width=True)
+            if stats['total_employes'] > 10:
+                show_info(f"Affichage de 10 lignes sur {stats['total_employes']} au total")
         
         # Analyses détaillées
         st.markdown('<div class="section-spacing"></div>', unsafe_allow_html=True)
@@ -560,18 +721,10 @@ if page == "Tableau de Bord":
             if has_dept:
                 # Statistiques par département
                 st.markdown("**Statistiques par Département**")
-                dept_detailed = df.groupby('departement').agg({
-                    'salaire': ['count', 'mean', 'max', 'min']
-                }).round(0)
-                dept_detailed.columns = ['Effectif', 'Salaire Moyen', 'Salaire Max', 'Salaire Min']
                 st.dataframe(dept_detailed, use_container_width=True)
             elif has_poste:
                 # Seulement poste
                 st.markdown("**Statistiques par Poste**")
-                poste_detailed = df.groupby('poste').agg({
-                    'salaire': ['count', 'mean', 'max', 'min']
-                }).round(0)
-                poste_detailed.columns = ['Effectif', 'Salaire Moyen', 'Salaire Max', 'Salaire Min']
                 st.dataframe(poste_detailed, use_container_width=True)
             else:
                 show_info("Aucune donnée de catégorie pour les statistiques")
@@ -580,12 +733,8 @@ if page == "Tableau de Bord":
             if has_poste and has_dept:
                 # Cas complet : statistiques par poste (complémentaire)
                 st.markdown("**Statistiques par Poste**")
-                poste_detailed = df.groupby('poste').agg({
-                    'salaire': ['count', 'mean', 'max', 'min']
-                }).round(0)
-                poste_detailed.columns = ['Effectif', 'Salaire Moyen', 'Salaire Max', 'Salaire Min']
                 st.dataframe(poste_detailed, use_container_width=True)
-            elif len(df) > 0:
+            elif stats['total_employes'] > 0:
                 # Top 10 des salaires (dans tous les autres cas)
                 st.markdown("**Top 10 des Salaires**")
                 columns_to_show = ['nom', 'salaire']
@@ -593,12 +742,16 @@ if page == "Tableau de Bord":
                     columns_to_show.append('departement')
                 if has_poste:
                     columns_to_show.append('poste')
-                # Vérifier que toutes les colonnes existent
-                columns_to_show = [col for col in columns_to_show if col in df.columns]
-                top_salaries = df.nlargest(min(10, len(df)), 'salaire')[columns_to_show]
+                # Lecture des 10 premières entrées de l'index sur salaire
+                top_salaries = controller.db.get_top_salaries(10, columns_to_show)
                 st.dataframe(top_salaries, use_container_width=True)
             else:
                 show_info("Aucune donnée disponible")
+        
+        # Quartiles par département (sketches de quantiles)
+        if has_dept:
+            st.markdown("**Quartiles des Salaires par Département**")
+            st.dataframe(controller.get_salary_quartiles('departement'), use_container_width=True)
     else:
         show_empty_state()
 
@@ -606,6 +759,11 @@ if page == "Tableau de Bord":
 elif page == "Importation":
     st.header("Importation de Fichiers Excel")
     
+    target_dataset = st.selectbox(
+        "Jeu de données cible", dataset_names, index=dataset_names.index(dataset),
+        help="Créez un nouveau jeu depuis la barre latérale"
+    )
+    
     uploaded_file = st.file_uploader(
         "Choisir un fichier Excel (.xlsx)",
         type=['xlsx'],
@@ -619,10 +777,15 @@ elif page == "Importation":
         
         col1, col2 = st.columns([1, 2])
         with col1:
+            bulk = st.checkbox(
+                "Chargement en masse", value=False,
+                help="Pour les très gros fichiers : index reconstruits après le chargement "
+                     "(activé automatiquement au-delà de 50 000 lignes)"
+            )
             if st.button("IMPORTER", type="primary"):
                 with show_loading("Importation en cours..."):
                     try:
-                        result = controller.import_excel(uploaded_file)
+                        result = init_controller(target_dataset).import_excel(uploaded_file, bulk=bulk or None)
                         if result["success"]:
                             show_success("Importation réussie !")
                             col_s, col_e = st.columns(2)
@@ -630,6 +793,7 @@ elif page == "Importation":
                                 st.metric("Lignes importées", result["imported"])
                             with col_e:
                                 st.metric("Erreurs", result["errors"])
+                            st.caption(f"Lecteur Excel : {result['engine']}")
                         else:
                             show_error(result['message'])
                     except Exception as e:
@@ -637,7 +801,7 @@ elif page == "Importation":
         
         with col2:
             try:
-                df_preview = pd.read_excel(uploaded_file, nrows=5)
+                df_preview, _ = controller.read_excel(uploaded_file, nrows=5)
                 st.write("**Aperçu :**")
                 st.dataframe(df_preview, use_container_width=True)
             except Exception as e:
@@ -647,78 +811,139 @@ elif page == "Importation":
 elif page == "Gestion":
     st.header("Gestion des Données")
     
-    df = controller.db.get_all_data()
+    # Effectif seul : la liste n'est lue que page par page
+    total_employees = controller.db.get_employee_count()
     
-    if not df.empty:
+    if total_employees > 0:
         # Recherche
         st.subheader("Recherche et Filtres")
-        col1, col2 = st.columns([2, 1])
+        col1, col2, col3 = st.columns([2, 1, 1])
         with col1:
             search_term = st.text_input("Rechercher (nom ou email)")
         with col2:
             sort_by = st.selectbox("Trier par", ["nom", "email", "salaire"])
         
-        # Application des filtres
-        filtered_df = df.copy()
+        # Recherche approximative (index trigrammes : accents et fautes de frappe tolérés)
         if search_term:
-            mask = (
-                filtered_df['nom'].str.contains(search_term, case=False, na=False) |
-                filtered_df['email'].str.contains(search_term, case=False, na=False)
-            )
-            filtered_df = filtered_df[mask]
-        
-        if sort_by in filtered_df.columns:
-            filtered_df = filtered_df.sort_values(by=sort_by)
+            filtered_df = controller.db.search_employees(search_term, limit=200)
+            filtered_df = filtered_df.drop(columns=['score'])
+        else:
+            # Une page de la liste, lue dans l'ordre de l'index de la colonne de tri
+            page_count = max(1, math.ceil(total_employees / EMPLOYEE_PAGE_SIZE))
+            with col3:
+                page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+            first_row = (int(page_number) - 1) * EMPLOYEE_PAGE_SIZE
+            filtered_df = controller.db.get_filtered_data(sort_by=sort_by, limit=EMPLOYEE_PAGE_SIZE,
+                                                          offset=first_row)
         
         st.dataframe(filtered_df, use_container_width=True)
-        show_info(f"{len(filtered_df)} employé(s) affiché(s) sur {len(df)} au total")
+        if search_term:
+            show_info(f"{len(filtered_df)} résultat(s) les plus proches, triés par pertinence "
+                      f"(sur {total_employees} employés au total)")
+        else:
+            show_info(f"Employés {first_row + 1} à {first_row + len(filtered_df)} sur {total_employees} "
+                      f"(page {int(page_number)} sur {page_count})")
         
         # Modification d'employé
         st.subheader("Modifier un Employé")
-        if len(filtered_df) > 0:
-            employee_options = [f"ID {row['id']} - {row['nom']}" for _, row in filtered_df.iterrows()]
-            selected_option = st.selectbox("Choisir un employé", employee_options)
+        
+        def lookup_employees(query, limit):
+            """Au plus `limit` correspondances, servies par l'index de recherche ou la clé primaire."""
+            if query.strip():
+                return controller.db.search_employees(query, limit=limit, columns=['id', 'nom'])
+            return controller.db.get_filtered_data(columns=['id', 'nom'], sort_by='id', limit=limit)
+        
+        employee_id = render_employee_picker(lookup_employees, limit=20)
+        if employee_id is not None:
+            # Ligne lue une seule fois et conservée avec sa version jusqu'à l'enregistrement :
+            # une modification faite entre-temps par un autre utilisateur sera détectée
+            snapshot = st.session_state.get('edit_snapshot')
+            if snapshot is None or snapshot['id'] != employee_id:
+                snapshot = controller.db.get_employee(employee_id)
+                st.session_state['edit_snapshot'] = snapshot
             
-            if selected_option:
-                employee_id = int(selected_option.split(' - ')[0].replace('ID ', ''))
-                selected_row = df[df['id'] == employee_id].iloc[0]
-                
+            if snapshot is None:
+                show_error("Cet employé n'existe plus")
+                st.session_state.pop('edit_snapshot', None)
+            else:
                 with st.form("modify_employee"):
                     col1, col2 = st.columns(2)
                     
                     with col1:
-                        new_nom = st.text_input("Nom", value=str(selected_row['nom'] or ""))
-                        new_email = st.text_input("Email", value=str(selected_row['email'] or ""))
-                        new_telephone = st.text_input("Téléphone", value=str(selected_row['telephone'] or ""))
+                        new_nom = st.text_input("Nom", value=str(snapshot['nom'] or ""))
+                        new_email = st.text_input("Email", value=str(snapshot['email'] or ""))
+                        new_telephone = st.text_input("Téléphone", value=str(snapshot['telephone'] or ""))
                     
                     with col2:
-                        new_departement = st.text_input("Département", value=str(selected_row['departement'] or ""))
-                        new_poste = st.text_input("Poste", value=str(selected_row['poste'] or ""))
-                        new_salaire = st.number_input("Salaire", value=float(selected_row['salaire'] or 0))
+                        new_departement = st.text_input("Département", value=str(snapshot['departement'] or ""))
+                        new_poste = st.text_input("Poste", value=str(snapshot['poste'] or ""))
+                        new_salaire = st.number_input("Salaire", value=float(snapshot['salaire'] or 0))
                     
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.form_submit_button("METTRE À JOUR", type="primary"):
+                            form_values = {
+                                'nom': new_nom,
+                                'email': new_email,
+                                'telephone': new_telephone,
+                                'departement': new_departement,
+                                'poste': new_poste,
+                                'salaire': new_salaire
+                            }
+                            # Seuls les champs réellement modifiés sont écrits
+                            changes = {
+                                field: value for field, value in form_values.items()
+                                if value != (float(snapshot[field] or 0) if field == 'salaire'
+                                             else str(snapshot[field] or ""))
+                            }
                             try:
-                                controller.db.update_employee(employee_id, 'nom', new_nom)
-                                controller.db.update_employee(employee_id, 'email', new_email)
-                                controller.db.update_employee(employee_id, 'telephone', new_telephone)
-                                controller.db.update_employee(employee_id, 'departement', new_departement)
-                                controller.db.update_employee(employee_id, 'poste', new_poste)
-                                controller.db.update_employee(employee_id, 'salaire', new_salaire)
+                                # Mêmes règles qu'à l'import : email en minuscules, téléphone E.164, vide -> None
+                                changes = controller.canonicalize_employee_fields(changes)
+                                controller.db.update_employee_checked(employee_id, changes, snapshot)
+                                st.session_state.pop('edit_snapshot', None)
                                 show_success("Employé mis à jour !")
                                 st.rerun()
+                            except ConcurrentModificationError as e:
+                                st.session_state['edit_conflict'] = e.conflicts[0]
                             except Exception as e:
                                 show_error(f"Erreur : {str(e)}")
                     
                     with col2:
                         if st.form_submit_button("SUPPRIMER", type="secondary"):
                             try:
-                                controller.db.delete_employee(employee_id)
+                                controller.db.delete_employee(employee_id, expected_version=snapshot['version'])
+                                st.session_state.pop('edit_snapshot', None)
                                 show_success("Employé supprimé !")
                                 st.rerun()
+                            except ConcurrentModificationError as e:
+                                st.session_state['edit_conflict'] = e.conflicts[0]
                             except Exception as e:
                                 show_error(f"Erreur : {str(e)}")
+                
+                # Conflit : affichage du diff et rechargement de la fiche à la demande
+                conflict = st.session_state.get('edit_conflict')
+                if conflict and conflict['id'] == employee_id:
+                    if conflict['version_actuelle'] is None:
+                        show_error("Cet employé a été supprimé par un autre utilisateur.")
+                    else:
+                        show_error("Cet employé a été modifié par un autre utilisateur depuis votre lecture. "
+                                   "Vos modifications n'ont pas été enregistrées.")
+                        diff_rows = [
+                            {
+                                'Champ': field,
+                                'Valeur lue': values['lu'],
+                                'Valeur actuelle': values['actuel'],
+                                'Votre saisie': values['saisi'],
+                                'Conflit': "Oui" if values['conflit'] else "Non"
+                            }
+                            for field, values in conflict['differences'].items()
+                        ]
+                        if diff_rows:
+                            st.dataframe(pd.DataFrame(diff_rows), use_container_width=True)
+                    if st.button("RECHARGER LA FICHE"):
+                        st.session_state.pop('edit_snapshot', None)
+                        st.session_state.pop('edit_conflict', None)
+                        st.rerun()
     else:
         show_empty_state()
 
@@ -726,37 +951,122 @@ elif page == "Gestion":
 elif page == "Exportation":
     st.header("Exportation des Données")
     
-    df = controller.db.get_all_data()
+    total_count = controller.db.get_employee_count()
     
-    if not df.empty:
-        st.subheader("Statistiques d'Export")
-        st.metric("Nombre d'employés à exporter", len(df))
+    if total_count > 0:
+        st.subheader("Filtres d'Export")
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_depts = st.multiselect("Départements", controller.db.get_distinct_values('departement'))
+            selected_postes = st.multiselect("Postes", controller.db.get_distinct_values('poste'))
+            export_search = st.text_input("Rechercher (nom ou email)", key="export_search")
+        with col2:
+            salary_min, salary_max = controller.db.get_salary_range()
+            salary_min = float(salary_min or 0)
+            salary_max = float(salary_max or 0)
+            # Plancher des champs : 0, ou le plus petit salaire s'il est négatif (données importées)
+            salary_floor = min(0.0, salary_min)
+            min_value = st.number_input("Salaire minimum", value=salary_min, min_value=salary_floor)
+            max_value = st.number_input("Salaire maximum", value=salary_max, min_value=salary_floor)
         
-        st.subheader("Aperçu")
-        st.dataframe(df, use_container_width=True)
+        st.subheader("Colonnes et Tri")
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            export_columns = st.multiselect("Colonnes à exporter", EMPLOYEE_COLUMNS, default=EMPLOYEE_COLUMNS)
+        with col2:
+            export_sort = st.selectbox("Trier par", ["(aucun)"] + EMPLOYEE_COLUMNS, key="export_sort")
+        with col3:
+            export_order = st.radio("Ordre", ["Croissant", "Décroissant"], key="export_order")
         
-        st.subheader("Configuration Export")
-        filename = st.text_input("Nom du fichier", value="export_employees.xlsx")
+        export_filters = {
+            'departement': selected_depts,
+            'poste': selected_postes,
+            'salaire_min': min_value if min_value > salary_min else None,
+            'salaire_max': max_value if max_value < salary_max else None,
+            'recherche': export_search
+        }
+        sort_column = None if export_sort == "(aucun)" else export_sort
+        ascending = export_order == "Croissant"
         
-        if st.button("GÉNÉRER FICHIER EXCEL", type="primary"):
-            try:
-                result = controller.export_to_excel(filename)
-                if result["success"]:
-                    show_success(f"Export réussi ! {result['message']}")
+        if export_columns:
+            export_count = controller.db.count_filtered(export_filters)
+            st.subheader("Statistiques d'Export")
+            st.metric("Nombre d'employés à exporter", export_count, help=f"Sur {total_count} au total")
+            
+            st.subheader("Aperçu")
+            st.dataframe(
+                controller.db.get_filtered_data(export_filters, export_columns, sort_column, ascending, limit=100),
+                use_container_width=True
+            )
+            if export_count > 100:
+                show_info(f"Aperçu limité à 100 lignes sur {export_count}")
+            
+            st.subheader("Configuration Export")
+            export_mode = st.radio(
+                "Type d'export",
+                ["Données filtrées", "Rapport analytique"],
+                horizontal=True,
+                help="Le rapport contient les données, une feuille par département et les statistiques"
+            )
+            default_name = "export_employees.xlsx" if export_mode == "Données filtrées" else "rapport_employees.xlsx"
+            filename = st.text_input("Nom du fichier", value=default_name)
+            
+            # Découpage des gros exports (limite d'une feuille Excel : 1 048 576 lignes)
+            rows_per_part, split_mode = EXPORT_ROWS_PER_PART, 'fichiers'
+            if export_mode == "Données filtrées":
+                with st.expander("Découpage des gros exports", expanded=export_count > EXPORT_ROWS_PER_PART):
+                    rows_per_part = int(st.number_input("Lignes par partie", min_value=1000,
+                                                        max_value=EXCEL_MAX_DATA_ROWS,
+                                                        value=EXPORT_ROWS_PER_PART, step=50000))
+                    split_label = st.radio("Découpage", ["Fichiers (archive ZIP)", "Feuilles du même classeur"],
+                                           horizontal=True)
+                    split_mode = 'fichiers' if split_label.startswith("Fichiers") else 'feuilles'
+                    if export_count > rows_per_part:
+                        show_info(f"Export découpé en {-(-export_count // rows_per_part)} parties")
+            
+            # Archive ZIP comprise : écrite bloc par bloc dans le cache des exports
+            # (voir iter_export_archive), puis lue sur disque au clic sur le téléchargement
+            if st.button("GÉNÉRER FICHIER EXCEL", type="primary"):
+                try:
+                    def run_export(progress=None):
+                        if export_mode == "Données filtrées":
+                            return controller.export_to_excel(filename, export_filters, export_columns,
+                                                              sort_column, ascending, rows_per_part=rows_per_part,
+                                                              split=split_mode, progress=progress)
+                        return controller.export_report(filename, export_filters)
                     
-                    try:
-                        with open(filename, "rb") as file:
-                            create_download_button(
-                                data=file.read(),
-                                filename=filename,
-                                label="TÉLÉCHARGER LE FICHIER EXCEL",
-                                mime_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                            )
-                    except Exception as e:
-                        show_error(f"Erreur de téléchargement : {str(e)}")
-                else:
-                    show_error(f"Erreur d'export : {result['message']}")
-            except Exception as e:
-                show_error(f"Erreur système : {str(e)}")
+                    progress_bar = st.progress(0.0)
+                    def show_progress(exported, total):
+                        progress_bar.progress(min(exported / total, 1.0) if total else 0.0,
+                                              text=f"{exported} / {total} lignes")
+                    result = run_export(show_progress)
+                    progress_bar.empty()
+                    if result["success"]:
+                        show_success(f"Export réussi ! {result['message']}")
+                        
+                        # Lecture différée : le fichier n'est chargé qu'au clic sur le bouton,
+                        # et régénéré s'il a été évincé du cache entre-temps
+                        def read_export(path=result["path"]):
+                            return controller.export_cache.read(path, lambda: run_export()["path"])
+                        is_archive = result["format"] == 'zip'
+                        create_download_button(
+                            data=read_export,
+                            filename=result["filename"],
+                            label="TÉLÉCHARGER L'ARCHIVE ZIP" if is_archive else "TÉLÉCHARGER LE FICHIER EXCEL",
+                            mime_type="application/zip" if is_archive else
+                                      "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
+                    else:
+                        show_error(f"Erreur d'export : {result['message']}")
+                except Exception as e:
+                    show_error(f"Erreur système : {str(e)}")
+        else:
+            show_info("Sélectionnez au moins une colonne à exporter")
     else:
         show_empty_state()
+
+# Profils d'exécution enregistrés, puis fin du profil de ce rerun
+if show_profiles:
+    mark("Profils")
+    render_profiling_panel(profile_store.list_profiles(), profile_store.load)
+end_rerun(profile_store, rerun_profile, page)
@@ -1,8 +1,12 @@
 """
 Package models - Gestion de la couche données
-Contient la classe EmployeeDatabase pour SQLite
+Contient la classe EmployeeDatabase pour SQLite,
+l'écrivain unique DatabaseWriter (file d'écriture avec group commit)
+et le registre des jeux de données DatasetRegistry (un fichier par jeu)
 """
 
-from .database import EmployeeDatabase
+from .database import EmployeeDatabase, ConcurrentModificationError
+from .writer import DatabaseWriter, WriterBusyError
+from .datasets import DatasetRegistry
 
-__all__ = ['EmployeeDatabase']
\ No newline at end of file
+__all__ = ['EmployeeDatabase', 'ConcurrentModificationError', 'DatabaseWriter', 'WriterBusyError', 'DatasetRegistry']
\ No newline at end of file
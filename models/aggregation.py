@@ -0,0 +1,97 @@
+"""
+Moteur d'agrégation en une seule passe pour le tableau de bord.
+Les regroupements demandés sont déclarés (dimensions + mesures) ; le moteur
+exécute une seule requête GROUP BY au grain le plus fin (union de toutes les
+dimensions), puis dérive chaque regroupement par cumul des agrégats partiels,
+comme un GROUPING SETS : un seul parcours de la table pour toutes les vues.
+"""
+from collections import namedtuple
+
+import pandas as pd
+
+# Mesures disponibles, toutes dérivables par cumul des agrégats partiels
+MEASURES = ['effectif', 'nb_salaires', 'salaire_somme', 'salaire_moyen', 'salaire_max', 'salaire_min']
+
+# Dimensions autorisées (liste blanche pour la construction SQL)
+DIMENSIONS = ['departement', 'poste']
+
+Grouping = namedtuple('Grouping', ['name', 'dimensions', 'measures'])
+Grouping.__new__.__defaults__ = (tuple(MEASURES),)
+Grouping.__doc__ = """
+Regroupement déclaratif.
+
+Args:
+    name (str): Nom de la vue produite
+    dimensions (tuple): Colonnes de regroupement (vide = total global)
+    measures (tuple): Mesures à retourner (toutes par défaut)
+"""
+
+# Regroupements du tableau de bord : donuts, barres, carte croisée et tableaux détaillés
+DASHBOARD_GROUPINGS = [
+    Grouping('total', ()),
+    Grouping('par_departement', ('departement',)),
+    Grouping('par_poste', ('poste',)),
+    Grouping('departement_poste', ('departement', 'poste')),
+]
+
+
+class AggregationEngine:
+    """
+    Calcule plusieurs regroupements d'employés en une seule requête.
+    """
+    
+    def __init__(self, db):
+        """
+        Args:
+            db (EmployeeDatabase): Base interrogée
+        """
+        self.db = db
+    
+    def run(self, groupings=None):
+        """
+        Calcule tous les regroupements demandés en un seul parcours de la table.
+        
+        Args:
+            groupings (list): Liste de Grouping (DASHBOARD_GROUPINGS par défaut)
+        
+        Returns:
+            dict: {nom: pandas.DataFrame} indexé par les dimensions du regroupement
+                  (une seule ligne sans index pour un total global)
+        """
+        groupings = groupings or DASHBOARD_GROUPINGS
+        for grouping in groupings:
+            unknown = [dim for dim in grouping.dimensions if dim not in DIMENSIONS]
+            unknown += [measure for measure in grouping.measures if measure not in MEASURES]
+            if unknown:
+                raise ValueError(f"Dimension ou mesure inconnue: {', '.join(unknown)}")
+        
+        # Grain le plus fin : union ordonnée des dimensions de tous les regroupements
+        dimensions = [dim for dim in DIMENSIONS if any(dim in g.dimensions for g in groupings)]
+        base = self.db.get_partial_aggregates(dimensions)
+        
+        return {grouping.name: self._roll_up(base, grouping) for grouping in groupings}
+    
+    def _roll_up(self, base, grouping):
+        """Dérive un regroupement à partir des agrégats partiels au grain fin."""
+        dims = list(grouping.dimensions)
+        if dims:
+            # Comme pandas.groupby : les groupes NULL sont exclus
+            partial = base.dropna(subset=dims)
+            rolled = partial.groupby(dims).agg(
+                effectif=('effectif', 'sum'),
+                nb_salaires=('nb_salaires', 'sum'),
+                salaire_somme=('salaire_somme', 'sum'),
+                salaire_max=('salaire_max', 'max'),
+                salaire_min=('salaire_min', 'min'),
+            )
+        else:
+            rolled = pd.DataFrame([{
+                'effectif': base['effectif'].sum(),
+                'nb_salaires': base['nb_salaires'].sum(),
+                'salaire_somme': base['salaire_somme'].sum(),
+                'salaire_max': base['salaire_max'].max(),
+                'salaire_min': base['salaire_min'].min(),
+            }])
+        
+        rolled['salaire_moyen'] = rolled['salaire_somme'] / rolled['nb_salaires'].where(rolled['nb_salaires'] > 0)
+        return rolled[list(grouping.measures)]
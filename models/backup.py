@@ -0,0 +1,219 @@
+"""
+Sauvegardes à chaud de la base SQLite (API backup de sqlite3).
+La copie est faite par petits lots de pages depuis un thread dédié, dans une
+transaction de lecture : en mode WAL, ni les lectures ni les écritures des
+utilisateurs n'attendent la sauvegarde, et la copie reste cohérente.
+Les instantanés sont horodatés, conservés selon une rétention (distincte pour
+les instantanés périodiques et pour les instantanés manuels ou de sécurité),
+et restaurables sans interrompre l'application (le journal des modifications
+reçoit un RESET).
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from models.writer import BUSY_TIMEOUT
+
+# Nombre d'instantanés périodiques ('auto') conservés par base
+DEFAULT_RETENTION = 10
+
+# Instantanés manuels et de sécurité (avant-vidage, avant-restauration...) :
+# rotation distincte, pour qu'une série de sauvegardes périodiques ne les efface pas
+DEFAULT_LABELED_RETENTION = 20
+DEFAULT_LABELED_MAX_AGE_DAYS = 90
+
+# Libellé des instantanés périodiques
+AUTO_LABEL = 'auto'
+
+# Pages copiées par étape et pause (secondes) entre deux étapes
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+
+# Intervalle (secondes) des sauvegardes périodiques
+DEFAULT_BACKUP_INTERVAL = 3600
+
+# Nom d'un instantané : <base>-AAAAMMJJ-HHMMSS-micro[-libellé].db
+SNAPSHOT_PATTERN = re.compile(r'^(?P<base>.+)-(?P<date>\d{8}-\d{6}-\d{6})(?:-(?P<label>[A-Za-z0-9_-]+))?\.db$')
+
+
+class BackupManager:
+    """
+    Instantanés d'une base : création en tâche de fond, rotation et restauration.
+    """
+    
+    def __init__(self, db, backup_dir=None, retention=DEFAULT_RETENTION,
+                 labeled_retention=DEFAULT_LABELED_RETENTION, labeled_max_age_days=DEFAULT_LABELED_MAX_AGE_DAYS,
+                 pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP):
+        """
+        Args:
+            db (EmployeeDatabase): Base sauvegardée
+            backup_dir (str): Répertoire des instantanés (par défaut : backups/<base> à côté du fichier)
+            retention (int): Nombre d'instantanés périodiques ('auto') conservés
+            labeled_retention (int): Nombre d'instantanés manuels ou de sécurité conservés
+            labeled_max_age_days (float): Âge maximal (jours) des instantanés manuels ou de
+                sécurité, None pour les garder sans limite d'âge
+            pages (int): Pages copiées par étape
+            sleep (float): Pause entre deux étapes (secondes)
+        """
+        self.db = db
+        base_dir, filename = os.path.split(os.path.abspath(db.db_path))
+        self.base_name = os.path.splitext(filename)[0]
+        self.backup_dir = backup_dir or os.path.join(base_dir, 'backups', self.base_name)
+        self.retention = retention
+        self.labeled_retention = labeled_retention
+        self.labeled_max_age_days = labeled_max_age_days
+        self.pages = pages
+        self.sleep = sleep
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"backup:{self.base_name}")
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_seq = None
+    
+    def backup(self, label=None):
+        """
+        Lance un instantané en tâche de fond (les sauvegardes sont exécutées une à une).
+        
+        Args:
+            label (str): Libellé ajouté au nom du fichier (ex: 'avant-vidage')
+        
+        Returns:
+            concurrent.futures.Future: Informations sur l'instantané (voir list_backups)
+        """
+        if label is not None and not re.match(r'^[A-Za-z0-9_-]+$', label):
+            raise ValueError("Libellé invalide : lettres, chiffres, '-' et '_' uniquement")
+        return self._executor.submit(self._create_snapshot, label)
+    
+    def _create_snapshot(self, label):
+        """Copie la base dans un nouvel instantané puis applique la rétention."""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        filename = f"{self.base_name}-{stamp}{'-' + label if label else ''}.db"
+        path = os.path.join(self.backup_dir, filename)
+        tmp_path = path + '.tmp'
+        
+        source = sqlite3.connect(self.db.db_path, timeout=BUSY_TIMEOUT)
+        target = sqlite3.connect(tmp_path)
+        try:
+            # Transaction de lecture ouverte pendant toute la copie : l'instantané
+            # reste cohérent et la copie ne recommence pas à chaque écriture concurrente
+            source.execute("BEGIN")
+            row = source.execute("SELECT seq FROM sqlite_sequence WHERE name = 'employee_changes'").fetchone()
+            seq = row[0] if row else 0
+            source.backup(target, pages=self.pages, sleep=self.sleep)
+            source.rollback()
+            
+            # Instantané autonome : journal classique (pas de fichiers -wal/-shm à conserver)
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_path, path)
+        
+        self._last_seq = seq
+        self._apply_retention()
+        return self._describe(path)
+    
+    def _apply_retention(self):
+        """
+        Supprime les instantanés les plus anciens au-delà de la rétention.
+        Les instantanés périodiques et les autres (manuels, de sécurité) ont chacun la leur.
+        """
+        snapshots = self.list_backups()
+        periodic = [snapshot for snapshot in snapshots if snapshot['libelle'] == AUTO_LABEL]
+        labeled = [snapshot for snapshot in snapshots if snapshot['libelle'] != AUTO_LABEL]
+        
+        expired = periodic[self.retention:] + labeled[self.labeled_retention:]
+        if self.labeled_max_age_days is not None:
+            cutoff = datetime.now() - timedelta(days=self.labeled_max_age_days)
+            expired += [snapshot for snapshot in labeled[:self.labeled_retention]
+                        if datetime.strptime(snapshot['date'], '%Y-%m-%d %H:%M:%S') < cutoff]
+        for snapshot in expired:
+            os.remove(snapshot['chemin'])
+    
+    def _describe(self, path):
+        """Informations sur un instantané à partir de son nom de fichier."""
+        match = SNAPSHOT_PATTERN.match(os.path.basename(path))
+        created = time.strptime(match.group('date')[:15], '%Y%m%d-%H%M%S')
+        return {
+            'nom': os.path.basename(path),
+            'chemin': path,
+            'date': time.strftime('%Y-%m-%d %H:%M:%S', created),
+            'libelle': match.group('label'),
+            'taille': os.path.getsize(path),
+        }
+    
+    def list_backups(self):
+        """
+        Liste les instantanés de la base, du plus récent au plus ancien.
+        
+        Returns:
+            list: Dictionnaires {'nom', 'chemin', 'date', 'libelle', 'taille'}
+        """
+        if not os.path.isdir(self.backup_dir):
+            return []
+        snapshots = []
+        for filename in os.listdir(self.backup_dir):
+            match = SNAPSHOT_PATTERN.match(filename)
+            if match and match.group('base') == self.base_name:
+                snapshots.append((match.group('date'), os.path.join(self.backup_dir, filename)))
+        return [self._describe(path) for _, path in sorted(snapshots, reverse=True)]
+    
+    def restore(self, name, safety_backup=True):
+        """
+        Restaure un instantané dans la base en service.
+        Les employés sont remplacés en une transaction de l'écrivain ; le journal
+        des modifications continue sa séquence et reçoit un RESET (les sketches,
+        l'index de recherche et les copies analytiques se reconstruisent).
+        
+        Args:
+            name (str): Nom du fichier de l'instantané (voir list_backups)
+            safety_backup (bool): Sauvegarder l'état courant avant la restauration
+        
+        Returns:
+            int: Nombre d'employés restaurés
+        """
+        path = os.path.join(self.backup_dir, os.path.basename(name))
+        if not SNAPSHOT_PATTERN.match(os.path.basename(name)) or not os.path.exists(path):
+            raise ValueError(f"Instantané introuvable: {name}")
+        if safety_backup:
+            self.backup('avant-restauration').result()
+        count = self.db.writer.execute(self.db._restore_from, path, transactional=False)
+        
+        # Instantané antérieur à la colonne cle_recherche : remplissage par lots
+        self.db.backfill_derived_columns()
+        return count
+    
+    def start(self, interval=DEFAULT_BACKUP_INTERVAL):
+        """
+        Lance les sauvegardes périodiques (uniquement si les données ont changé).
+        
+        Args:
+            interval (float): Intervalle entre deux sauvegardes (secondes)
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), daemon=True,
+                                        name=f"backup-scheduler:{self.base_name}")
+        self._thread.start()
+    
+    def stop(self):
+        """Arrête les sauvegardes périodiques et attend la sauvegarde en cours."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=True)
+    
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                if self.db.get_change_seq() != self._last_seq:
+                    self.backup(AUTO_LABEL).result()
+            except Exception:
+                # Base fermée ou disque plein : nouvel essai au prochain intervalle
+                pass
@@ -1,5 +1,338 @@
+import json
 import sqlite3
+import threading
 import pandas as pd
+from models.writer import DatabaseWriter, BUSY_TIMEOUT
+from models.sketches import SalaryQuantileIndex
+from models.search import TrigramSearchIndex, DEFAULT_THRESHOLD, search_key
+from models.maintenance import MaintenanceScheduler
+from models.backup import BackupManager
+from models.storage import SQLiteStorage, create_analytics_backend
+
+# Colonnes métier de la table employees (liste blanche pour les projections et les tris)
+EMPLOYEE_COLUMNS = ['id', 'nom', 'email', 'telephone', 'departement', 'poste', 'salaire']
+
+# Regroupements autorisés pour les classements (index composites avec salaire)
+RANKING_GROUPS = ['departement', 'poste']
+
+# Colonnes modifiables par l'utilisateur
+EDITABLE_COLUMNS = ['nom', 'email', 'telephone', 'departement', 'poste', 'salaire']
+
+# Index secondaires : filtres d'export par département/poste, tranches de salaire,
+# pages de la liste triée par nom ou email (Gestion)
+EMPLOYEE_INDEXES = {
+    'idx_employees_departement_salaire': "CREATE INDEX IF NOT EXISTS idx_employees_departement_salaire ON employees(departement, salaire)",
+    'idx_employees_poste_salaire': "CREATE INDEX IF NOT EXISTS idx_employees_poste_salaire ON employees(poste, salaire)",
+    'idx_employees_salaire': "CREATE INDEX IF NOT EXISTS idx_employees_salaire ON employees(salaire)",
+    'idx_employees_nom': "CREATE INDEX IF NOT EXISTS idx_employees_nom ON employees(nom)",
+    'idx_employees_email': "CREATE INDEX IF NOT EXISTS idx_employees_email ON employees(email)",
+}
+
+# Colonnes dérivées, calculées à l'écriture (non exportées)
+DERIVED_COLUMNS = ['cle_recherche']
+
+# Colonnes sources de la clé de recherche normalisée
+SEARCH_KEY_SOURCES = ['nom', 'email']
+
+# Nombre de lignes traitées par transaction lors du remplissage des colonnes dérivées
+BACKFILL_BATCH_SIZE = 2000
+
+# Cache de pages (Kio) de l'écrivain pendant un chargement en masse
+BULK_LOAD_CACHE_KIB = 262144
+
+# Colonnes journalisées dans employee_changes (anciennes et nouvelles valeurs)
+LOGGED_COLUMNS = EDITABLE_COLUMNS + ['version']
+
+# Opération spéciale du journal : la table a changé en bloc (vidage, restauration...),
+# les consommateurs doivent recharger l'état complet au lieu d'appliquer des deltas
+RESET_OPERATION = 'RESET'
+
+def _change_log_triggers():
+    """
+    Génère les triggers qui alimentent employee_changes à chaque INSERT/UPDATE/DELETE.
+    Ils sont suspendus tant que change_log_pause contient une ligne ; la mise à
+    jour des seules colonnes dérivées (cle_recherche) n'est pas journalisée.
+    """
+    def json_values(prefix):
+        pairs = ', '.join(f"'{col}', {prefix}.{col}" for col in LOGGED_COLUMNS)
+        return f"json_object({pairs})"
+    
+    active = "WHEN NOT EXISTS (SELECT 1 FROM change_log_pause)"
+    return {
+        'trg_employees_insert': f"""
+            CREATE TRIGGER trg_employees_insert AFTER INSERT ON employees {active}
+            BEGIN
+                INSERT INTO employee_changes (operation, employee_id, old_values, new_values)
+                VALUES ('INSERT', NEW.id, NULL, {json_values('NEW')});
+            END""",
+        'trg_employees_update': f"""
+            CREATE TRIGGER trg_employees_update AFTER UPDATE OF {', '.join(LOGGED_COLUMNS)} ON employees {active}
+            BEGIN
+                INSERT INTO employee_changes (operation, employee_id, old_values, new_values)
+                VALUES ('UPDATE', NEW.id, {json_values('OLD')}, {json_values('NEW')});
+            END""",
+        'trg_employees_delete': f"""
+            CREATE TRIGGER trg_employees_delete AFTER DELETE ON employees {active}
+            BEGIN
+                INSERT INTO employee_changes (operation, employee_id, old_values, new_values)
+                VALUES ('DELETE', OLD.id, {json_values('OLD')}, NULL);
+            END""",
+    }
+
+def _describe_conflict(employee_id, original, current, changes):
+    """
+    Construit le diff champ par champ entre la ligne lue, la ligne actuelle
+    et les valeurs saisies (voir ConcurrentModificationError).
+    """
+    differences = {}
+    if current is not None:
+        for field in EDITABLE_COLUMNS:
+            if field in original and original[field] != current[field]:
+                differences[field] = {
+                    'lu': original[field],
+                    'actuel': current[field],
+                    'saisi': changes.get(field, original[field]),
+                    # Conflit réel : l'utilisateur a aussi modifié ce champ, différemment
+                    'conflit': field in changes and changes[field] != original[field]
+                                and changes[field] != current[field]
+                }
+    
+    return {
+        'id': employee_id,
+        'version_lue': original['version'],
+        'version_actuelle': current['version'] if current else None,
+        'differences': differences
+    }
+
+class _change_log_paused:
+    """
+    Suspend les triggers du journal le temps d'une opération en bloc
+    (à utiliser dans une transaction de l'écrivain, suivie de _log_reset).
+    """
+    
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def __enter__(self):
+        self.conn.execute("INSERT INTO change_log_pause (paused) VALUES (1)")
+        return self.conn
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.conn.execute("DELETE FROM change_log_pause")
+        return False
+
+def _log_reset(conn):
+    """Ajoute une entrée RESET au journal : les consommateurs doivent tout recharger."""
+    conn.execute(
+        "INSERT INTO employee_changes (operation, employee_id, old_values, new_values) VALUES (?, NULL, NULL, NULL)",
+        (RESET_OPERATION,)
+    )
+
+def _read_meta(conn, key):
+    """Lit une valeur de change_log_meta (None si absente)."""
+    row = conn.execute("SELECT value FROM change_log_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def _migration_base_schema(conn):
+    """
+    Schéma initial : employés, journal des modifications, sketches et index de recherche.
+    Idempotent : les bases créées avant le suivi de version en ont déjà une partie.
+    """
+    # Création de la table avec tous les champs nécessaires
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            email TEXT,
+            telephone TEXT,
+            departement TEXT,
+            poste TEXT,
+            salaire REAL,
+            version INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    
+    # Bases existantes : ajout de la colonne de version des lignes
+    existing_columns = [row[1] for row in conn.execute("PRAGMA table_info(employees)")]
+    if 'version' not in existing_columns:
+        conn.execute("ALTER TABLE employees ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    
+    # Index utilisés par les requêtes filtrées (export, statistiques)
+    for index_sql in EMPLOYEE_INDEXES.values():
+        conn.execute(index_sql)
+    
+    # Journal des modifications (append-only) et son interrupteur
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS employee_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            operation TEXT NOT NULL,
+            employee_id INTEGER,
+            old_values TEXT,
+            new_values TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS change_log_pause (paused INTEGER)")
+    conn.execute("CREATE TABLE IF NOT EXISTS change_log_meta (key TEXT PRIMARY KEY, value INTEGER)")
+    
+    # Sketches de quantiles des salaires (voir models/sketches.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS salary_sketch_buckets (
+            scope TEXT NOT NULL,
+            grp TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (scope, grp, bucket)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS salary_sketch_totals (
+            scope TEXT NOT NULL,
+            grp TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            PRIMARY KEY (scope, grp)
+        ) WITHOUT ROWID
+    """)
+    
+    # Index trigrammes de la recherche (voir models/search.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_trigrams (
+            trigram TEXT NOT NULL,
+            employee_id INTEGER NOT NULL,
+            PRIMARY KEY (trigram, employee_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_trigram_counts (
+            trigram TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_keys (
+            employee_id INTEGER PRIMARY KEY,
+            cle TEXT NOT NULL,
+            nb_trigrams INTEGER NOT NULL
+        )
+    """)
+
+def _migration_search_key_column(conn):
+    """Ajoute la colonne dérivée cle_recherche (nom et email normalisés, remplie par lots)."""
+    existing_columns = [row[1] for row in conn.execute("PRAGMA table_info(employees)")]
+    if 'cle_recherche' not in existing_columns:
+        conn.execute("ALTER TABLE employees ADD COLUMN cle_recherche TEXT")
+
+def _migration_typed_employees(conn):
+    """
+    Reconstruit employees avec des colonnes typées (STRICT si SQLite >= 3.37) :
+    les salaires non numériques hérités du typage souple deviennent NULL.
+    """
+    strict = " STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else ""
+    conn.execute(f"""
+        CREATE TABLE employees_typed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            email TEXT,
+            telephone TEXT,
+            departement TEXT,
+            poste TEXT,
+            salaire REAL,
+            version INTEGER NOT NULL DEFAULT 1 CHECK (version >= 1),
+            cle_recherche TEXT
+        ){strict}
+    """)
+    conn.execute("""
+        INSERT INTO employees_typed (id, nom, email, telephone, departement, poste, salaire, version, cle_recherche)
+        SELECT id, CAST(nom AS TEXT), CAST(email AS TEXT), CAST(telephone AS TEXT),
+               CAST(departement AS TEXT), CAST(poste AS TEXT),
+               CASE WHEN typeof(salaire) IN ('integer', 'real') THEN salaire END,
+               MAX(COALESCE(version, 1), 1), cle_recherche
+        FROM employees
+    """)
+    
+    # Les IDs ne doivent pas être réattribués : on conserve le compteur AUTOINCREMENT
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'employees'").fetchone()
+    conn.execute("DROP TABLE employees")
+    conn.execute("ALTER TABLE employees_typed RENAME TO employees")
+    if row:
+        conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'employees'", (row[0],)
+        )
+        conn.execute(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'employees', ? "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'employees')",
+            (row[0],)
+        )
+    
+    for index_sql in EMPLOYEE_INDEXES.values():
+        conn.execute(index_sql)
+
+def _migration_maintenance_runs(conn):
+    """Ajoute le journal des exécutions de maintenance (voir models/maintenance.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            churn INTEGER NOT NULL,
+            duration_ms REAL NOT NULL,
+            steps TEXT NOT NULL,
+            size_before INTEGER,
+            size_after INTEGER,
+            free_pages_before INTEGER,
+            free_pages_after INTEGER
+        )
+    """)
+
+def _migration_ingested_files(conn):
+    """Ajoute le registre des fichiers ingérés depuis un dossier de dépôt (voir controllers/ingestion.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            sha256 TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            ingested_at TEXT NOT NULL,
+            imported INTEGER NOT NULL,
+            duration_ms REAL NOT NULL
+        )
+    """)
+
+def _migration_listing_indexes(conn):
+    """Ajoute les index de tri par nom et par email (pages de la liste des employés)."""
+    for name in ('idx_employees_nom', 'idx_employees_email'):
+        conn.execute(EMPLOYEE_INDEXES[name])
+
+# Migrations du schéma, appliquées dans l'ordre au démarrage (version dans PRAGMA user_version).
+# Une migration publiée ne doit plus être modifiée : toute évolution ajoute une nouvelle entrée.
+SCHEMA_MIGRATIONS = [
+    (1, "Schéma initial (employés, journal, sketches, index de recherche)", _migration_base_schema),
+    (2, "Colonne dérivée cle_recherche", _migration_search_key_column),
+    (3, "Table employees typée", _migration_typed_employees),
+    (4, "Journal des maintenances", _migration_maintenance_runs),
+    (5, "Registre des fichiers ingérés", _migration_ingested_files),
+    (6, "Index de tri par nom et email", _migration_listing_indexes),
+]
+
+# Version du schéma attendue par le code
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+class ConcurrentModificationError(Exception):
+    """
+    Levée quand une modification porte sur une version périmée d'un employé.
+    
+    Attributes:
+        conflicts (list): Un dictionnaire par employé en conflit :
+            - 'id': ID de l'employé
+            - 'version_lue' / 'version_actuelle': versions attendue et trouvée
+              ('version_actuelle' vaut None si l'employé a été supprimé)
+            - 'differences': {champ: {'lu', 'actuel', 'saisi', 'conflit'}} pour
+              chaque champ modifié par ailleurs depuis la lecture
+    """
+    
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        ids = ', '.join(str(conflict['id']) for conflict in conflicts)
+        super().__init__(f"Employé(s) modifié(s) entre-temps par un autre utilisateur : {ids}")
 
 class EmployeeDatabase:
     """
@@ -7,63 +340,287 @@ class EmployeeDatabase:
     Implémente les opérations CRUD (Create, Read, Update, Delete).
     """
     
-    def __init__(self, db_path="employees.db"):
+    def __init__(self, db_path="employees.db", analytics_backend=None):
         """
         Initialise la connexion à la base de données.
+        Les écritures passent par l'écrivain unique partagé du fichier
+        (voir models/writer.py) ; les lectures passent par un moteur de
+        stockage (voir models/storage.py) : SQLite pour les lectures
+        ponctuelles, moteur configurable pour les parcours analytiques.
         
         Args:
             db_path (str): Chemin vers le fichier de base de données SQLite
+            analytics_backend (str): 'sqlite', 'duckdb' ou 'memory' (réplique en
+                mémoire ; par défaut : variable d'environnement EDM_ANALYTICS_BACKEND, sinon 'sqlite')
         """
         self.db_path = db_path
-        self.init_db()
+        self.writer = DatabaseWriter.for_path(db_path)
+        try:
+            self.init_db()
+        except BaseException:
+            # Base refusée (version plus récente...) : l'écrivain partagé n'est pas gardé
+            self.writer.release()
+            raise
+        
+        # Lectures internes (journal, index de recherche), lectures analytiques,
+        # puis fiches et classements : réplique en mémoire si configurée (elle a les index)
+        self.storage = SQLiteStorage(db_path)
+        self.analytics = create_analytics_backend(analytics_backend, self)
+        self.reads = self.analytics if self.analytics.indexed else self.storage
+        
+        # Quantiles de salaire maintenus à partir du journal des modifications
+        self.salary_quantiles = SalaryQuantileIndex(self)
+        
+        # Index trigrammes des noms et emails, maintenu de la même façon
+        self.search_index = TrigramSearchIndex(self)
+        
+        # Maintenance (statistiques, VACUUM, checkpoint) selon le volume de modifications
+        self.maintenance = MaintenanceScheduler(self)
+        
+        # Instantanés à chaud (backups/<base>/ à côté du fichier)
+        self.backups = BackupManager(self)
+    
+    def _connect(self):
+        """
+        Ouvre une connexion de lecture avec délai d'attente sur les verrous.
+        
+        Returns:
+            sqlite3.Connection: Connexion à fermer par l'appelant
+        """
+        return sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
     
     def init_db(self):
         """
         Crée la table employees si elle n'existe pas.
         Structure: id, nom, email, telephone, departement, poste, salaire
         """
-        # Connexion à la base SQLite
-        conn = sqlite3.connect(self.db_path)
-        
-        # Création de la table avec tous les champs nécessaires
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS employees (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT NOT NULL,
-                email TEXT,
-                telephone TEXT,
-                departement TEXT,
-                poste TEXT,
-                salaire REAL
-            )
-        """)
+        # Mode WAL : les lectures ne bloquent pas l'écrivain (hors transaction)
+        self.writer.execute(self._enable_wal, transactional=False)
         
-        # Validation des changements
-        conn.commit()
-        conn.close()
+        # Migrations du schéma par l'écrivain unique, une transaction par migration
+        for version, description, migration in SCHEMA_MIGRATIONS:
+            if self.writer.execute(self._apply_migration, version, migration):
+                print(f"Migration {version} appliquée : {description}")
+        self.writer.execute(self._create_triggers)
+        
+        # Colonnes dérivées manquantes (lignes antérieures à une migration) :
+        # remplissage en tâche de fond par petites transactions, l'application reste utilisable
+        if self._needs_backfill():
+            threading.Thread(target=self._run_backfill, daemon=True,
+                             name=f"backfill:{self.db_path}").start()
         print("Base de données initialisée avec succès")
     
-    def insert_from_dataframe(self, df):
+    def _enable_wal(self, conn):
+        """Active la journalisation WAL (persistante dans le fichier)."""
+        # Nouvelle base : pages libres récupérables par VACUUM incrémental (sans effet sur une base existante)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+    
+    def get_schema_version(self):
+        """
+        Retourne la version du schéma de la base (PRAGMA user_version).
+        
+        Returns:
+            int: Dernière migration appliquée
+        """
+        return self.storage.fetchone("PRAGMA user_version")[0]
+    
+    def _apply_migration(self, conn, version, migration):
+        """
+        Applique une migration si la base ne l'a pas encore reçue (exécuté par l'écrivain).
+        La migration et la nouvelle version sont validées dans la même transaction.
+        
+        Returns:
+            bool: True si la migration a été appliquée
+        """
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        if current > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"Base en version {current}, plus récente que l'application (version {SCHEMA_VERSION})"
+            )
+        if current >= version:
+            return False
+        migration(conn)
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+        return True
+    
+    def _create_triggers(self, conn):
+        """Recrée les triggers du journal (ils suivent la liste des colonnes journalisées)."""
+        for name, trigger_sql in _change_log_triggers().items():
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(trigger_sql)
+    
+    def _needs_backfill(self):
+        """Indique si des lignes n'ont pas encore leurs colonnes dérivées."""
+        conn = self._connect()
+        row = conn.execute("SELECT 1 FROM employees WHERE cle_recherche IS NULL LIMIT 1").fetchone()
+        conn.close()
+        return row is not None
+    
+    def backfill_derived_columns(self, batch_size=BACKFILL_BATCH_SIZE):
+        """
+        Calcule les colonnes dérivées manquantes par lots, une courte transaction
+        par lot : les écritures des utilisateurs s'intercalent entre les lots.
+        
+        Args:
+            batch_size (int): Nombre de lignes par transaction
+            
+        Returns:
+            int: Nombre de lignes complétées
+        """
+        total = 0
+        last_id = 0
+        while True:
+            count, last_id = self.writer.execute(self._backfill_batch, last_id, batch_size)
+            total += count
+            if last_id is None:
+                return total
+    
+    def _run_backfill(self):
+        """Remplissage en tâche de fond (interrompu si la base est fermée)."""
+        try:
+            self.backfill_derived_columns()
+        except RuntimeError:
+            pass
+    
+    def _backfill_batch(self, conn, after_id, batch_size):
+        """
+        Complète un lot de lignes après after_id, dans l'ordre des IDs (exécuté par l'écrivain).
+        
+        Returns:
+            tuple: (lignes complétées, dernier ID traité ou None si terminé)
+        """
+        rows = conn.execute(
+            "SELECT id, nom, email FROM employees WHERE id > ? AND cle_recherche IS NULL ORDER BY id LIMIT ?",
+            (after_id, batch_size)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE employees SET cle_recherche = ? WHERE id = ?",
+            [(search_key(nom, email), employee_id) for employee_id, nom, email in rows]
+        )
+        return len(rows), (rows[-1][0] if len(rows) == batch_size else None)
+    
+    def _refresh_search_keys(self, conn, employee_ids):
+        """Recalcule cle_recherche après une modification du nom ou de l'email (non journalisé)."""
+        placeholders = ', '.join('?' for _ in employee_ids)
+        rows = conn.execute(
+            f"SELECT id, nom, email FROM employees WHERE id IN ({placeholders})", list(employee_ids)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE employees SET cle_recherche = ? WHERE id = ?",
+            [(search_key(nom, email), employee_id) for employee_id, nom, email in rows]
+        )
+    
+    def insert_from_dataframe(self, df, on_insert=None):
         """
         Insère les données d'un DataFrame pandas dans la table employees.
         
         Args:
             df (pandas.DataFrame): DataFrame contenant les données à insérer
-            
+            on_insert (callable): Fonction on_insert(conn, nombre de lignes) exécutée
+                dans la même transaction que l'insertion (registre d'ingestion...)
+        
         Returns:
             int: Nombre de lignes insérées
         """
-        # Connexion à la base
-        conn = sqlite3.connect(self.db_path)
+        columns, rows = self._dataframe_rows(df)
         
-        # Insertion en masse via pandas (append = ajouter aux données existantes)
-        df.to_sql('employees', conn, if_exists='append', index=False)
+        # Insertion en masse par l'écrivain (une seule transaction)
+        return self.writer.execute(self._insert_rows, columns, rows, on_insert)
+    
+    def _dataframe_rows(self, df):
+        """Colonnes connues d'un DataFrame et lignes en valeurs Python (NaN -> None) pour sqlite3."""
+        columns = [col for col in df.columns if col in EMPLOYEE_COLUMNS + DERIVED_COLUMNS]
+        values = df[columns].astype(object).where(pd.notnull(df[columns]), None)
+        return columns, list(values.itertuples(index=False, name=None))
+    
+    def bulk_load(self, df, on_insert=None):
+        """
+        Chargement en masse pour les très gros imports.
+        Les index secondaires et les triggers du journal sont supprimés le temps
+        du chargement, l'écriture n'attend pas le disque (synchronous = OFF) et
+        dispose d'un grand cache ; les index sont ensuite reconstruits par tri
+        et le journal reçoit un seul RESET. Tout est fait dans une transaction :
+        en cas d'échec, la table, ses index et ses triggers sont restaurés.
         
-        # Validation et fermeture
-        conn.commit()
-        conn.close()
+        Args:
+            df (pandas.DataFrame): DataFrame contenant les données à insérer
+            on_insert (callable): Fonction on_insert(conn, nombre de lignes) exécutée
+                dans la transaction du chargement, avant le COMMIT
         
-        return len(df)
+        Returns:
+            int: Nombre de lignes insérées
+        """
+        columns, rows = self._dataframe_rows(df)
+        count = self.writer.execute(self._bulk_insert, columns, rows, on_insert, transactional=False)
+        
+        # Sketches reconstruits d'une traite (le RESET impose une lecture complète) ;
+        # l'index de recherche se reconstruit par lots en tâche de fond
+        self.salary_quantiles.refresh()
+        self.search_index.refresh_in_background()
+        return count
+    
+    def _bulk_insert(self, conn, columns, rows, on_insert=None):
+        """
+        Insère des lignes sans index ni triggers (exécuté par l'écrivain, hors lot :
+        les PRAGMA de durabilité ne peuvent pas changer dans une transaction).
+        """
+        settings = {
+            pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in ('synchronous', 'cache_size', 'temp_store')
+        }
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(f"PRAGMA cache_size = {-BULK_LOAD_CACHE_KIB}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # DDL transactionnel : un ROLLBACK restaure index et triggers
+                for name in _change_log_triggers():
+                    conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                for name in EMPLOYEE_INDEXES:
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+                
+                count = self._insert_rows(conn, columns, rows)
+                
+                # Reconstruction des index par tri, plus rapide qu'une insertion ligne à ligne
+                for index_sql in EMPLOYEE_INDEXES.values():
+                    conn.execute(index_sql)
+                self._create_triggers(conn)
+                _log_reset(conn)
+                if on_insert is not None:
+                    on_insert(conn, count)
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        finally:
+            for pragma, value in settings.items():
+                conn.execute(f"PRAGMA {pragma} = {int(value)}")
+        
+        # Durabilité rétablie : le WAL écrit sans synchronisation est reporté sur disque
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        return count
+    
+    def _insert_rows(self, conn, columns, rows, on_insert=None):
+        """Insère des lignes dans employees (exécuté par l'écrivain)."""
+        # Clé de recherche calculée ici si l'appelant ne l'a pas fournie
+        if 'cle_recherche' not in columns:
+            positions = [columns.index(col) if col in columns else None for col in SEARCH_KEY_SOURCES]
+            rows = [
+                row + (search_key(*(row[i] if i is not None else None for i in positions)),)
+                for row in rows
+            ]
+            columns = list(columns) + ['cle_recherche']
+        placeholders = ', '.join('?' for _ in columns)
+        conn.executemany(
+            f"INSERT INTO employees ({', '.join(columns)}) VALUES ({placeholders})",
+            rows
+        )
+        if on_insert is not None:
+            on_insert(conn, len(rows))
+        return len(rows)
     
     def get_all_data(self):
         """
@@ -72,12 +629,415 @@ class EmployeeDatabase:
         Returns:
             pandas.DataFrame: DataFrame contenant tous les employés
         """
-        # Connexion et requête SELECT
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query("SELECT * FROM employees", conn)
-        conn.close()
+        return self.analytics.read_sql(f"SELECT {', '.join(EMPLOYEE_COLUMNS)} FROM employees")
+    
+    def build_filtered_query(self, filters=None, columns=None, sort_by=None, ascending=True):
+        """
+        Compile des filtres, une projection et un tri en requête SQL paramétrée.
+        Les filtres sur département, poste et salaire s'appuient sur les index.
+        
+        Args:
+            filters (dict): Filtres optionnels :
+                - 'departement' (list): départements à inclure
+                - 'poste' (list): postes à inclure
+                - 'salaire_min' / 'salaire_max' (float): bornes de salaire incluses
+                - 'recherche' (str): texte recherché dans le nom ou l'email
+            columns (list): Colonnes à sélectionner (toutes par défaut)
+            sort_by (str): Colonne de tri (aucun tri si None)
+            ascending (bool): Ordre croissant si True
+            
+        Returns:
+            tuple: (requête SQL, paramètres, colonnes sélectionnées)
+        """
+        filters = filters or {}
+        
+        # Projection : uniquement des colonnes connues (évite l'injection SQL)
+        columns = [col for col in (columns or EMPLOYEE_COLUMNS) if col in EMPLOYEE_COLUMNS]
+        if not columns:
+            raise ValueError("Aucune colonne valide sélectionnée")
+        
+        # Construction des clauses WHERE avec paramètres
+        clauses = []
+        params = []
+        for field in ['departement', 'poste']:
+            values = filters.get(field)
+            if values:
+                clauses.append(f"{field} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+        
+        if filters.get('salaire_min') is not None:
+            clauses.append("salaire >= ?")
+            params.append(filters['salaire_min'])
+        if filters.get('salaire_max') is not None:
+            clauses.append("salaire <= ?")
+            params.append(filters['salaire_max'])
+        
+        search_term = (filters.get('recherche') or '').strip()
+        if search_term:
+            # Échappement des jokers LIKE saisis par l'utilisateur
+            escaped = search_term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("(nom LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\')")
+            params.extend([f"%{escaped}%", f"%{escaped}%"])
+        
+        sql = f"SELECT {', '.join(columns)} FROM employees"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        
+        # Tri sur une colonne connue uniquement
+        if sort_by:
+            if sort_by not in EMPLOYEE_COLUMNS:
+                raise ValueError(f"Colonne de tri inconnue: {sort_by}")
+            sql += f" ORDER BY {sort_by} {'ASC' if ascending else 'DESC'}"
+        
+        return sql, params, columns
+    
+    def iter_filtered_rows(self, filters=None, columns=None, sort_by=None, ascending=True, batch_size=5000):
+        """
+        Parcourt les lignes filtrées par lots, sans charger toute la table en mémoire.
+        
+        Args:
+            filters, columns, sort_by, ascending: voir build_filtered_query
+            batch_size (int): Nombre de lignes lues par lot
+            
+        Yields:
+            list: Lot de tuples (une ligne par tuple, dans l'ordre des colonnes)
+        """
+        sql, params, _ = self.build_filtered_query(filters, columns, sort_by, ascending)
+        yield from self.analytics.iter_batches(sql, params, batch_size)
+    
+    def get_filtered_data(self, filters=None, columns=None, sort_by=None, ascending=True, limit=None, offset=None):
+        """
+        Récupère les lignes filtrées sous forme de DataFrame (aperçu de l'export, pages de la liste).
+        
+        Args:
+            filters, columns, sort_by, ascending: voir build_filtered_query
+            limit (int): Nombre maximum de lignes retournées
+            offset (int): Nombre de lignes sautées (avec limit : page de résultats)
+            
+        Returns:
+            pandas.DataFrame: Lignes correspondant aux filtres
+        """
+        sql, params, _ = self.build_filtered_query(filters, columns, sort_by, ascending)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+            if offset:
+                sql += " OFFSET ?"
+                params.append(int(offset))
+        
+        return self.analytics.read_sql(sql, params)
+    
+    def count_filtered(self, filters=None):
+        """
+        Compte les employés correspondant aux filtres.
+        
+        Args:
+            filters (dict): Voir build_filtered_query
+            
+        Returns:
+            int: Nombre de lignes correspondantes
+        """
+        sql, params, _ = self.build_filtered_query(filters, ['id'])
+        
+        return self.analytics.fetchone(f"SELECT COUNT(*) FROM ({sql})", params)[0]
+    
+    def get_distinct_values(self, column):
+        """
+        Retourne les valeurs distinctes (non nulles) d'une colonne, triées.
+        
+        Args:
+            column (str): Nom de la colonne (departement, poste...)
+            
+        Returns:
+            list: Valeurs distinctes
+        """
+        if column not in EMPLOYEE_COLUMNS:
+            raise ValueError(f"Colonne inconnue: {column}")
+        
+        rows = self.analytics.fetchall(
+            f"SELECT DISTINCT {column} FROM employees WHERE {column} IS NOT NULL ORDER BY {column}"
+        )
+        return [row[0] for row in rows]
+    
+    def get_salary_range(self):
+        """
+        Retourne le salaire minimum et maximum (lecture de l'index sur salaire).
+        
+        Returns:
+            tuple: (salaire_min, salaire_max), (None, None) si la table est vide
+        """
+        # Deux sous-requêtes : SQLite n'optimise MIN/MAX par l'index qu'un agrégat à la fois
+        return self.reads.fetchone(
+            "SELECT (SELECT MIN(salaire) FROM employees), (SELECT MAX(salaire) FROM employees)"
+        )
+    
+    def get_salary_summary(self):
+        """
+        Calcule les indicateurs de salaire en SQL, sans charger la table.
+        
+        Returns:
+            dict: total, moyenne, min, max, nombre de départements et de postes
+        """
+        total, mean, minimum, maximum, departements, postes = self.analytics.fetchone("""
+            SELECT
+                (SELECT COUNT(*) FROM employees),
+                (SELECT AVG(salaire) FROM employees),
+                (SELECT MIN(salaire) FROM employees),
+                (SELECT MAX(salaire) FROM employees),
+                (SELECT COUNT(DISTINCT departement) FROM employees),
+                (SELECT COUNT(DISTINCT poste) FROM employees)
+        """)
+        
+        return {
+            'total_employes': total,
+            'salaire_moyen': mean or 0,
+            'salaire_min': minimum or 0,
+            'salaire_max': maximum or 0,
+            'nombre_departements': departements,
+            'nombre_postes': postes
+        }
+    
+    def get_partial_aggregates(self, dimensions):
+        """
+        Agrégats partiels (effectif, nombre/somme/max/min des salaires) au grain
+        des dimensions données, en une seule requête GROUP BY.
+        Utilisé par le moteur d'agrégation (models/aggregation.py).
+        
+        Args:
+            dimensions (list): Colonnes de regroupement (departement, poste)
+            
+        Returns:
+            pandas.DataFrame: Une ligne par combinaison de dimensions
+        """
+        unknown = [dim for dim in dimensions if dim not in RANKING_GROUPS]
+        if unknown:
+            raise ValueError(f"Dimension inconnue: {', '.join(unknown)}")
+        
+        select_dims = ''.join(f"{dim}, " for dim in dimensions)
+        sql = (f"SELECT {select_dims}COUNT(*) AS effectif, COUNT(salaire) AS nb_salaires, "
+               f"COALESCE(SUM(salaire), 0) AS salaire_somme, MAX(salaire) AS salaire_max, "
+               f"MIN(salaire) AS salaire_min FROM employees")
+        if dimensions:
+            sql += f" GROUP BY {', '.join(dimensions)}"
+        
+        return self.analytics.read_sql(sql)
+    
+    def search_employees(self, query, limit=20, threshold=DEFAULT_THRESHOLD, columns=None):
+        """
+        Recherche approximative par nom ou email, tolérante aux accents et aux fautes de frappe.
+        
+        Args:
+            query (str): Texte saisi
+            limit (int): Nombre maximum de résultats
+            threshold (float): Similarité minimale entre 0 et 1
+            columns (list): Colonnes retournées (toutes par défaut)
+            
+        Returns:
+            pandas.DataFrame: Employés trouvés avec leur 'score', par pertinence décroissante
+        """
+        return self.search_index.search(query, limit, threshold, columns)
+    
+    def get_salary_quantiles(self, qs=(0.1, 0.25, 0.5, 0.75, 0.9), scope='global', group=None):
+        """
+        Estime des quantiles de salaire (erreur relative <= 1 %) en temps constant.
+        
+        Args:
+            qs (tuple): Quantiles demandés entre 0 et 1
+            scope (str): 'global', 'departement' ou 'poste'
+            group (str): Département ou poste (portées non globales)
+            
+        Returns:
+            dict: {q: salaire estimé ou None}
+        """
+        return self.salary_quantiles.quantiles(qs, scope, group)
+    
+    def get_group_salary_quantiles(self, scope, qs=(0.25, 0.5, 0.75)):
+        """
+        Estime des quantiles de salaire pour chaque département ou poste.
+        
+        Args:
+            scope (str): 'departement' ou 'poste'
+            qs (tuple): Quantiles demandés
+            
+        Returns:
+            dict: {groupe: {'effectif': int, q: salaire estimé}}
+        """
+        return self.salary_quantiles.group_quantiles(scope, qs)
+    
+    def get_top_salaries(self, n=10, columns=None, group_by=None):
+        """
+        Retourne les N plus hauts salaires, au global ou par groupe.
+        Lecture dans l'ordre de l'index sur salaire (ou departement/poste, salaire) :
+        seules N lignes par groupe sont lues, quelle que soit la taille de la table.
+        
+        Args:
+            n (int): Nombre de lignes par groupe
+            columns (list): Colonnes retournées (toutes par défaut)
+            group_by (str): None, 'departement' ou 'poste'
+            
+        Returns:
+            pandas.DataFrame: Lignes triées par salaire décroissant (par groupe)
+        """
+        columns = [col for col in (columns or EMPLOYEE_COLUMNS) if col in EMPLOYEE_COLUMNS]
+        select = f"SELECT {', '.join(columns)} FROM employees"
+        
+        if group_by is None:
+            return self.reads.read_sql(
+                f"{select} WHERE salaire IS NOT NULL ORDER BY salaire DESC LIMIT ?", [int(n)]
+            )
+        
+        if group_by not in RANKING_GROUPS:
+            raise ValueError(f"Regroupement inconnu: {group_by}")
+        # Une requête LIMIT N par groupe, chacune servie par l'index composite
+        groups = [row[0] for row in self.reads.fetchall(
+            f"SELECT DISTINCT {group_by} FROM employees WHERE {group_by} IS NOT NULL ORDER BY {group_by}"
+        )]
+        frames = [
+            self.reads.read_sql(
+                f"{select} WHERE {group_by} = ? AND salaire IS NOT NULL ORDER BY salaire DESC LIMIT ?",
+                [group, int(n)]
+            )
+            for group in groups
+        ]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    
+    def get_employee_rank(self, employee_id, group_by=None):
+        """
+        Retourne le rang salarial d'un employé (1 = salaire le plus élevé).
+        Les ex aequo partagent le même rang.
+        
+        Args:
+            employee_id (int): ID de l'employé
+            group_by (str): None pour le rang global, 'departement' ou 'poste'
+                pour le rang au sein de son groupe
+                
+        Returns:
+            int: Rang de l'employé, None s'il n'existe pas ou n'a pas de salaire
+        """
+        if group_by is not None and group_by not in RANKING_GROUPS:
+            raise ValueError(f"Regroupement inconnu: {group_by}")
+        
+        row = self.reads.fetchone(
+            f"SELECT salaire{', ' + group_by if group_by else ''} FROM employees WHERE id = ?", [employee_id]
+        )
+        if row is None or row[0] is None:
+            return None
+        
+        # Comptage sur l'intervalle de l'index au-dessus du salaire de l'employé
+        if group_by:
+            return self.reads.fetchone(
+                f"SELECT 1 + COUNT(*) FROM employees WHERE {group_by} IS ? AND salaire > ?", [row[1], row[0]]
+            )[0]
+        return self.reads.fetchone("SELECT 1 + COUNT(*) FROM employees WHERE salaire > ?", [row[0]])[0]
+    
+    def get_salary_at_rank(self, rank, group_by=None, group=None):
+        """
+        Retourne le salaire occupant un rang donné (1 = salaire le plus élevé).
+        
+        Args:
+            rank (int): Rang recherché (à partir de 1)
+            group_by (str): None, 'departement' ou 'poste'
+            group (str): Groupe dans lequel chercher (si group_by est fourni)
+            
+        Returns:
+            float: Salaire à ce rang, None si le rang dépasse l'effectif
+        """
+        if rank < 1:
+            raise ValueError("Le rang commence à 1")
+        
+        sql = "SELECT salaire FROM employees WHERE salaire IS NOT NULL"
+        params = []
+        if group_by is not None:
+            if group_by not in RANKING_GROUPS:
+                raise ValueError(f"Regroupement inconnu: {group_by}")
+            sql += f" AND {group_by} = ?"
+            params.append(group)
+        sql += " ORDER BY salaire DESC LIMIT 1 OFFSET ?"
+        params.append(int(rank) - 1)
+        
+        row = self.reads.fetchone(sql, params)
+        return row[0] if row else None
+    
+    def get_salary_curve(self, points=200):
+        """
+        Courbe salaire par rang croissant, pour le graphique de progression.
+        Jusqu'à `points` employés, les salaires sont lus dans l'ordre de l'index ;
+        au-delà, la courbe est échantillonnée à partir des sketches de quantiles.
+        
+        Args:
+            points (int): Nombre maximum de points de la courbe
+            
+        Returns:
+            pandas.DataFrame: Colonnes 'rang' et 'salaire'
+        """
+        # Effectif tenu à jour par le sketch global (pas de COUNT sur toute la table)
+        count = self.salary_quantiles.count()
+        if count <= points:
+            df = self.reads.read_sql(
+                "SELECT salaire FROM employees WHERE salaire IS NOT NULL ORDER BY salaire"
+            )
+            df.insert(0, 'rang', range(1, len(df) + 1))
+            return df
+        
+        # Rangs régulièrement espacés, salaires estimés par le sketch global
+        ranks = sorted({round(i * (count - 1) / (points - 1)) for i in range(points)})
+        quantiles = self.get_salary_quantiles(tuple(rank / (count - 1) for rank in ranks))
+        return pd.DataFrame({
+            'rang': [rank + 1 for rank in ranks],
+            'salaire': [quantiles[rank / (count - 1)] for rank in ranks]
+        })
+    
+    def get_salary_sample(self, columns=('salaire', 'departement', 'poste'), max_rows=2000):
+        """
+        Échantillon régulier des employés avec salaire (un sur k dans l'ordre des IDs),
+        pour les nuages de points : la table n'est jamais chargée en entier.
+        
+        Args:
+            columns (tuple): Colonnes retournées
+            max_rows (int): Nombre maximum de lignes
+            
+        Returns:
+            pandas.DataFrame: Lignes échantillonnées, dans l'ordre des IDs
+        """
+        unknown = [col for col in columns if col not in EMPLOYEE_COLUMNS]
+        if unknown:
+            raise ValueError(f"Colonne(s) inconnue(s): {', '.join(unknown)}")
+        
+        # Effectif tenu à jour par le sketch global (pas de COUNT sur toute la table)
+        step = max(1, -(-self.salary_quantiles.count() // max_rows))
+        sql = f"SELECT {', '.join(columns)} FROM employees WHERE salaire IS NOT NULL"
+        params = []
+        if step > 1:
+            sql += " AND id % ? = 0"
+            params.append(step)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(int(max_rows))
+        return self.reads.read_sql(sql, params)
+    
+    def get_salary_histogram(self, bins=10):
+        """
+        Histogramme des salaires en tranches de même largeur, compté en SQL.
+        
+        Args:
+            bins (int): Nombre de tranches
+            
+        Returns:
+            pandas.DataFrame: Colonnes 'debut', 'fin' et 'effectif' (une ligne par tranche non vide)
+        """
+        minimum, maximum = self.get_salary_range()
+        if minimum is None:
+            return pd.DataFrame(columns=['debut', 'fin', 'effectif'])
         
-        return df
+        # Tous les salaires égaux : une seule tranche
+        width = (maximum - minimum) / bins or 1.0
+        df = self.reads.read_sql(
+            "SELECT MIN(CAST((salaire - ?) / ? AS INTEGER), ?) AS tranche, COUNT(*) AS effectif "
+            "FROM employees WHERE salaire IS NOT NULL GROUP BY tranche ORDER BY tranche",
+            [minimum, width, bins - 1]
+        )
+        df.insert(0, 'debut', minimum + df['tranche'] * width)
+        df.insert(1, 'fin', df['debut'] + width)
+        return df.drop(columns='tranche')
     
     def update_employee(self, employee_id, field, new_value):
         """
@@ -88,42 +1048,307 @@ class EmployeeDatabase:
             field (str): Nom du champ à modifier (nom, email, telephone, etc.)
             new_value: Nouvelle valeur à assigner
         """
-        # Connexion à la base
-        conn = sqlite3.connect(self.db_path)
+        if field not in EMPLOYEE_COLUMNS or field == 'id':
+            raise ValueError(f"Champ inconnu: {field}")
         
-        # Requête UPDATE sécurisée avec paramètres (évite l'injection SQL)
-        conn.execute(f"UPDATE employees SET {field} = ? WHERE id = ?", (new_value, employee_id))
+        # Requête UPDATE sécurisée avec paramètres, exécutée par l'écrivain
+        self.writer.execute(self._update_field, employee_id, field, new_value)
+    
+    def _update_field(self, conn, employee_id, field, new_value):
+        """Met à jour un champ d'un employé (exécuté par l'écrivain)."""
+        conn.execute(
+            f"UPDATE employees SET {field} = ?, version = version + 1 WHERE id = ?",
+            (new_value, employee_id)
+        )
+        if field in SEARCH_KEY_SOURCES:
+            self._refresh_search_keys(conn, [employee_id])
+    
+    def get_employee(self, employee_id):
+        """
+        Récupère un employé et la version de sa ligne.
         
-        # Validation et fermeture
-        conn.commit()
-        conn.close()
+        Args:
+            employee_id (int): ID de l'employé
+            
+        Returns:
+            dict: Champs de l'employé (dont 'version'), None s'il n'existe pas
+        """
+        columns = EMPLOYEE_COLUMNS + ['version']
+        row = self.reads.fetchone(f"SELECT {', '.join(columns)} FROM employees WHERE id = ?", [employee_id])
+        return dict(zip(columns, row)) if row else None
     
-    def delete_employee(self, employee_id):
+    def _fetch_employee(self, conn, employee_id):
+        """Lit un employé sous forme de dictionnaire sur une connexion donnée."""
+        columns = EMPLOYEE_COLUMNS + ['version']
+        cursor = conn.execute(f"SELECT {', '.join(columns)} FROM employees WHERE id = ?", (employee_id,))
+        row = cursor.fetchone()
+        return dict(zip(columns, row)) if row else None
+    
+    def update_employee_checked(self, employee_id, changes, original):
+        """
+        Met à jour un employé seulement s'il n'a pas changé depuis sa lecture
+        (contrôle de concurrence optimiste, sans verrou).
+        
+        Args:
+            employee_id (int): ID de l'employé à modifier
+            changes (dict): Nouvelles valeurs {champ: valeur}
+            original (dict): Ligne lue avant modification (avec 'version'),
+                par exemple le résultat de get_employee
+                
+        Returns:
+            int: Nouvelle version de la ligne
+            
+        Raises:
+            ConcurrentModificationError: Si la ligne a été modifiée ou supprimée entre-temps
+        """
+        versions = self.bulk_update_employees([(employee_id, changes, original)])
+        return versions[employee_id]
+    
+    def bulk_update_employees(self, updates):
+        """
+        Applique plusieurs modifications en compare-and-set, en tout ou rien :
+        si une seule ligne est périmée, aucune n'est modifiée.
+        
+        Args:
+            updates (list): Tuples (employee_id, changes, original), voir update_employee_checked
+            
+        Returns:
+            dict: Nouvelle version de chaque employé modifié {id: version}
+            
+        Raises:
+            ConcurrentModificationError: Avec le détail de toutes les lignes en conflit
+        """
+        for _, changes, original in updates:
+            unknown = [field for field in changes if field not in EDITABLE_COLUMNS]
+            if unknown:
+                raise ValueError(f"Champ(s) inconnu(s): {', '.join(unknown)}")
+            if 'version' not in original:
+                raise ValueError("La ligne d'origine doit contenir sa version")
+        
+        return self.writer.execute(self._compare_and_set, updates)
+    
+    def _compare_and_set(self, conn, updates):
+        """
+        Applique les modifications si les versions correspondent (exécuté par l'écrivain).
+        Une exception annule l'opération entière (SAVEPOINT de l'écrivain).
+        """
+        versions = {}
+        conflicts = []
+        for employee_id, changes, original in updates:
+            expected_version = original['version']
+            if changes:
+                assignments = ', '.join(f"{field} = ?" for field in changes)
+                cursor = conn.execute(
+                    f"UPDATE employees SET {assignments}, version = version + 1 WHERE id = ? AND version = ?",
+                    list(changes.values()) + [employee_id, expected_version]
+                )
+                matched = cursor.rowcount
+            else:
+                # Aucun changement : on vérifie seulement que la version est à jour
+                cursor = conn.execute(
+                    "SELECT COUNT(*) FROM employees WHERE id = ? AND version = ?", (employee_id, expected_version)
+                )
+                matched = cursor.fetchone()[0]
+            
+            if matched == 1:
+                versions[employee_id] = expected_version + (1 if changes else 0)
+            else:
+                current = self._fetch_employee(conn, employee_id)
+                conflicts.append(_describe_conflict(employee_id, original, current, changes))
+        
+        if conflicts:
+            raise ConcurrentModificationError(conflicts)
+        
+        renamed = [employee_id for employee_id, changes, _ in updates
+                   if any(field in SEARCH_KEY_SOURCES for field in changes)]
+        if renamed:
+            self._refresh_search_keys(conn, renamed)
+        return versions
+    
+    def delete_employee(self, employee_id, expected_version=None):
         """
         Supprime un employé de la base de données.
         
         Args:
             employee_id (int): ID de l'employé à supprimer
+            expected_version (int): Si fourni, ne supprime que si la ligne est
+                toujours à cette version
+                
+        Raises:
+            ConcurrentModificationError: Si la ligne a changé depuis expected_version
         """
-        # Connexion à la base
-        conn = sqlite3.connect(self.db_path)
-        
-        # Requête DELETE sécurisée
-        conn.execute("DELETE FROM employees WHERE id = ?", (employee_id,))
+        # Requête DELETE sécurisée, exécutée par l'écrivain
+        self.writer.execute(self._delete_row, employee_id, expected_version)
+    
+    def _delete_row(self, conn, employee_id, expected_version=None):
+        """Supprime un employé (exécuté par l'écrivain)."""
+        if expected_version is None:
+            conn.execute("DELETE FROM employees WHERE id = ?", (employee_id,))
+            return
         
-        # Validation et fermeture
-        conn.commit()
-        conn.close()
+        cursor = conn.execute(
+            "DELETE FROM employees WHERE id = ? AND version = ?", (employee_id, expected_version)
+        )
+        if cursor.rowcount == 0:
+            current = self._fetch_employee(conn, employee_id)
+            if current is not None:
+                original = {'version': expected_version}
+                raise ConcurrentModificationError([_describe_conflict(employee_id, original, current, {})])
     
     def clear_all_data(self):
         """
         Supprime toutes les données de la table (utile pour les tests).
         ATTENTION: Cette opération est irréversible.
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("DELETE FROM employees")
-        conn.commit()
+        self.writer.execute(self._delete_all)
+    
+    def _delete_all(self, conn):
+        """
+        Vide la table employees (exécuté par l'écrivain).
+        Le journal reçoit une seule entrée RESET au lieu d'une entrée par ligne.
+        """
+        with _change_log_paused(conn):
+            conn.execute("DELETE FROM employees")
+        _log_reset(conn)
+    
+    def _restore_from(self, conn, path):
+        """
+        Remplace les employés par ceux d'un instantané (exécuté par l'écrivain, hors lot :
+        ATTACH est interdit dans une transaction). La séquence du journal et le compteur
+        d'IDs ne reculent pas ; une entrée RESET signale le changement en bloc.
+        
+        Returns:
+            int: Nombre d'employés restaurés
+        """
+        conn.execute("ATTACH DATABASE ? AS snapshot", (path,))
+        try:
+            snapshot_columns = [row[1] for row in conn.execute("PRAGMA snapshot.table_info(employees)")]
+            if 'id' not in snapshot_columns:
+                raise ValueError("L'instantané ne contient pas de table employees")
+            
+            # Colonnes communes (l'instantané peut précéder une migration du schéma)
+            columns = [col for col in EMPLOYEE_COLUMNS + ['version'] + DERIVED_COLUMNS if col in snapshot_columns]
+            select = ', '.join(
+                "CASE WHEN typeof(salaire) IN ('integer', 'real') THEN salaire END" if col == 'salaire' else col
+                for col in columns
+            )
+            
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                with _change_log_paused(conn):
+                    conn.execute("DELETE FROM main.employees")
+                    conn.execute(
+                        f"INSERT INTO main.employees ({', '.join(columns)}) "
+                        f"SELECT {select} FROM snapshot.employees"
+                    )
+                row = conn.execute("SELECT seq FROM snapshot.sqlite_sequence WHERE name = 'employees'").fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE main.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'employees'", (row[0],)
+                    )
+                _log_reset(conn)
+                count = conn.execute("SELECT COUNT(*) FROM main.employees").fetchone()[0]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.execute("DETACH DATABASE snapshot")
+        return count
+    
+    def changes_since(self, seq=0, limit=None):
+        """
+        Retourne les modifications journalisées après un numéro de séquence.
+        Permet aux caches, agrégats et synchronisations externes d'appliquer
+        des deltas au lieu de relire toute la table.
+        
+        Une entrée d'opération 'RESET' signifie que la table a changé en bloc
+        (ou que le journal a été purgé après seq) : le consommateur doit
+        recharger l'état complet, puis reprendre à partir de cette séquence.
+        
+        Args:
+            seq (int): Dernière séquence déjà traitée par le consommateur. Un nouveau
+                consommateur charge l'état complet puis part de get_change_seq()
+            limit (int): Nombre maximum d'entrées retournées
+            
+        Returns:
+            list: Dictionnaires {'seq', 'operation', 'id', 'old', 'new', 'changed_at'}
+                  triés par séquence croissante ('old'/'new' décodés depuis JSON)
+        """
+        conn = self._connect()
+        
+        # Entrées purgées après seq : le consommateur a manqué des deltas
+        changes = []
+        pruned_through = _read_meta(conn, 'pruned_through')
+        if pruned_through and seq < pruned_through:
+            changes.append({
+                'seq': pruned_through,
+                'operation': RESET_OPERATION,
+                'id': None,
+                'old': None,
+                'new': None,
+                'changed_at': None
+            })
+            seq = pruned_through
+        
+        sql = ("SELECT seq, operation, employee_id, old_values, new_values, changed_at "
+               "FROM employee_changes WHERE seq > ? ORDER BY seq")
+        params = [seq]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        
+        for row_seq, operation, employee_id, old_values, new_values, changed_at in conn.execute(sql, params):
+            changes.append({
+                'seq': row_seq,
+                'operation': operation,
+                'id': employee_id,
+                'old': json.loads(old_values) if old_values else None,
+                'new': json.loads(new_values) if new_values else None,
+                'changed_at': changed_at
+            })
         conn.close()
+        
+        return changes
+    
+    def get_change_seq(self):
+        """
+        Retourne la dernière séquence du journal (révision courante des données).
+        
+        Returns:
+            int: Séquence de la dernière modification, 0 si aucune
+        """
+        # sqlite_sequence conserve le compteur AUTOINCREMENT même après une purge
+        conn = self._connect()
+        cursor = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'employee_changes'")
+        row = cursor.fetchone()
+        conn.close()
+        
+        return row[0] if row else 0
+    
+    def prune_changes(self, before_seq):
+        """
+        Purge les entrées du journal antérieures à une séquence.
+        Les consommateurs en retard recevront une entrée RESET (voir changes_since).
+        
+        Args:
+            before_seq (int): Les entrées de séquence < before_seq sont supprimées
+            
+        Returns:
+            int: Nombre d'entrées supprimées
+        """
+        return self.writer.execute(self._prune_changes, before_seq)
+    
+    def _prune_changes(self, conn, before_seq):
+        """Purge le journal et mémorise la dernière séquence purgée (exécuté par l'écrivain)."""
+        cursor = conn.execute("DELETE FROM employee_changes WHERE seq < ?", (before_seq,))
+        if cursor.rowcount:
+            pruned_through = max(_read_meta(conn, 'pruned_through') or 0, before_seq - 1)
+            conn.execute(
+                "INSERT OR REPLACE INTO change_log_meta (key, value) VALUES ('pruned_through', ?)",
+                (pruned_through,)
+            )
+        return cursor.rowcount
     
     def get_employee_count(self):
         """
@@ -132,9 +1357,16 @@ class EmployeeDatabase:
         Returns:
             int: Nombre d'employés
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.execute("SELECT COUNT(*) FROM employees")
-        count = cursor.fetchone()[0]
-        conn.close()
-        
-        return count
\ No newline at end of file
+        return self.reads.fetchone("SELECT COUNT(*) FROM employees")[0]
+    
+    def close(self):
+        """
+        Ferme la base : désabonnement de l'écrivain partagé (arrêté après les
+        écritures en attente s'il n'a plus d'utilisateur) et libération du moteur analytique.
+        """
+        self.maintenance.close()
+        self.backups.stop()
+        self.search_index.stop()
+        if self.analytics is not self.storage:
+            self.analytics.close()
+        self.writer.release()
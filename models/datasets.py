@@ -0,0 +1,176 @@
+"""
+Jeux de données nommés : un fichier SQLite par jeu dans le répertoire de données.
+Chaque jeu a ses propres tables, index, journal et écrivain : les requêtes d'un
+jeu ne parcourent jamais les lignes des autres, et la suppression d'un jeu se
+résume à sauvegarder sa base, fermer son écrivain et effacer ses fichiers.
+"""
+import os
+import re
+import shutil
+import threading
+
+from models.backup import BackupManager
+from models.database import EmployeeDatabase
+
+# Variable d'environnement du répertoire des jeux de données (défaut : répertoire courant)
+DATA_DIR_ENV = 'EDM_DATA_DIR'
+
+# Jeu utilisé par défaut (employees.db, fichier historique de l'application)
+DEFAULT_DATASET = 'employees'
+
+# Noms autorisés : utilisés tels quels comme noms de fichiers
+DATASET_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+# Fichiers annexes d'un jeu (journal WAL SQLite, copie analytique DuckDB)
+DATASET_FILE_SUFFIXES = ['.db', '.db-wal', '.db-shm', '.duckdb', '.duckdb.wal']
+
+# Répertoires annexes d'un jeu, <répertoire>/<nom> à côté des bases
+# (instantanés de BackupManager, exports en cache d'ExcelController)
+DATASET_SIDECAR_DIRS = ['backups', 'exports']
+
+# Instantanés des jeux supprimés (un nom de jeu ne peut pas commencer par '_')
+DROPPED_BACKUP_DIR = os.path.join('backups', '_supprimes')
+
+# Libellé de l'instantané pris avant la suppression d'un jeu
+DROP_BACKUP_LABEL = 'avant-suppression'
+
+
+class DatasetRegistry:
+    """
+    Registre des jeux de données d'un répertoire.
+    Une seule instance EmployeeDatabase est ouverte par jeu.
+    """
+    
+    def __init__(self, data_dir=None, analytics_backend=None):
+        """
+        Args:
+            data_dir (str): Répertoire des fichiers (par défaut : EDM_DATA_DIR, sinon '.')
+            analytics_backend (str): Moteur analytique des bases ouvertes (voir EmployeeDatabase)
+        """
+        self.data_dir = data_dir or os.environ.get(DATA_DIR_ENV) or '.'
+        self.analytics_backend = analytics_backend
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._databases = {}
+        self._lock = threading.Lock()
+    
+    def validate_name(self, name):
+        """
+        Vérifie qu'un nom de jeu est utilisable comme nom de fichier.
+        
+        Raises:
+            ValueError: Si le nom est invalide
+        """
+        if not name or not DATASET_NAME_PATTERN.match(name):
+            raise ValueError(
+                "Nom de jeu invalide : lettres, chiffres, '-' et '_' uniquement (64 caractères max)"
+            )
+    
+    def path_for(self, name):
+        """
+        Retourne le chemin du fichier SQLite d'un jeu.
+        
+        Args:
+            name (str): Nom du jeu
+        
+        Returns:
+            str: Chemin du fichier .db
+        """
+        self.validate_name(name)
+        return os.path.join(self.data_dir, f"{name}.db")
+    
+    def list_datasets(self):
+        """
+        Liste les jeux de données existants (le jeu par défaut est toujours présent).
+        
+        Returns:
+            list: Noms triés
+        """
+        names = {DEFAULT_DATASET}
+        for filename in os.listdir(self.data_dir):
+            name, extension = os.path.splitext(filename)
+            if extension == '.db' and DATASET_NAME_PATTERN.match(name):
+                names.add(name)
+        with self._lock:
+            names.update(self._databases)
+        return sorted(names)
+    
+    def exists(self, name):
+        """Indique si un jeu de données existe déjà."""
+        return name == DEFAULT_DATASET or os.path.exists(self.path_for(name))
+    
+    def open(self, name=DEFAULT_DATASET):
+        """
+        Ouvre un jeu de données (créé vide s'il n'existe pas).
+        
+        Args:
+            name (str): Nom du jeu
+        
+        Returns:
+            EmployeeDatabase: Base du jeu, partagée entre les appelants
+        """
+        path = self.path_for(name)
+        with self._lock:
+            db = self._databases.get(name)
+            if db is None:
+                db = EmployeeDatabase(path, analytics_backend=self.analytics_backend)
+                self._databases[name] = db
+            return db
+    
+    def drop(self, name, safety_backup=True):
+        """
+        Supprime un jeu de données : instantané de sécurité, fermeture de sa base,
+        puis effacement de ses fichiers et de ses répertoires annexes (instantanés,
+        exports en cache). Le coût ne dépend pas du nombre de lignes (aucun DELETE).
+        Le jeu par défaut ne peut pas être supprimé.
+        
+        Args:
+            name (str): Nom du jeu
+            safety_backup (bool): Conserver un instantané dans backups/_supprimes avant l'effacement
+        
+        Returns:
+            dict: Instantané de sécurité (voir BackupManager.list_backups), None s'il n'y en a pas
+        
+        Raises:
+            ValueError: Si le nom est invalide ou désigne le jeu par défaut
+        """
+        path = self.path_for(name)
+        if name == DEFAULT_DATASET:
+            raise ValueError("Le jeu de données par défaut ne peut pas être supprimé")
+        
+        with self._lock:
+            db = self._databases.pop(name, None)
+        if db is None and os.path.exists(path):
+            db = EmployeeDatabase(path, analytics_backend=self.analytics_backend)
+        
+        snapshot = None
+        if db is not None:
+            try:
+                if safety_backup:
+                    # Hors de backups/<nom>, effacé avec le jeu
+                    backups = BackupManager(db, backup_dir=os.path.join(self.data_dir, DROPPED_BACKUP_DIR))
+                    try:
+                        snapshot = backups.backup(DROP_BACKUP_LABEL).result()
+                    finally:
+                        backups.stop()
+            except Exception:
+                # Sauvegarde impossible : le jeu reste ouvert et intact
+                with self._lock:
+                    self._databases.setdefault(name, db)
+                raise
+            db.close()
+        
+        base = os.path.splitext(path)[0]
+        for suffix in DATASET_FILE_SUFFIXES:
+            if os.path.exists(base + suffix):
+                os.remove(base + suffix)
+        for directory in DATASET_SIDECAR_DIRS:
+            shutil.rmtree(os.path.join(self.data_dir, directory, name), ignore_errors=True)
+        return snapshot
+    
+    def close(self):
+        """Ferme toutes les bases ouvertes."""
+        with self._lock:
+            databases = list(self._databases.values())
+            self._databases.clear()
+        for db in databases:
+            db.close()
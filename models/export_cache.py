@@ -0,0 +1,199 @@
+"""
+Cache disque des fichiers d'export.
+Un fichier généré est indexé par la révision des données (séquence du journal
+des modifications), le type d'export, ses paramètres (filtres, colonnes, tri)
+et son format : tant que rien ne change, les demandes suivantes réutilisent le
+même fichier au lieu de relire la base et de réécrire le classeur.
+Les fichiers sont évincés du moins récemment utilisé au plus récent au-delà
+d'une taille totale ; l'écriture est atomique (fichier temporaire puis os.replace).
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+# Taille totale maximale des fichiers conservés (octets)
+DEFAULT_EXPORT_CACHE_BYTES = 256 * 1024 * 1024
+
+# Suffixe des métadonnées d'un fichier (résultat du générateur : nombre de lignes...)
+META_SUFFIX = '.meta.json'
+
+
+class ExportCache:
+    """
+    Cache LRU de fichiers d'export sur disque, partagé entre les sessions.
+    L'ordre d'utilisation est la date de modification des fichiers (mise à jour
+    à chaque réutilisation) : il survit aux redémarrages de l'application.
+    """
+    
+    def __init__(self, directory, max_bytes=DEFAULT_EXPORT_CACHE_BYTES):
+        """
+        Args:
+            directory (str): Répertoire des fichiers
+            max_bytes (int): Taille totale maximale des fichiers conservés
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._building = {}
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    @staticmethod
+    def make_key(revision, kind, params=None):
+        """
+        Construit la clé d'un export.
+        
+        Args:
+            revision: Révision des données (voir ExcelController.get_data_revision)
+            kind (str): Type d'export et format (ex: 'donnees.xlsx')
+            params (dict): Paramètres de l'export (filtres, colonnes, tri...)
+        
+        Returns:
+            str: Empreinte SHA-256 (nom de fichier)
+        """
+        payload = json.dumps([revision, kind, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _paths(self, key, extension):
+        path = os.path.join(self.directory, key + extension)
+        return path, path + META_SUFFIX
+    
+    def get(self, key, extension):
+        """
+        Retourne un fichier en cache et le marque comme récemment utilisé.
+        
+        Returns:
+            tuple: (chemin, métadonnées) ou None si absent
+        """
+        path, meta_path = self._paths(key, extension)
+        try:
+            with open(meta_path, encoding='utf-8') as source:
+                info = json.load(source)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return path, info
+    
+    def read(self, path, rebuild):
+        """
+        Lit le contenu d'un fichier servi au téléchargement. Entre la génération et
+        le clic, le fichier peut avoir été évincé ou le cache vidé : il est alors
+        régénéré (rebuild repasse par get_or_create) plutôt que de faire échouer le téléchargement.
+        
+        Args:
+            path (str): Chemin retourné lors de la génération
+            rebuild (callable): Fonction sans argument qui régénère l'export et
+                retourne son chemin (None s'il n'y a plus rien à exporter)
+        
+        Returns:
+            bytes: Contenu du fichier
+        """
+        try:
+            with open(path, 'rb') as source:
+                return source.read()
+        except FileNotFoundError:
+            path = rebuild()
+            if path is None:
+                raise
+        with open(path, 'rb') as source:
+            return source.read()
+    
+    def get_or_create(self, key, extension, builder):
+        """
+        Retourne le fichier en cache ou le génère une seule fois (les demandes
+        simultanées du même export attendent la génération en cours).
+        
+        Args:
+            key (str): Clé (voir make_key)
+            extension (str): Extension du fichier (ex: '.xlsx')
+            builder (callable): Écrit le fichier au chemin reçu et retourne ses
+                métadonnées (dict JSON-sérialisable), ou None s'il n'y a rien à conserver
+        
+        Returns:
+            tuple: (chemin ou None, métadonnées ou None, True si le fichier était en cache)
+        """
+        while True:
+            cached = self.get(key, extension)
+            if cached is not None:
+                with self._lock:
+                    self.stats['hits'] += 1
+                return cached[0], cached[1], True
+            with self._lock:
+                pending = self._building.get(key)
+                if pending is None:
+                    self._building[key] = threading.Event()
+                    self.stats['misses'] += 1
+                    break
+            pending.wait()
+        
+        try:
+            return self._build(key, extension, builder) + (False,)
+        finally:
+            with self._lock:
+                self._building.pop(key).set()
+    
+    def _build(self, key, extension, builder):
+        """Génère le fichier dans un fichier temporaire puis le publie."""
+        os.makedirs(self.directory, exist_ok=True)
+        path, meta_path = self._paths(key, extension)
+        tmp_path = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp{extension}")
+        try:
+            info = builder(tmp_path)
+            if info is None:
+                return None, None
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with open(meta_path, 'w', encoding='utf-8') as output:
+            json.dump(info, output)
+        self._evict(keep=path)
+        return path, info
+    
+    def _entries(self):
+        """Fichiers en cache : liste de (date d'utilisation, taille, chemin)."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith('.') or filename.endswith(META_SUFFIX):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def size(self):
+        """Retourne la taille totale (octets) des fichiers en cache."""
+        return sum(size for _, size, _ in self._entries())
+    
+    def _evict(self, keep=None):
+        """Supprime les fichiers les moins récemment utilisés au-delà de la taille maximale."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+            with self._lock:
+                self.stats['evictions'] += 1
+    
+    @staticmethod
+    def _remove(path):
+        for target in (path + META_SUFFIX, path):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+    
+    def clear(self):
+        """Vide le cache."""
+        for _, _, path in self._entries():
+            self._remove(path)
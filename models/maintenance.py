@@ -0,0 +1,280 @@
+"""
+Maintenance automatique de la base SQLite.
+Le volume de modifications depuis la dernière maintenance (churn) est mesuré
+sur le journal des modifications ; au-delà d'un seuil, et dès que la base est
+inactive, un thread planifie ANALYZE / PRAGMA optimize, la récupération des
+pages libres (VACUUM incrémental) et un checkpoint du WAL.
+Chaque étape passe par l'écrivain unique : les écritures des utilisateurs
+s'intercalent entre les étapes. Chaque exécution est consignée dans maintenance_runs.
+"""
+import json
+import threading
+import time
+
+# Seuil de modifications déclenchant une maintenance
+DEFAULT_CHURN_THRESHOLD = 5000
+
+# Inactivité (secondes sans écriture) requise avant une maintenance planifiée
+DEFAULT_IDLE_SECONDS = 30
+
+# Intervalle (secondes) entre deux vérifications du planificateur
+DEFAULT_CHECK_INTERVAL = 15
+
+# Part de pages libres au-delà de laquelle une base sans auto_vacuum est compactée
+VACUUM_FREE_RATIO = 0.25
+
+# Nombre de lignes échantillonnées par index pour ANALYZE (0 = toutes)
+ANALYSIS_LIMIT = 1000
+
+# Mode auto_vacuum INCREMENTAL (PRAGMA auto_vacuum)
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Pages libérées par transaction de l'écrivain lors d'un VACUUM incrémental
+VACUUM_PAGES_PER_STEP = 2000
+
+
+class MaintenanceScheduler:
+    """
+    Planificateur de maintenance d'une base.
+    run() exécute la maintenance immédiatement ; start() lance la surveillance
+    en tâche de fond (maintenance quand le churn dépasse le seuil et que la base est inactive).
+    """
+    
+    # Clé de change_log_meta mémorisant la séquence du journal à la dernière maintenance
+    WATERMARK_KEY = 'maintenance_seq'
+    
+    def __init__(self, db, churn_threshold=DEFAULT_CHURN_THRESHOLD, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 check_interval=DEFAULT_CHECK_INTERVAL):
+        """
+        Args:
+            db (EmployeeDatabase): Base entretenue
+            churn_threshold (int): Modifications déclenchant une maintenance
+            idle_seconds (float): Inactivité requise avant une maintenance planifiée
+            check_interval (float): Intervalle entre deux vérifications
+        """
+        self.db = db
+        self.churn_threshold = churn_threshold
+        self.idle_seconds = idle_seconds
+        self.check_interval = check_interval
+        self.last_error = None
+        self._last_write = time.monotonic()
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        
+        # Chaque COMMIT de l'écrivain repousse la prochaine période d'inactivité
+        db.writer.add_commit_listener(self._on_commit)
+    
+    def _on_commit(self, count):
+        self._last_write = time.monotonic()
+    
+    def start(self):
+        """Lance la surveillance en tâche de fond (sans effet si déjà lancée)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True,
+                                        name=f"maintenance:{self.db.db_path}")
+        self._thread.start()
+    
+    def stop(self):
+        """Arrête la surveillance."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def close(self):
+        """Arrête la surveillance et se désabonne des COMMIT de l'écrivain."""
+        self.stop()
+        self.db.writer.remove_commit_listener(self._on_commit)
+    
+    def churn(self):
+        """
+        Mesure les modifications depuis la dernière maintenance.
+        Une opération en bloc (RESET : vidage, restauration...) compte comme le seuil entier.
+        
+        Returns:
+            int: Nombre de modifications
+        """
+        watermark = self.db.storage.fetchone(
+            "SELECT value FROM change_log_meta WHERE key = ?", [self.WATERMARK_KEY]
+        )
+        since = watermark[0] if watermark else 0
+        changes, resets = self.db.storage.fetchone(
+            "SELECT COUNT(*), COUNT(CASE WHEN operation = 'RESET' THEN 1 END) "
+            "FROM employee_changes WHERE seq > ?",
+            [since]
+        )
+        # Entrées purgées du journal : le compteur de séquence reste exact
+        changes = max(changes, self.db.get_change_seq() - since)
+        return changes + resets * self.churn_threshold
+    
+    def idle_for(self):
+        """Retourne le temps écoulé (secondes) depuis la dernière écriture."""
+        return time.monotonic() - self._last_write
+    
+    def is_due(self):
+        """Indique si une maintenance planifiée doit être lancée."""
+        return self.idle_for() >= self.idle_seconds and self.churn() >= self.churn_threshold
+    
+    def run(self, reason='manuel'):
+        """
+        Exécute toutes les étapes de maintenance et consigne le rapport.
+        
+        Args:
+            reason (str): Origine de l'exécution ('manuel', 'planifié'...)
+        
+        Returns:
+            dict: Rapport {'raison', 'churn', 'debut', 'duree_ms', 'etapes',
+                  'taille_avant', 'taille_apres', 'pages_libres_avant', 'pages_libres_apres'}
+        """
+        with self._run_lock:
+            started = time.time()
+            churn = self.churn()
+            seq = self.db.get_change_seq()
+            size_before, free_before = self._page_usage()
+            
+            steps = []
+            self._step(steps, 'ANALYZE', self._analyze)
+            self._step(steps, 'VACUUM', self._reclaim_space)
+            self._step(steps, 'CHECKPOINT', self._checkpoint)
+            
+            size_after, free_after = self._page_usage()
+            report = {
+                'raison': reason,
+                'churn': churn,
+                'debut': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started)),
+                'duree_ms': round((time.time() - started) * 1000, 1),
+                'etapes': steps,
+                'taille_avant': size_before,
+                'taille_apres': size_after,
+                'pages_libres_avant': free_before,
+                'pages_libres_apres': free_after,
+            }
+            self.db.writer.execute(self._record, report, seq)
+            return report
+    
+    def _step(self, steps, name, operation):
+        """Exécute une étape, mesure sa durée et note son résultat (une erreur n'arrête pas les suivantes)."""
+        started = time.perf_counter()
+        try:
+            detail = operation()
+        except Exception as e:
+            detail = f"Erreur : {e}"
+        steps.append({
+            'etape': name,
+            'duree_ms': round((time.perf_counter() - started) * 1000, 1),
+            'detail': detail,
+        })
+    
+    def _page_usage(self):
+        """Retourne (taille du fichier en octets, nombre de pages libres)."""
+        page_count = self.db.storage.fetchone("PRAGMA page_count")[0]
+        page_size = self.db.storage.fetchone("PRAGMA page_size")[0]
+        free_pages = self.db.storage.fetchone("PRAGMA freelist_count")[0]
+        return page_count * page_size, free_pages
+    
+    def _analyze(self):
+        """Statistiques du planificateur (échantillonnées), puis PRAGMA optimize."""
+        def analyze(conn):
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+        self.db.writer.execute(analyze)
+        return "Statistiques mises à jour"
+    
+    def _reclaim_space(self):
+        """
+        Rend les pages libres au système : VACUUM incrémental si la base le permet,
+        sinon VACUUM complet (une seule fois) qui active le mode incrémental.
+        """
+        auto_vacuum = self.db.storage.fetchone("PRAGMA auto_vacuum")[0]
+        _, free_pages = self._page_usage()
+        if auto_vacuum == AUTO_VACUUM_INCREMENTAL:
+            if not free_pages:
+                return "Aucune page libre"
+            def incremental_vacuum(conn, pages):
+                # Le module sqlite3 n'exécute qu'un pas du PRAGMA (une page) : il est répété
+                for _ in range(pages):
+                    conn.execute("PRAGMA incremental_vacuum(1)")
+            # Par lots : les écritures des utilisateurs s'intercalent entre les transactions
+            for start in range(0, free_pages, VACUUM_PAGES_PER_STEP):
+                self.db.writer.execute(incremental_vacuum, min(VACUUM_PAGES_PER_STEP, free_pages - start))
+            return f"{free_pages} page(s) libérée(s) (incrémental)"
+        
+        page_count = self.db.storage.fetchone("PRAGMA page_count")[0]
+        if not page_count or free_pages / page_count < VACUUM_FREE_RATIO:
+            return f"{free_pages} page(s) libre(s), sous le seuil de compactage"
+        
+        def vacuum(conn):
+            conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+            conn.execute("VACUUM")
+        self.db.writer.execute(vacuum, transactional=False)
+        return f"VACUUM complet ({free_pages} page(s) libre(s)), mode incrémental activé"
+    
+    def _checkpoint(self):
+        """Reporte le WAL dans le fichier principal et le tronque."""
+        def checkpoint(conn):
+            return conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        busy, wal_pages, copied = self.db.writer.execute(checkpoint, transactional=False)
+        if busy:
+            return f"Partiel : lectures en cours ({copied}/{wal_pages} pages)"
+        return f"{copied} page(s) reportée(s), WAL tronqué"
+    
+    def _record(self, conn, report, seq):
+        """Consigne le rapport et la séquence traitée (exécuté par l'écrivain)."""
+        conn.execute(
+            "INSERT INTO maintenance_runs (started_at, reason, churn, duration_ms, steps, "
+            "size_before, size_after, free_pages_before, free_pages_after) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (report['debut'], report['raison'], report['churn'], report['duree_ms'], json.dumps(report['etapes']),
+             report['taille_avant'], report['taille_apres'], report['pages_libres_avant'],
+             report['pages_libres_apres'])
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO change_log_meta (key, value) VALUES (?, ?)",
+            (self.WATERMARK_KEY, seq)
+        )
+    
+    def reports(self, limit=10):
+        """
+        Retourne les derniers rapports de maintenance.
+        
+        Args:
+            limit (int): Nombre de rapports
+        
+        Returns:
+            list: Rapports (format de run()), du plus récent au plus ancien
+        """
+        rows = self.db.storage.fetchall(
+            "SELECT started_at, reason, churn, duration_ms, steps, size_before, size_after, "
+            "free_pages_before, free_pages_after FROM maintenance_runs ORDER BY id DESC LIMIT ?",
+            [int(limit)]
+        )
+        return [
+            {
+                'debut': started_at,
+                'raison': reason,
+                'churn': churn,
+                'duree_ms': duration_ms,
+                'etapes': json.loads(steps),
+                'taille_avant': size_before,
+                'taille_apres': size_after,
+                'pages_libres_avant': free_before,
+                'pages_libres_apres': free_after,
+            }
+            for started_at, reason, churn, duration_ms, steps, size_before, size_after, free_before, free_after
+            in rows
+        ]
+    
+    def _loop(self):
+        """Boucle de surveillance : maintenance quand elle est due."""
+        while not self._stop.wait(self.check_interval):
+            try:
+                if self.is_due():
+                    self.run(reason='planifié')
+                self.last_error = None
+            except Exception as e:
+                # Base fermée ou verrouillée : nouvel essai à la prochaine vérification
+                self.last_error = str(e)
@@ -0,0 +1,509 @@
+"""
+Recherche approximative des employés par trigrammes.
+Les noms et emails sont normalisés (minuscules, sans accents ni ponctuation)
+puis découpés en trigrammes. L'index (search_trigrams) est maintenu à partir
+du journal des modifications, comme les sketches de quantiles : le coût d'une
+mise à jour est proportionnel au nombre de modifications, et une reconstruction
+avance par lots en tâche de fond sans bloquer les écritures.
+Une recherche évalue un nombre borné de candidats, lus à partir de ses
+trigrammes les plus rares : elle reste interactive sur une grande table.
+"""
+import functools
+import json
+import math
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Seuil de similarité par défaut : part des trigrammes de la saisie retrouvés
+DEFAULT_THRESHOLD = 0.5
+
+# Nombre de lignes de la table indexées par transaction lors d'une reconstruction
+REBUILD_BATCH_SIZE = 1000
+
+# Nombre d'entrées du journal appliquées par transaction lors d'une mise à jour
+CATCH_UP_BATCH_SIZE = 2000
+
+# Nombre maximum de candidats évalués par recherche (lus à partir des trigrammes les plus rares)
+MAX_CANDIDATES = 2000
+
+# Durée (secondes) de mise à jour de l'index acceptée pendant une recherche : au-delà,
+# la mise à jour continue en tâche de fond et la recherche parcourt cle_recherche
+SYNC_REFRESH_SECONDS = 0.2
+
+# Recherche de repli (index en reconstruction) : lignes parcourues au plus, et
+# nombre minimal de caractères saisis (en deçà, presque toutes les lignes correspondent)
+SCAN_MAX_ROWS = 200000
+SCAN_MIN_CHARS = 3
+
+
+def fold_text(text):
+    """
+    Normalise un texte pour la recherche : sans accents, en minuscules,
+    ponctuation remplacée par des espaces ("Hélène.Dupont@x.com" -> "helene dupont x com").
+    
+    Args:
+        text (str): Texte à normaliser (None accepté)
+    
+    Returns:
+        str: Texte normalisé
+    """
+    if text is None:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[\W_]+', ' ', stripped.lower()).split())
+
+
+# Colonnes de texte vectorisées : chaînes Arrow (pyarrow, installé avec Streamlit),
+# dont les expressions régulières (RE2) sont compilées une fois par colonne
+STRING_DTYPE = 'string[pyarrow]'
+
+# Expressions de fold_text : RE2 pour les colonnes Arrow, re pour le reste (Unicode)
+NON_ASCII_REGEX = r'[^\x00-\x7f]'
+# Hors des blocs latins (décompositions stables depuis Unicode 1.1), la décomposition
+# NFKD d'Arrow (utf8proc) peut suivre une autre version d'Unicode que unicodedata
+NON_LATIN_REGEX = r'[^\x00-\x{24f}\x{1e00}-\x{1eff}]'
+# Pour un texte ASCII, [\W_] de re se réduit aux caractères non alphanumériques ;
+# une espace simple, déjà à sa forme finale, n'est pas réécrite
+ASCII_NON_WORD_REGEX = r'[^0-9A-Za-z]{2,}|[^0-9A-Za-z ]'
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+
+
+@functools.lru_cache(maxsize=None)
+def _combining_characters_regex():
+    """
+    Classe RE2 de tous les caractères combinants (accents) selon
+    unicodedata.combining, comme fold_text. Calculée une fois par processus
+    (environ 0,1 s) : une colonne n'est plus parcourue pour lister ses accents.
+    
+    Returns:
+        str: Expression régulière (plages de points de code)
+    """
+    ranges = []
+    for code in range(sys.maxunicode + 1):
+        if unicodedata.combining(chr(code)):
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+    return '[' + ''.join(f'\\x{{{start:x}}}-\\x{{{end:x}}}' for start, end in ranges) + ']+'
+
+
+def fold_series(values):
+    """
+    Version vectorisée de fold_text pour une colonne pandas : même résultat,
+    valeur par valeur. La décomposition NFKD n'est faite que sur les valeurs
+    non ASCII ; les valeurs restées non ASCII après suppression des accents
+    passent par str.lower et re pour garder leur sémantique Unicode, les
+    autres par les opérations Arrow.
+    
+    Args:
+        values (pandas.Series): Textes à normaliser (valeurs manquantes acceptées)
+    
+    Returns:
+        pandas.Series: Textes normalisés (dtype object, '' pour les valeurs manquantes)
+    """
+    text = values.astype(STRING_DTYPE).fillna('').reset_index(drop=True)
+    non_ascii = text.str.contains(NON_ASCII_REGEX, regex=True).to_numpy(dtype=bool)
+    if non_ascii.any():
+        accented = text[non_ascii]
+        decomposed = pd.Series(pd.array(pc.utf8_normalize(pa.array(accented.array), 'NFKD'), dtype=STRING_DTYPE),
+                               index=accented.index)
+        other_scripts = accented.str.contains(NON_LATIN_REGEX, regex=True).to_numpy(dtype=bool)
+        if other_scripts.any():
+            decomposed[other_scripts] = accented[other_scripts].astype(object).str.normalize('NFKD')
+        stripped = decomposed.str.replace(_combining_characters_regex(), '', regex=True)
+        text = text.copy()
+        text[non_ascii] = stripped
+        non_ascii[non_ascii] = stripped.str.contains(NON_ASCII_REGEX, regex=True).to_numpy(dtype=bool)
+    
+    folded = text.str.lower().str.replace(ASCII_NON_WORD_REGEX, ' ', regex=True).str.strip(' ').astype(object)
+    if non_ascii.any():
+        unicode_text = text[non_ascii].astype(object).str.lower()
+        folded[non_ascii] = unicode_text.str.replace(NON_WORD_PATTERN, ' ', regex=True).str.strip(' ')
+    return folded.set_axis(values.index)
+
+
+def search_key_series(nom, email):
+    """
+    Version vectorisée de search_key (mêmes clés que search_key(nom, email) ligne à ligne).
+    Nom et email sont normalisés en une seule passe : l'espace qui les sépare
+    est un séparateur pour fold_text, la clé est donc identique à leur concaténation.
+    """
+    joined = nom.astype(STRING_DTYPE).fillna('') + ' ' + email.astype(STRING_DTYPE).fillna('')
+    return fold_series(joined)
+
+
+def text_trigrams(text, partial_last=False):
+    """
+    Découpe un texte en trigrammes de mots (chaque mot est encadré d'espaces).
+    
+    Args:
+        text (str): Texte à découper
+        partial_last (bool): Le dernier mot est en cours de saisie : sa fin n'est
+            pas marquée, "hel" retrouve alors "helene"
+    
+    Returns:
+        set: Trigrammes distincts
+    """
+    return _word_trigrams(fold_text(text).split(), partial_last)
+
+
+def _word_trigrams(words, partial_last=False):
+    """Trigrammes de mots déjà normalisés (voir text_trigrams)."""
+    grams = set()
+    last = len(words) - 1
+    for position, word in enumerate(words):
+        padded = f"  {word}" if partial_last and position == last else f"  {word} "
+        grams.update([padded[i:i + 3] for i in range(len(padded) - 2)])
+    return grams
+
+
+def search_key(nom, email):
+    """Texte indexé d'un employé : nom et email normalisés."""
+    return ' '.join(part for part in (fold_text(nom), fold_text(email)) if part)
+
+
+class TrigramSearchIndex:
+    """
+    Index trigrammes des noms et emails, persisté dans la base.
+    L'index avance par étapes bornées, une transaction de l'écrivain chacune :
+    application d'un lot de deltas du journal, ou d'un lot de lignes lors d'une
+    reconstruction (premier usage, RESET, purge). L'état de la reconstruction est
+    conservé dans change_log_meta : elle reprend où elle s'était arrêtée.
+    Pendant une reconstruction en tâche de fond, les recherches parcourent
+    cle_recherche (correspondances exactes des mots, SCAN_MAX_ROWS lignes au plus).
+    """
+    
+    # Clés de change_log_meta : séquence appliquée (index complet), puis état
+    # d'une reconstruction en cours (dernier ID indexé, séquence de départ)
+    WATERMARK_KEY = 'search_index_seq'
+    REBUILD_ID_KEY = 'search_index_rebuild_id'
+    REBUILD_SEQ_KEY = 'search_index_rebuild_seq'
+    
+    def __init__(self, db):
+        """
+        Args:
+            db (EmployeeDatabase): Base indexée
+        """
+        self.db = db
+        self._lock = threading.Lock()
+        self._seq = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def is_current(self):
+        """Indique si l'index a appliqué toutes les modifications du journal."""
+        return self._seq is not None and self._seq == self.db.get_change_seq()
+    
+    def refresh(self):
+        """Met l'index à jour (étapes bornées : les écritures s'intercalent entre elles)."""
+        with self._lock:
+            while not self.is_current():
+                if self._stop.is_set():
+                    return
+                self._step()
+    
+    def refresh_in_background(self):
+        """Lance la mise à jour de l'index en tâche de fond (sans effet si déjà lancée)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_refresh, daemon=True,
+                                        name=f"search-index:{self.db.db_path}")
+        self._thread.start()
+    
+    def stop(self):
+        """Interrompt la mise à jour en tâche de fond (reprise à la prochaine recherche)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            # Base fermée ou supprimée : la prochaine recherche relancera la mise à jour
+            self._seq = None
+    
+    def _step(self):
+        """Exécute une étape de mise à jour par l'écrivain et mémorise la séquence atteinte."""
+        try:
+            seq, done = self.db.writer.execute(self._advance)
+        except Exception:
+            self._seq = None
+            raise
+        self._seq = seq if done else None
+    
+    def _ensure_current(self):
+        """
+        Rattrape un petit retard de l'index pendant la recherche ; au-delà de
+        SYNC_REFRESH_SECONDS, la mise à jour continue en tâche de fond.
+        
+        Returns:
+            bool: True si l'index est à jour
+        """
+        if self.is_current():
+            return True
+        if (self._thread is not None and self._thread.is_alive()) or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            deadline = time.monotonic() + SYNC_REFRESH_SECONDS
+            while not self.is_current():
+                if time.monotonic() >= deadline:
+                    break
+                self._step()
+            else:
+                return True
+        finally:
+            self._lock.release()
+        self.refresh_in_background()
+        return False
+    
+    def search(self, query, limit=20, threshold=DEFAULT_THRESHOLD, columns=None):
+        """
+        Recherche les employés dont le nom ou l'email ressemble à la saisie.
+        Les candidats sont lus à partir des trigrammes les plus rares, au plus
+        MAX_CANDIDATES : le coût ne dépend pas de la taille de la table.
+        
+        Args:
+            query (str): Texte saisi (accents, casse et fautes de frappe tolérés)
+            limit (int): Nombre maximum de résultats
+            threshold (float): Part minimale des trigrammes de la saisie retrouvés (0 à 1)
+            columns (list): Colonnes de la table employees retournées
+        
+        Returns:
+            pandas.DataFrame: Colonnes demandées et 'score', par pertinence décroissante
+        """
+        from models.database import EMPLOYEE_COLUMNS
+        
+        columns = [col for col in (columns or EMPLOYEE_COLUMNS) if col in EMPLOYEE_COLUMNS]
+        grams = text_trigrams(query, partial_last=True)
+        empty = pd.DataFrame(columns=columns + ['score'])
+        if not grams:
+            return empty
+        
+        if not self._ensure_current():
+            return self._scan(fold_text(query).split(), limit, columns)
+        storage = self.db.storage
+        
+        # Fréquence des trigrammes de la saisie (absents de l'index : aucune correspondance)
+        grams = sorted(grams)
+        counts = dict(storage.fetchall(
+            f"SELECT trigram, count FROM search_trigram_counts WHERE trigram IN ({', '.join('?' for _ in grams)})",
+            grams
+        ))
+        present = sorted((gram for gram in grams if counts.get(gram)), key=counts.get)
+        min_common = max(1, math.ceil(threshold * len(grams)))
+        if len(present) < min_common:
+            return empty
+        
+        # Filtrage par préfixe : un résultat contient au moins un des trigrammes les plus rares ;
+        # candidats lus du plus rare au plus fréquent, dans la limite de MAX_CANDIDATES
+        candidates = {}
+        for gram in present[:len(present) - min_common + 1]:
+            remaining = MAX_CANDIDATES - len(candidates)
+            if remaining <= 0:
+                break
+            for (employee_id,) in storage.fetchall(
+                "SELECT employee_id FROM search_trigrams WHERE trigram = ? LIMIT ?",
+                [gram, remaining + len(candidates)]
+            ):
+                candidates.setdefault(employee_id, None)
+                if len(candidates) >= MAX_CANDIDATES:
+                    break
+        
+        # Score de chaque candidat par recherche directe dans la clé primaire (trigramme, employé)
+        all_marks = ', '.join('?' for _ in present)
+        select = ', '.join(f"e.{col}" for col in columns)
+        sql = f"""
+            SELECT {select}, m.common * 1.0 / ? AS score
+            FROM (
+                SELECT t.employee_id, COUNT(*) AS common
+                FROM json_each(?) c CROSS JOIN search_trigrams t
+                WHERE t.employee_id = c.value AND t.trigram IN ({all_marks})
+                GROUP BY t.employee_id
+                HAVING COUNT(*) >= ?
+            ) m
+            JOIN search_keys k ON k.employee_id = m.employee_id
+            JOIN employees e ON e.id = m.employee_id
+            ORDER BY m.common DESC, m.common * 1.0 / k.nb_trigrams DESC, e.id
+            LIMIT ?
+        """
+        params = [len(grams), json.dumps(list(candidates))] + present + [min_common, int(limit)]
+        return storage.read_sql(sql, params)
+    
+    def _scan(self, words, limit, columns):
+        """
+        Recherche de repli pendant une reconstruction de l'index : lignes dont la
+        clé normalisée contient tous les mots saisis (sans tolérance aux fautes).
+        LIKE '%mot%' ne peut pas utiliser d'index : le parcours est limité aux
+        SCAN_MAX_ROWS premières lignes, et une saisie de moins de SCAN_MIN_CHARS
+        caractères ne retourne rien (résultats complets une fois l'index reconstruit).
+        """
+        if len(''.join(words)) < SCAN_MIN_CHARS:
+            return pd.DataFrame(columns=columns + ['score'])
+        select = ', '.join(columns)
+        # Mots normalisés : ni '%' ni '_' (remplacés par des espaces)
+        clauses = ' AND '.join('cle_recherche LIKE ?' for _ in words)
+        return self.db.storage.read_sql(
+            f"SELECT {select}, 1.0 AS score FROM ("
+            f"SELECT * FROM employees ORDER BY id LIMIT ?"
+            f") WHERE {clauses} ORDER BY id LIMIT ?",
+            [SCAN_MAX_ROWS] + [f"%{word}%" for word in words] + [int(limit)]
+        )
+    
+    def _advance(self, conn):
+        """
+        Exécute une étape bornée de mise à jour (exécuté par l'écrivain).
+        
+        Returns:
+            tuple: (séquence appliquée ou None, True si l'index est à jour)
+        """
+        # Import local : models.database importe ce module
+        from models.database import _read_meta
+        
+        rebuild_after = _read_meta(conn, self.REBUILD_ID_KEY)
+        if rebuild_after is not None:
+            return self._rebuild_batch(conn, rebuild_after)
+        
+        stored_seq = _read_meta(conn, self.WATERMARK_KEY)
+        if stored_seq is None:
+            return self._start_rebuild(conn)
+        
+        changes = conn.execute(
+            "SELECT seq, operation, employee_id, new_values FROM employee_changes "
+            "WHERE seq > ? ORDER BY seq LIMIT ?",
+            (stored_seq, CATCH_UP_BATCH_SIZE)
+        ).fetchall()
+        pruned = _read_meta(conn, 'pruned_through')
+        if (pruned and pruned > stored_seq) or any(change[1] == 'RESET' for change in changes):
+            return self._start_rebuild(conn)
+        if not changes:
+            return stored_seq, True
+        
+        # Dernier état de chaque employé modifié (None : supprimé)
+        latest = {}
+        for _, operation, employee_id, new_values in changes:
+            latest[employee_id] = json.loads(new_values) if operation != 'DELETE' else None
+        
+        deltas = Counter()
+        for employee_id, values in latest.items():
+            old = conn.execute("SELECT cle FROM search_keys WHERE employee_id = ?", (employee_id,)).fetchone()
+            old_key = old[0] if old else None
+            new_key = search_key(values.get('nom'), values.get('email')) if values is not None else None
+            if old_key == new_key:
+                continue
+            if old_key is not None:
+                self._remove(conn, employee_id, old_key, deltas)
+            if new_key is not None:
+                self._add(conn, employee_id, new_key, deltas)
+        
+        self._apply_counts(conn, deltas)
+        new_seq = changes[-1][0]
+        self._set_meta(conn, self.WATERMARK_KEY, new_seq)
+        return new_seq, len(changes) < CATCH_UP_BATCH_SIZE
+    
+    def _add(self, conn, employee_id, key, deltas):
+        """Indexe la clé de recherche d'un employé."""
+        grams = _word_trigrams(key.split())
+        conn.executemany(
+            "INSERT OR IGNORE INTO search_trigrams (trigram, employee_id) VALUES (?, ?)",
+            [(gram, employee_id) for gram in grams]
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO search_keys (employee_id, cle, nb_trigrams) VALUES (?, ?, ?)",
+            (employee_id, key, len(grams))
+        )
+        deltas.update(grams)
+    
+    def _remove(self, conn, employee_id, key, deltas):
+        """Retire la clé de recherche d'un employé de l'index."""
+        grams = _word_trigrams(key.split())
+        conn.executemany(
+            "DELETE FROM search_trigrams WHERE trigram = ? AND employee_id = ?",
+            [(gram, employee_id) for gram in grams]
+        )
+        conn.execute("DELETE FROM search_keys WHERE employee_id = ?", (employee_id,))
+        deltas.subtract(grams)
+    
+    def _apply_counts(self, conn, deltas):
+        """
+        Met à jour la fréquence de chaque trigramme modifié ; seuls les trigrammes
+        en baisse peuvent tomber à zéro et être retirés (recherche par clé primaire).
+        """
+        changed = [(gram, delta) for gram, delta in deltas.items() if delta]
+        conn.executemany(
+            "INSERT INTO search_trigram_counts (trigram, count) VALUES (?, ?) "
+            "ON CONFLICT(trigram) DO UPDATE SET count = count + excluded.count",
+            changed
+        )
+        conn.executemany(
+            "DELETE FROM search_trigram_counts WHERE trigram = ? AND count <= 0",
+            [(gram,) for gram, delta in changed if delta < 0]
+        )
+    
+    def _start_rebuild(self, conn):
+        """Vide l'index et démarre une reconstruction par lots (premier usage, RESET ou purge)."""
+        seq_row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'employee_changes'").fetchone()
+        
+        conn.execute("DELETE FROM search_trigrams")
+        conn.execute("DELETE FROM search_keys")
+        conn.execute("DELETE FROM search_trigram_counts")
+        conn.execute("DELETE FROM change_log_meta WHERE key = ?", (self.WATERMARK_KEY,))
+        self._set_meta(conn, self.REBUILD_SEQ_KEY, seq_row[0] if seq_row else 0)
+        self._set_meta(conn, self.REBUILD_ID_KEY, 0)
+        return None, False
+    
+    def _rebuild_batch(self, conn, after_id):
+        """
+        Indexe les REBUILD_BATCH_SIZE lignes suivantes, dans l'ordre des IDs.
+        Les lignes sont indexées dans leur état courant : les deltas du journal
+        postérieurs au début de la reconstruction, appliqués ensuite, ne changent
+        que les clés qui diffèrent.
+        """
+        rows = conn.execute(
+            "SELECT id, nom, email, cle_recherche FROM employees WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, REBUILD_BATCH_SIZE)
+        ).fetchall()
+        
+        counts = Counter()
+        postings = []
+        keys = []
+        for employee_id, nom, email, key in rows:
+            # Clé déjà calculée à l'écriture (cle_recherche), sauf lignes pas encore complétées
+            if key is None:
+                key = search_key(nom, email)
+            grams = _word_trigrams(key.split())
+            postings.extend((gram, employee_id) for gram in grams)
+            keys.append((employee_id, key, len(grams)))
+            counts.update(grams)
+        # Insertion dans l'ordre de la clé primaire : pages de l'index écrites à la suite
+        postings.sort()
+        conn.executemany("INSERT OR IGNORE INTO search_trigrams (trigram, employee_id) VALUES (?, ?)", postings)
+        conn.executemany("INSERT OR REPLACE INTO search_keys (employee_id, cle, nb_trigrams) VALUES (?, ?, ?)", keys)
+        self._apply_counts(conn, counts)
+        
+        if len(rows) == REBUILD_BATCH_SIZE:
+            self._set_meta(conn, self.REBUILD_ID_KEY, rows[-1][0])
+            return None, False
+        
+        # Toutes les lignes sont indexées : les deltas reprennent à la séquence de départ
+        from models.database import _read_meta
+        seq = _read_meta(conn, self.REBUILD_SEQ_KEY)
+        conn.execute("DELETE FROM change_log_meta WHERE key IN (?, ?)", (self.REBUILD_ID_KEY, self.REBUILD_SEQ_KEY))
+        self._set_meta(conn, self.WATERMARK_KEY, seq)
+        return None, False
+    
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO change_log_meta (key, value) VALUES (?, ?)", (key, value))
@@ -0,0 +1,311 @@
+"""
+Sketches de quantiles des salaires, maintenus de façon incrémentale.
+Un sketch à buckets logarithmiques (type DDSketch) garantit une erreur relative
+bornée sur chaque quantile, accepte les suppressions et se fusionne par addition.
+Les sketches (global, par département, par poste) sont persistés dans la base et
+mis à jour à partir du journal des modifications (voir EmployeeDatabase.changes_since).
+"""
+import json
+import math
+import threading
+
+# Bucket réservé aux salaires nuls ou négatifs (hors échelle logarithmique)
+ZERO_BUCKET = -(2 ** 31)
+
+# Portées maintenues : (nom de portée, colonne de regroupement)
+SKETCH_SCOPES = [('global', None), ('departement', 'departement'), ('poste', 'poste')]
+
+
+class SalarySketch:
+    """
+    Histogramme à buckets logarithmiques : chaque quantile est estimé avec une
+    erreur relative d'au plus relative_accuracy. Le nombre de buckets ne dépend
+    que de l'étendue des salaires, pas du nombre de lignes.
+    """
+    
+    def __init__(self, relative_accuracy=0.01):
+        """
+        Args:
+            relative_accuracy (float): Erreur relative maximale (0.01 = 1 %)
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+    
+    def bucket_of(self, value):
+        """Retourne l'indice du bucket contenant une valeur."""
+        if value <= 0:
+            return ZERO_BUCKET
+        return math.ceil(math.log(value) / self._log_gamma)
+    
+    def add(self, value, count=1):
+        """
+        Ajoute (count > 0) ou retire (count < 0) une valeur du sketch.
+        
+        Returns:
+            int: Indice du bucket modifié
+        """
+        bucket = self.bucket_of(value)
+        new_count = self.buckets.get(bucket, 0) + count
+        if new_count:
+            self.buckets[bucket] = new_count
+        else:
+            self.buckets.pop(bucket, None)
+        self.count += count
+        self.total += value * count
+        return bucket
+    
+    def remove(self, value):
+        """Retire une valeur précédemment ajoutée."""
+        return self.add(value, -1)
+    
+    def merge(self, other):
+        """Fusionne un autre sketch de même précision dans celui-ci."""
+        if other.gamma != self.gamma:
+            raise ValueError("Impossible de fusionner des sketches de précisions différentes")
+        for bucket, count in other.buckets.items():
+            new_count = self.buckets.get(bucket, 0) + count
+            if new_count:
+                self.buckets[bucket] = new_count
+            else:
+                self.buckets.pop(bucket, None)
+        self.count += other.count
+        self.total += other.total
+    
+    def quantile(self, q):
+        """
+        Estime un quantile.
+        
+        Args:
+            q (float): Quantile entre 0 et 1 (0.5 = médiane)
+        
+        Returns:
+            float: Valeur estimée, None si le sketch est vide
+        """
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        cumulated = 0
+        for bucket in sorted(self.buckets):
+            cumulated += self.buckets[bucket]
+            if cumulated > rank:
+                if bucket == ZERO_BUCKET:
+                    return 0.0
+                # Valeur représentative du bucket : erreur relative <= relative_accuracy
+                return 2 * self.gamma ** bucket / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+    
+    def mean(self):
+        """Retourne la moyenne exacte des valeurs (None si vide)."""
+        return self.total / self.count if self.count > 0 else None
+
+
+class SalaryQuantileIndex:
+    """
+    Sketches de salaires global, par département et par poste, persistés dans
+    la base. refresh() applique les deltas du journal des modifications depuis
+    la dernière séquence traitée : le coût est proportionnel au nombre de
+    modifications, pas à la taille de la table.
+    """
+    
+    # Clé de change_log_meta mémorisant la dernière séquence appliquée
+    WATERMARK_KEY = 'salary_sketch_seq'
+    
+    def __init__(self, db, relative_accuracy=0.01):
+        """
+        Args:
+            db (EmployeeDatabase): Base suivie
+            relative_accuracy (float): Erreur relative maximale des quantiles
+        """
+        self.db = db
+        self.relative_accuracy = relative_accuracy
+        self._lock = threading.Lock()
+        self._sketches = None
+        self._seq = None
+    
+    def refresh(self):
+        """Met les sketches à jour avec les modifications non encore appliquées."""
+        with self._lock:
+            if self._sketches is not None and self._seq == self.db.get_change_seq():
+                return
+            try:
+                self._sketches, self._seq = self.db.writer.execute(self._catch_up)
+            except Exception:
+                # État mémoire incertain : il sera relu depuis la base au prochain appel
+                self._sketches = None
+                self._seq = None
+                raise
+    
+    def quantiles(self, qs, scope='global', group=None):
+        """
+        Estime des quantiles de salaire pour une portée.
+        
+        Args:
+            qs (list): Quantiles demandés (ex: [0.1, 0.5, 0.9])
+            scope (str): 'global', 'departement' ou 'poste'
+            group (str): Valeur du groupe (ignorée pour la portée globale)
+        
+        Returns:
+            dict: {q: valeur estimée ou None}
+        """
+        self.refresh()
+        with self._lock:
+            sketch = self._sketches.get((scope, group if scope != 'global' else ''))
+            return {q: sketch.quantile(q) if sketch else None for q in qs}
+    
+    def count(self, scope='global', group=None):
+        """
+        Retourne le nombre de salaires suivis par un sketch.
+        
+        Args:
+            scope (str): 'global', 'departement' ou 'poste'
+            group (str): Valeur du groupe (ignorée pour la portée globale)
+        
+        Returns:
+            int: Nombre de salaires non nuls
+        """
+        self.refresh()
+        with self._lock:
+            sketch = self._sketches.get((scope, group if scope != 'global' else ''))
+            return sketch.count if sketch else 0
+    
+    def group_quantiles(self, scope, qs):
+        """
+        Estime des quantiles pour chaque groupe d'une portée.
+        
+        Args:
+            scope (str): 'departement' ou 'poste'
+            qs (list): Quantiles demandés
+        
+        Returns:
+            dict: {groupe: {'effectif': int, q: valeur}} trié par groupe
+        """
+        self.refresh()
+        with self._lock:
+            result = {}
+            for (sketch_scope, group), sketch in sorted(self._sketches.items()):
+                if sketch_scope == scope and sketch.count > 0:
+                    result[group] = {'effectif': sketch.count}
+                    result[group].update({q: sketch.quantile(q) for q in qs})
+            return result
+    
+    def _new_sketch(self):
+        return SalarySketch(self.relative_accuracy)
+    
+    def _catch_up(self, conn):
+        """
+        Applique les deltas du journal et persiste les buckets modifiés (exécuté par l'écrivain).
+        
+        Returns:
+            tuple: (sketches, séquence appliquée)
+        """
+        row = conn.execute("SELECT value FROM change_log_meta WHERE key = ?", (self.WATERMARK_KEY,)).fetchone()
+        stored_seq = row[0] if row else None
+        
+        # Sketches absents ou désynchronisés (autre processus) : relecture de l'état persisté
+        sketches = self._sketches
+        if sketches is None or stored_seq != self._seq:
+            sketches = self._load(conn) if stored_seq is not None else None
+        if sketches is None:
+            return self._rebuild(conn)
+        
+        changes = conn.execute(
+            "SELECT seq, operation, old_values, new_values FROM employee_changes WHERE seq > ? ORDER BY seq",
+            (stored_seq,)
+        ).fetchall()
+        pruned = conn.execute("SELECT value FROM change_log_meta WHERE key = 'pruned_through'").fetchone()
+        if (pruned and pruned[0] > stored_seq) or any(change[1] == 'RESET' for change in changes):
+            return self._rebuild(conn)
+        if not changes:
+            return sketches, stored_seq
+        
+        # Application des deltas : retrait des anciennes valeurs, ajout des nouvelles
+        touched = set()
+        for _, _, old_values, new_values in changes:
+            for values, sign in [(old_values, -1), (new_values, 1)]:
+                if values:
+                    touched.update(self._apply(sketches, json.loads(values), sign))
+        
+        new_seq = changes[-1][0]
+        self._persist(conn, sketches, touched, new_seq)
+        return sketches, new_seq
+    
+    def _apply(self, sketches, values, sign):
+        """Ajoute (sign=1) ou retire (sign=-1) une ligne de tous les sketches concernés."""
+        salary = values.get('salaire')
+        if salary is None:
+            return []
+        touched = []
+        for scope, column in SKETCH_SCOPES:
+            group = '' if column is None else values.get(column)
+            if group is None:
+                continue
+            key = (scope, group)
+            if key not in sketches:
+                sketches[key] = self._new_sketch()
+            bucket = sketches[key].add(salary, sign)
+            touched.append((scope, group, bucket))
+        return touched
+    
+    def _rebuild(self, conn):
+        """Reconstruit tous les sketches par une lecture complète (premier usage ou RESET)."""
+        seq_row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'employee_changes'").fetchone()
+        seq = seq_row[0] if seq_row else 0
+        
+        sketches = {}
+        cursor = conn.execute("SELECT departement, poste, salaire FROM employees WHERE salaire IS NOT NULL")
+        for departement, poste, salaire in cursor:
+            self._apply(sketches, {'departement': departement, 'poste': poste, 'salaire': salaire}, 1)
+        
+        conn.execute("DELETE FROM salary_sketch_buckets")
+        conn.execute("DELETE FROM salary_sketch_totals")
+        touched = [(scope, group, bucket) for (scope, group), sketch in sketches.items()
+                   for bucket in sketch.buckets]
+        self._persist(conn, sketches, touched, seq)
+        return sketches, seq
+    
+    def _load(self, conn):
+        """Relit les sketches persistés."""
+        sketches = {}
+        for scope, group, count, total in conn.execute(
+                "SELECT scope, grp, count, total FROM salary_sketch_totals"):
+            sketch = self._new_sketch()
+            sketch.count = count
+            sketch.total = total
+            sketches[(scope, group)] = sketch
+        for scope, group, bucket, count in conn.execute(
+                "SELECT scope, grp, bucket, count FROM salary_sketch_buckets"):
+            if (scope, group) in sketches:
+                sketches[(scope, group)].buckets[bucket] = count
+        return sketches
+    
+    def _persist(self, conn, sketches, touched, seq):
+        """Écrit les buckets modifiés, les totaux des groupes concernés et la séquence appliquée."""
+        groups = set()
+        for scope, group, bucket in touched:
+            groups.add((scope, group))
+            count = sketches[(scope, group)].buckets.get(bucket, 0)
+            if count:
+                conn.execute(
+                    "INSERT OR REPLACE INTO salary_sketch_buckets (scope, grp, bucket, count) VALUES (?, ?, ?, ?)",
+                    (scope, group, bucket, count)
+                )
+            else:
+                conn.execute(
+                    "DELETE FROM salary_sketch_buckets WHERE scope = ? AND grp = ? AND bucket = ?",
+                    (scope, group, bucket)
+                )
+        for scope, group in groups:
+            sketch = sketches[(scope, group)]
+            conn.execute(
+                "INSERT OR REPLACE INTO salary_sketch_totals (scope, grp, count, total) VALUES (?, ?, ?, ?)",
+                (scope, group, sketch.count, sketch.total)
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO change_log_meta (key, value) VALUES (?, ?)",
+            (self.WATERMARK_KEY, seq)
+        )
+
@@ -0,0 +1,492 @@
+"""
+Moteurs de stockage derrière EmployeeDatabase.
+Les lectures passent par une interface commune (StorageBackend) :
+- SQLiteStorage : le fichier employees.db (lectures transactionnelles, OLTP)
+- DuckDBStorage : copie colonnaire locale pour les lectures analytiques
+  (parcours larges, regroupements), synchronisée via le journal des modifications
+- MemoryReplicaStorage : réplique SQLite en mémoire de la table employees,
+  chargée par l'API backup puis tenue à jour par le journal des modifications
+Les écritures restent sur SQLite, par l'écrivain unique (models/writer.py).
+"""
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from models.writer import BUSY_TIMEOUT
+
+# Variable d'environnement choisissant le moteur des lectures analytiques
+ANALYTICS_BACKEND_ENV = 'EDM_ANALYTICS_BACKEND'
+
+# Intervalle (secondes) de vérification du fichier par la réplique en mémoire
+# (écritures d'un autre processus, non signalées par l'écrivain local)
+REPLICA_POLL_INTERVAL = 1.0
+
+# Attente maximale (secondes) de la fin des lectures en cours avant une synchronisation
+# de la réplique ; au-delà (parcours abandonné...), la lecture sert l'état précédent
+REPLICA_SYNC_TIMEOUT = 2.0
+
+
+class StorageBackend(ABC):
+    """
+    Interface de lecture commune aux moteurs de stockage.
+    Les requêtes utilisent des paramètres '?' et un SQL portable (SQLite/DuckDB).
+    """
+    
+    name = None
+    
+    # Le moteur dispose des index SQLite (fiches, classements, bornes de salaire)
+    indexed = False
+    
+    @abstractmethod
+    def read_sql(self, sql, params=None):
+        """
+        Exécute une requête et retourne le résultat.
+        
+        Returns:
+            pandas.DataFrame: Lignes retournées
+        """
+    
+    @abstractmethod
+    def fetchone(self, sql, params=None):
+        """
+        Exécute une requête et retourne la première ligne.
+        
+        Returns:
+            tuple: Première ligne, None si aucune
+        """
+    
+    @abstractmethod
+    def fetchall(self, sql, params=None):
+        """
+        Exécute une requête et retourne toutes les lignes.
+        
+        Returns:
+            list: Tuples des lignes
+        """
+    
+    @abstractmethod
+    def iter_batches(self, sql, params=None, batch_size=5000):
+        """
+        Parcourt le résultat d'une requête par lots.
+        
+        Yields:
+            list: Lot de tuples
+        """
+    
+    def sync(self):
+        """Rattrape les modifications de la base source (moteurs dérivés uniquement)."""
+    
+    def close(self):
+        """Libère les ressources du moteur."""
+
+
+class SQLiteStorage(StorageBackend):
+    """Lectures directes sur le fichier SQLite (une connexion par appel)."""
+    
+    name = 'sqlite'
+    indexed = True
+    
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Chemin vers le fichier de base de données SQLite
+        """
+        self.db_path = db_path
+    
+    def connect(self):
+        """Ouvre une connexion de lecture avec délai d'attente sur les verrous."""
+        return sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+    
+    def read_sql(self, sql, params=None):
+        conn = self.connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=list(params or []))
+        finally:
+            conn.close()
+    
+    def fetchone(self, sql, params=None):
+        conn = self.connect()
+        try:
+            return conn.execute(sql, list(params or [])).fetchone()
+        finally:
+            conn.close()
+    
+    def fetchall(self, sql, params=None):
+        conn = self.connect()
+        try:
+            return conn.execute(sql, list(params or [])).fetchall()
+        finally:
+            conn.close()
+    
+    def iter_batches(self, sql, params=None, batch_size=5000):
+        conn = self.connect()
+        try:
+            cursor = conn.execute(sql, list(params or []))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+
+class DuckDBStorage(StorageBackend):
+    """
+    Copie colonnaire (DuckDB, fichier local) de la table employees.
+    Avant chaque lecture, sync() applique les deltas du journal des
+    modifications de la base SQLite source (rechargement complet sur RESET).
+    """
+    
+    name = 'duckdb'
+    
+    def __init__(self, source, path=None):
+        """
+        Args:
+            source (EmployeeDatabase): Base SQLite de référence
+            path (str): Fichier DuckDB (par défaut : <base>.duckdb à côté du fichier SQLite)
+        """
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("Le moteur analytique 'duckdb' nécessite le paquet duckdb (pip install duckdb)")
+        
+        # Import local : models.database importe ce module
+        from models.database import EMPLOYEE_COLUMNS
+        self.columns = EMPLOYEE_COLUMNS
+        
+        self.source = source
+        self._lock = threading.Lock()
+        self.path = path or os.path.splitext(source.db_path)[0] + '.duckdb'
+        self._conn = duckdb.connect(self.path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS employees (
+                id BIGINT PRIMARY KEY,
+                nom VARCHAR,
+                email VARCHAR,
+                telephone VARCHAR,
+                departement VARCHAR,
+                poste VARCHAR,
+                salaire DOUBLE
+            )
+        """)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sync_state (seq BIGINT)")
+        row = self._conn.execute("SELECT seq FROM sync_state").fetchone()
+        self._seq = row[0] if row else None
+    
+    def _cursor(self):
+        """Curseur propre au thread appelant (la connexion DuckDB n'est pas partageable)."""
+        return self._conn.cursor()
+    
+    def read_sql(self, sql, params=None):
+        self.sync()
+        cursor = self._cursor()
+        try:
+            return cursor.execute(sql, list(params or [])).fetchdf()
+        finally:
+            cursor.close()
+    
+    def fetchone(self, sql, params=None):
+        self.sync()
+        cursor = self._cursor()
+        try:
+            return cursor.execute(sql, list(params or [])).fetchone()
+        finally:
+            cursor.close()
+    
+    def fetchall(self, sql, params=None):
+        self.sync()
+        cursor = self._cursor()
+        try:
+            return cursor.execute(sql, list(params or [])).fetchall()
+        finally:
+            cursor.close()
+    
+    def iter_batches(self, sql, params=None, batch_size=5000):
+        self.sync()
+        cursor = self._cursor()
+        try:
+            cursor.execute(sql, list(params or []))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+    
+    def sync(self):
+        """Applique les modifications de la base SQLite depuis la dernière synchronisation."""
+        with self._lock:
+            if self._seq == self.source.get_change_seq():
+                return
+            
+            cursor = self._cursor()
+            try:
+                cursor.execute("BEGIN TRANSACTION")
+                if self._seq is None:
+                    seq = self._reload(cursor)
+                else:
+                    # Journal purgé après notre séquence : changes_since retourne un RESET
+                    changes = self.source.changes_since(self._seq)
+                    if any(change['operation'] == 'RESET' for change in changes):
+                        seq = self._reload(cursor)
+                    else:
+                        seq = self._apply(cursor, changes)
+                cursor.execute("DELETE FROM sync_state")
+                cursor.execute("INSERT INTO sync_state VALUES (?)", [seq])
+                cursor.execute("COMMIT")
+                self._seq = seq
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            finally:
+                cursor.close()
+    
+    def _reload(self, cursor):
+        """
+        Recopie complète de la table SQLite (premier usage ou RESET).
+        La séquence est lue avant la copie : les deltas postérieurs seront
+        réappliqués, ce qui est sans effet (_apply remplace la ligne par id).
+        """
+        seq = self.source.get_change_seq()
+        cursor.execute("DELETE FROM employees")
+        select = f"SELECT {', '.join(self.columns)} FROM employees"
+        placeholders = ', '.join('?' for _ in self.columns)
+        for rows in self.source.storage.iter_batches(select, batch_size=50000):
+            cursor.executemany(f"INSERT INTO employees VALUES ({placeholders})", rows)
+        return seq
+    
+    def _apply(self, cursor, changes):
+        """Applique les deltas INSERT/UPDATE/DELETE du journal."""
+        value_columns = self.columns[1:]
+        placeholders = ', '.join('?' for _ in self.columns)
+        seq = self._seq
+        for change in changes:
+            cursor.execute("DELETE FROM employees WHERE id = ?", [change['id']])
+            if change['operation'] in ('INSERT', 'UPDATE'):
+                values = [change['new'].get(col) for col in value_columns]
+                cursor.execute(f"INSERT INTO employees VALUES ({placeholders})", [change['id']] + values)
+            seq = change['seq']
+        return seq
+    
+    def close(self):
+        self._conn.close()
+
+
+class MemoryReplicaStorage(StorageBackend):
+    """
+    Réplique en mémoire (SQLite ':memory:') de la table employees et de ses index.
+    Chargée au démarrage par ATTACH du fichier, elle applique ensuite les deltas du
+    journal quand l'écrivain signale un COMMIT : les lectures ne touchent plus le
+    fichier et n'attendent jamais un import en cours. Les écritures restent sur le fichier.
+    """
+    
+    name = 'memory'
+    indexed = True
+    
+    def __init__(self, source, poll_interval=REPLICA_POLL_INTERVAL, sync_timeout=REPLICA_SYNC_TIMEOUT):
+        """
+        Args:
+            source (EmployeeDatabase): Base SQLite de référence
+            poll_interval (float): Intervalle de vérification du fichier (écritures externes)
+            sync_timeout (float): Attente maximale de la fin des lectures en cours
+        """
+        # Imports locaux : models.database importe ce module
+        from models.database import LOGGED_COLUMNS, RESET_OPERATION
+        from models.search import search_key_series
+        self.columns = ['id'] + LOGGED_COLUMNS
+        self.reset_operation = RESET_OPERATION
+        self.search_key_series = search_key_series
+        
+        self.source = source
+        self.poll_interval = poll_interval
+        self.sync_timeout = sync_timeout
+        self._conn = sqlite3.connect(':memory:', timeout=BUSY_TIMEOUT, check_same_thread=False)
+        
+        # Lectures concurrentes ; une synchronisation attend la fin des lectures en cours
+        self._state = threading.Condition()
+        self._readers = 0
+        self._local = threading.local()
+        self._seq = None
+        self._dirty = True
+        self._checked_at = 0.0
+        
+        source.writer.add_commit_listener(self._on_commit)
+        self.sync()
+    
+    def _on_commit(self, count):
+        # Appelé par le thread d'écriture : simple marquage, la synchronisation est faite à la lecture
+        self._dirty = True
+    
+    def _begin_read(self):
+        self.sync()
+        with self._state:
+            self._readers += 1
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+    
+    def _end_read(self):
+        self._local.depth -= 1
+        with self._state:
+            self._readers -= 1
+            if not self._readers:
+                self._state.notify_all()
+    
+    def read_sql(self, sql, params=None):
+        self._begin_read()
+        try:
+            return pd.read_sql_query(sql, self._conn, params=list(params or []))
+        finally:
+            self._end_read()
+    
+    def fetchone(self, sql, params=None):
+        self._begin_read()
+        try:
+            return self._conn.execute(sql, list(params or [])).fetchone()
+        finally:
+            self._end_read()
+    
+    def fetchall(self, sql, params=None):
+        self._begin_read()
+        try:
+            return self._conn.execute(sql, list(params or [])).fetchall()
+        finally:
+            self._end_read()
+    
+    def iter_batches(self, sql, params=None, batch_size=5000):
+        # La réplique reste figée pendant le parcours (export cohérent)
+        self._begin_read()
+        try:
+            cursor = self._conn.execute(sql, list(params or []))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            self._end_read()
+    
+    def sync(self):
+        """Applique les modifications validées depuis la dernière synchronisation."""
+        # Lecture imbriquée dans un parcours du même thread : il garde sa vue
+        if getattr(self._local, 'depth', 0):
+            return
+        with self._state:
+            if not self._dirty and self._seq is not None:
+                if time.monotonic() - self._checked_at < self.poll_interval:
+                    return
+                self._checked_at = time.monotonic()
+                if self.source.get_change_seq() == self._seq:
+                    return
+            # Un parcours abandonné sans être fermé ne bloque pas les lectures :
+            # passé le délai, la réplique reste sur l'état précédent jusqu'à la lecture suivante
+            if not self._state.wait_for(lambda: not self._readers, self.sync_timeout):
+                self._dirty = True
+                return
+            
+            # Marque levée avant la lecture du journal : un COMMIT concurrent la repositionne
+            self._dirty = False
+            self._checked_at = time.monotonic()
+            try:
+                if self._seq is None:
+                    self._seq = self._reload()
+                else:
+                    changes = self.source.changes_since(self._seq)
+                    if any(change['operation'] == self.reset_operation for change in changes):
+                        self._seq = self._reload()
+                    elif changes:
+                        self._seq = self._apply(changes)
+            except Exception:
+                self._dirty = True
+                raise
+    
+    def _reload(self):
+        """
+        Recopie de la seule table employees (premier usage, RESET ou purge) :
+        le fichier est attaché, la table copiée par INSERT ... SELECT, puis ses
+        index recréés après le chargement. Journal, index de recherche et autres
+        tables ne sont pas copiés.
+        """
+        conn = self._conn
+        conn.execute("ATTACH DATABASE ? AS source", [self.source.db_path])
+        try:
+            # Séquence et copie lues dans la même transaction de lecture du fichier
+            conn.execute("BEGIN")
+            try:
+                schema = conn.execute(
+                    "SELECT type, sql FROM source.sqlite_master "
+                    "WHERE tbl_name = 'employees' AND type IN ('table', 'index') AND sql IS NOT NULL"
+                ).fetchall()
+                row = conn.execute(
+                    "SELECT seq FROM source.sqlite_sequence WHERE name = 'employee_changes'"
+                ).fetchone()
+                seq = row[0] if row else 0
+                
+                conn.execute("DROP TABLE IF EXISTS main.employees")
+                conn.execute(next(sql for kind, sql in schema if kind == 'table'))
+                conn.execute("INSERT INTO main.employees SELECT * FROM source.employees")
+                for kind, sql in schema:
+                    if kind == 'index':
+                        conn.execute(sql)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.execute("DETACH DATABASE source")
+        return seq
+    
+    def _apply(self, changes):
+        """
+        Applique les deltas INSERT/UPDATE/DELETE du journal en une transaction.
+        La colonne dérivée cle_recherche, absente du journal, est recalculée
+        (même fonction que l'import) pour les lignes écrites.
+        """
+        writes = [change for change in changes if change['operation'] != 'DELETE']
+        keys = []
+        if writes:
+            names = pd.Series([change['new'].get('nom') for change in writes], dtype=object)
+            emails = pd.Series([change['new'].get('email') for change in writes], dtype=object)
+            keys = list(self.search_key_series(names, emails))
+        
+        columns = self.columns + ['cle_recherche']
+        placeholders = ', '.join('?' for _ in columns)
+        insert = f"INSERT OR REPLACE INTO employees ({', '.join(columns)}) VALUES ({placeholders})"
+        keys = iter(keys)
+        with self._conn:
+            for change in changes:
+                if change['operation'] == 'DELETE':
+                    self._conn.execute("DELETE FROM employees WHERE id = ?", [change['id']])
+                else:
+                    values = [change['new'].get(col) for col in self.columns[1:]]
+                    self._conn.execute(insert, [change['id']] + values + [next(keys)])
+        return changes[-1]['seq']
+    
+    def close(self):
+        self.source.writer.remove_commit_listener(self._on_commit)
+        self._conn.close()
+
+
+def create_analytics_backend(name, db):
+    """
+    Construit le moteur des lectures analytiques choisi par configuration.
+    
+    Args:
+        name (str): 'sqlite', 'duckdb' ou 'memory' (None : variable EDM_ANALYTICS_BACKEND, sinon 'sqlite')
+        db (EmployeeDatabase): Base SQLite de référence
+    
+    Returns:
+        StorageBackend: Moteur analytique
+    """
+    name = (name or os.environ.get(ANALYTICS_BACKEND_ENV) or 'sqlite').lower()
+    if name == 'sqlite':
+        return db.storage
+    if name == 'duckdb':
+        return DuckDBStorage(db)
+    if name == 'memory':
+        return MemoryReplicaStorage(db)
+    raise ValueError(f"Moteur analytique inconnu: {name}")
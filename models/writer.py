@@ -0,0 +1,370 @@
+"""
+Écrivain unique pour la base SQLite.
+Toutes les écritures de toutes les sessions Streamlit passent par une file
+consommée par un thread dédié, propriétaire de la seule connexion en écriture.
+Les opérations en attente sont regroupées dans une même transaction (group commit).
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+# Délai d'attente (secondes) d'une connexion bloquée par un verrou SQLite
+BUSY_TIMEOUT = 30
+
+# Intervalle (secondes) entre deux tentatives de mise en file quand elle est pleine
+SUBMIT_RETRY_INTERVAL = 0.01
+
+# Registre des écrivains par fichier : une seule connexion d'écriture par base
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+class WriterBusyError(Exception):
+    """Levée quand la file d'écriture reste pleine au-delà du délai autorisé."""
+
+
+class _WriteRequest:
+    """Opération d'écriture en attente et son résultat futur."""
+    
+    def __init__(self, operation, args, transactional):
+        self.operation = operation
+        self.args = args
+        self.transactional = transactional
+        self.future = Future()
+
+
+class DatabaseWriter:
+    """
+    Thread d'écriture propriétaire de la connexion SQLite en écriture.
+    
+    Chaque opération est une fonction operation(conn, *args) exécutée sur le
+    thread d'écriture. Elle ne doit ni valider ni annuler la transaction :
+    l'écrivain l'isole dans un SAVEPOINT et valide le lot entier en un COMMIT.
+    """
+    
+    def __init__(self, db_path, max_pending=256, max_batch=64, submit_timeout=30):
+        """
+        Démarre le thread d'écriture.
+        
+        Args:
+            db_path (str): Chemin vers le fichier de base de données SQLite
+            max_pending (int): Taille maximale de la file (contre-pression)
+            max_batch (int): Nombre maximal d'opérations par transaction
+            submit_timeout (float): Attente maximale (secondes) quand la file est pleine
+        """
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.submit_timeout = submit_timeout
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._commit_listeners = []
+        self._closed = False
+        # Erreur qui a arrêté le thread d'écriture (None tant qu'il fonctionne)
+        self.last_error = None
+        # Vérification de l'arrêt et mise en file sous un même verrou (aucune opération après la sentinelle)
+        self._state_lock = threading.Lock()
+        # Nombre de bases (EmployeeDatabase) partageant cet écrivain via for_path
+        self._refs = 0
+        
+        # Compteurs exposés pour le suivi (transactions, opérations, taille max de lot)
+        self.stats = {'commits': 0, 'operations': 0, 'largest_batch': 0}
+        
+        self._thread = threading.Thread(target=self._run, name=f"sqlite-writer:{os.path.basename(db_path)}",
+                                        daemon=True)
+        self._thread.start()
+    
+    @classmethod
+    def for_path(cls, db_path):
+        """
+        Retourne l'écrivain partagé d'un fichier de base (créé au premier appel).
+        Chaque appel prend une référence, rendue par release().
+        
+        Args:
+            db_path (str): Chemin vers le fichier de base de données SQLite
+        
+        Returns:
+            DatabaseWriter: Écrivain unique pour ce fichier
+        """
+        key = os.path.abspath(db_path)
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None or writer._closed:
+                writer = cls(db_path)
+                _writers[key] = writer
+            writer._refs += 1
+            return writer
+    
+    def release(self):
+        """
+        Rend une référence prise par for_path.
+        L'écrivain n'est arrêté (et retiré du registre) qu'à la dernière référence rendue.
+        """
+        with _writers_lock:
+            self._refs = max(self._refs - 1, 0)
+            if self._refs:
+                return
+            key = os.path.abspath(self.db_path)
+            if _writers.get(key) is self:
+                del _writers[key]
+        self.close()
+    
+    def submit(self, operation, *args, transactional=True):
+        """
+        Place une opération d'écriture dans la file.
+        Bloque si la file est pleine (contre-pression), au plus submit_timeout secondes.
+        
+        Args:
+            operation (callable): Fonction operation(conn, *args)
+            *args: Arguments transmis à l'opération
+            transactional (bool): False pour les commandes interdites en transaction
+                (VACUUM, PRAGMA journal_mode...), exécutées seules
+        
+        Returns:
+            concurrent.futures.Future: Résultat de l'opération
+        """
+        request = _WriteRequest(operation, args, transactional)
+        deadline = time.monotonic() + self.submit_timeout
+        while True:
+            # Pas d'attente sous le verrou : close() doit pouvoir le prendre pendant la contre-pression
+            with self._state_lock:
+                if self._closed:
+                    raise RuntimeError("L'écrivain de la base est arrêté")
+                try:
+                    self._queue.put_nowait(request)
+                    return request.future
+                except queue.Full:
+                    pass
+            if time.monotonic() >= deadline:
+                raise WriterBusyError("File d'écriture saturée, réessayez dans quelques instants")
+            time.sleep(SUBMIT_RETRY_INTERVAL)
+    
+    def execute(self, operation, *args, transactional=True):
+        """
+        Exécute une opération d'écriture et attend son résultat.
+        
+        Returns:
+            Valeur retournée par l'opération (ses exceptions sont propagées)
+        """
+        return self.submit(operation, *args, transactional=transactional).result()
+    
+    def add_commit_listener(self, listener):
+        """
+        Enregistre une fonction appelée après chaque COMMIT, avec le nombre d'opérations validées.
+        
+        Args:
+            listener (callable): Fonction listener(count)
+        """
+        self._commit_listeners.append(listener)
+    
+    def remove_commit_listener(self, listener):
+        """
+        Retire un écouteur enregistré par add_commit_listener (sans effet s'il est absent).
+        
+        Args:
+            listener (callable): Fonction enregistrée
+        """
+        try:
+            self._commit_listeners.remove(listener)
+        except ValueError:
+            pass
+    
+    def close(self):
+        """Vide la file puis arrête le thread d'écriture."""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+        # Plus aucune mise en file possible : la sentinelle est la dernière entrée
+        self._queue.put(None)
+        self._thread.join()
+        self._fail_pending()
+    
+    def _fail_pending(self, cause=None):
+        """Fait échouer les opérations restées en file après l'arrêt (aucune ne doit attendre indéfiniment)."""
+        error = RuntimeError("L'écrivain de la base est arrêté")
+        error.__cause__ = cause
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None and request.future.set_running_or_notify_cancel():
+                request.future.set_exception(error)
+    
+    def _run(self):
+        """Boucle du thread d'écriture : regroupe les opérations en attente et les valide."""
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                               check_same_thread=False)
+        try:
+            while True:
+                request = self._queue.get()
+                if request is None:
+                    break
+                
+                # Les opérations hors transaction sont exécutées seules
+                if not request.transactional:
+                    self._run_standalone(conn, request)
+                    continue
+                
+                # Regroupement des opérations déjà en attente (group commit)
+                batch = [request]
+                stop = False
+                while len(batch) < self.max_batch:
+                    try:
+                        pending = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if pending is None:
+                        stop = True
+                        break
+                    if not pending.transactional:
+                        self._run_batch(conn, batch)
+                        batch = []
+                        self._run_standalone(conn, pending)
+                        continue
+                    batch.append(pending)
+                
+                if batch:
+                    self._run_batch(conn, batch)
+                if stop:
+                    break
+        except BaseException as e:
+            # Thread arrêté par une erreur inattendue : l'écrivain est marqué arrêté
+            # (for_path en crée un nouveau) et aucune opération en file n'attend indéfiniment
+            self.last_error = e
+            with self._state_lock:
+                self._closed = True
+            self._fail_pending(e)
+        finally:
+            conn.close()
+    
+    def _run_standalone(self, conn, request):
+        """Exécute une opération hors transaction (VACUUM, PRAGMA...)."""
+        if not request.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = request.operation(conn, *request.args)
+        except BaseException as e:
+            # L'opération peut avoir validé sa propre transaction avant d'échouer
+            self._notify_commit(1)
+            request.future.set_exception(e)
+        else:
+            # L'opération peut avoir validé sa propre transaction (restauration...)
+            self._notify_commit(1)
+            request.future.set_result(result)
+    
+    def _run_batch(self, conn, batch):
+        """
+        Exécute un lot d'opérations dans une seule transaction.
+        Chaque opération est isolée dans un SAVEPOINT : un échec n'annule que celle-ci.
+        """
+        try:
+            self._execute_batch(conn, batch)
+        except BaseException as e:
+            # Erreur inattendue (ROLLBACK impossible...) : aucun appelant du lot ne reste en attente
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            raise
+    
+    def _execute_batch(self, conn, batch):
+        """Corps de _run_batch : BEGIN, un SAVEPOINT par opération, COMMIT."""
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            for request in batch:
+                if request.future.set_running_or_notify_cancel():
+                    request.future.set_exception(e)
+            return
+        
+        for request in batch:
+            if not request.future.set_running_or_notify_cancel():
+                continue
+            # Transaction annulée par SQLite (disque plein...) : un SAVEPOINT en ouvrirait
+            # une nouvelle, validée à tort par le COMMIT du lot. L'échec est signalé plus bas
+            if not conn.in_transaction:
+                outcomes.append((request, None, None))
+                continue
+            try:
+                conn.execute("SAVEPOINT operation")
+            except sqlite3.Error as e:
+                outcomes.append((request, None, e))
+                continue
+            try:
+                result = request.operation(conn, *request.args)
+            except BaseException as e:
+                # Annulation de cette seule opération (la transaction peut déjà être annulée)
+                try:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK TO operation")
+                        conn.execute("RELEASE operation")
+                except sqlite3.Error:
+                    self._abort(conn)
+                outcomes.append((request, None, e))
+            else:
+                try:
+                    conn.execute("RELEASE operation")
+                except sqlite3.Error as e:
+                    self._abort(conn)
+                    outcomes.append((request, None, e))
+                    continue
+                outcomes.append((request, result, None))
+        
+        # Transaction annulée par SQLite (disque plein...) : rien n'a été écrit
+        if not conn.in_transaction:
+            error = sqlite3.OperationalError("Transaction annulée par SQLite")
+            for request, _, failure in outcomes:
+                request.future.set_exception(failure or error)
+            return
+        
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for request, _, error in outcomes:
+                request.future.set_exception(error or e)
+            return
+        
+        self.stats['commits'] += 1
+        self.stats['operations'] += len(outcomes)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(outcomes))
+        
+        # Écouteurs prévenus avant les appelants : une lecture qui suit l'écriture voit le COMMIT
+        self._notify_commit(len(outcomes))
+        
+        for request, result, error in outcomes:
+            if error is not None:
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(result)
+    
+    @staticmethod
+    def _abort(conn):
+        """Annule la transaction entière quand l'état de ses SAVEPOINT n'est plus sûr."""
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+    
+    def _notify_commit(self, count):
+        """Prévient les écouteurs d'un COMMIT (leurs erreurs sont ignorées)."""
+        for listener in self._commit_listeners:
+            try:
+                listener(count)
+            except Exception:
+                pass
+
+
+def close_all_writers():
+    """Arrête proprement tous les écrivains (appelé à la sortie du processus)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+atexit.register(close_all_writers)
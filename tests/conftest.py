@@ -0,0 +1,60 @@
+"""
+Fixtures communes : base temporaire par test, ouverte avec chaque moteur analytique.
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import EmployeeDatabase  # noqa: E402
+
+# Moteurs des lectures analytiques (voir models/storage.py)
+ANALYTICS_BACKENDS = ['sqlite', 'duckdb', 'memory']
+
+# Jeu de référence : valeurs connues pour vérifier filtres, statistiques et exports
+SAMPLE_EMPLOYEES = pd.DataFrame([
+    {'nom': 'Ndong Marie', 'email': 'marie.ndong@exemple.ga', 'telephone': '+241061234010',
+     'departement': 'Finance', 'poste': 'Comptable', 'salaire': 450000.0},
+    {'nom': 'Obiang Paul', 'email': 'paul.obiang@exemple.ga', 'telephone': None,
+     'departement': 'Finance', 'poste': 'Directeur', 'salaire': 1200000.0},
+    {'nom': 'Moussavou Léa', 'email': 'lea.moussavou@exemple.ga', 'telephone': '+241077001122',
+     'departement': 'Informatique', 'poste': 'Développeur', 'salaire': 800000.0},
+    {'nom': 'Nze Jean', 'email': 'jean.nze@exemple.ga', 'telephone': None,
+     'departement': 'Informatique', 'poste': 'Développeur', 'salaire': 650000.0},
+    {'nom': 'Mba Claire', 'email': 'claire.mba@exemple.ga', 'telephone': None,
+     'departement': 'RH', 'poste': 'Chargée RH', 'salaire': 500000.0},
+])
+
+
+@pytest.fixture(params=ANALYTICS_BACKENDS)
+def db(request, tmp_path):
+    """Base vide ouverte avec le moteur analytique du paramètre (duckdb ignoré s'il est absent)."""
+    if request.param == 'duckdb':
+        pytest.importorskip('duckdb')
+    database = EmployeeDatabase(str(tmp_path / 'employees.db'), analytics_backend=request.param)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def sample_db(db):
+    """Base chargée avec SAMPLE_EMPLOYEES."""
+    db.insert_from_dataframe(SAMPLE_EMPLOYEES)
+    return db
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """Base SQLite seule (lectures analytiques comprises), chargée avec SAMPLE_EMPLOYEES."""
+    database = EmployeeDatabase(str(tmp_path / 'employees.db'), analytics_backend='sqlite')
+    database.insert_from_dataframe(SAMPLE_EMPLOYEES)
+    yield database
+    database.close()
+
+
+def first_employee_id(db):
+    """ID du premier employé (ordre des IDs)."""
+    return int(db.get_filtered_data(None, ['id'], 'id', limit=1)['id'].iloc[0])
@@ -0,0 +1,138 @@
+"""
+Mêmes assertions CRUD, filtres, statistiques et exports pour chaque moteur
+analytique (sqlite, duckdb, memory) : les lectures doivent être identiques
+quel que soit le moteur, y compris juste après une écriture.
+"""
+import pytest
+from openpyxl import load_workbook
+
+from controllers.excel_controller import ExcelController
+from models.database import EMPLOYEE_COLUMNS
+from tests.conftest import SAMPLE_EMPLOYEES
+
+
+def _id_of(db, email):
+    data = db.get_filtered_data({'recherche': email}, ['id', 'email'])
+    assert list(data['email']) == [email]
+    return int(data['id'].iloc[0])
+
+
+def test_insert_and_read(sample_db):
+    assert sample_db.get_employee_count() == len(SAMPLE_EMPLOYEES)
+    data = sample_db.get_all_data()
+    assert list(data.columns) == EMPLOYEE_COLUMNS
+    assert sorted(data['email']) == sorted(SAMPLE_EMPLOYEES['email'])
+
+
+def test_update_is_visible_to_reads(sample_db):
+    employee_id = _id_of(sample_db, 'jean.nze@exemple.ga')
+    sample_db.update_employee(employee_id, 'salaire', 700000.0)
+    employee = sample_db.get_employee(employee_id)
+    assert employee['salaire'] == 700000.0
+    assert employee['version'] == 2
+    assert sample_db.get_salary_summary()['salaire_moyen'] == pytest.approx(
+        (SAMPLE_EMPLOYEES['salaire'].sum() - 650000.0 + 700000.0) / len(SAMPLE_EMPLOYEES)
+    )
+
+
+def test_delete_is_visible_to_reads(sample_db):
+    employee_id = _id_of(sample_db, 'paul.obiang@exemple.ga')
+    sample_db.delete_employee(employee_id)
+    assert sample_db.get_employee(employee_id) is None
+    assert sample_db.get_employee_count() == len(SAMPLE_EMPLOYEES) - 1
+    assert sample_db.get_salary_range() == (450000.0, 800000.0)
+
+
+def test_clear_all_data(sample_db):
+    sample_db.clear_all_data()
+    assert sample_db.get_employee_count() == 0
+    assert sample_db.get_all_data().empty
+
+
+@pytest.mark.parametrize('filters, expected', [
+    ({'departement': ['Finance']}, {'marie.ndong@exemple.ga', 'paul.obiang@exemple.ga'}),
+    ({'poste': ['Développeur'], 'salaire_min': 700000}, {'lea.moussavou@exemple.ga'}),
+    ({'salaire_min': 500000, 'salaire_max': 800000},
+     {'lea.moussavou@exemple.ga', 'jean.nze@exemple.ga', 'claire.mba@exemple.ga'}),
+    ({'recherche': 'obiang'}, {'paul.obiang@exemple.ga'}),
+    ({'departement': ['Inconnu']}, set()),
+])
+def test_filters(sample_db, filters, expected):
+    data = sample_db.get_filtered_data(filters, ['email'])
+    assert set(data['email']) == expected
+    assert sample_db.count_filtered(filters) == len(expected)
+
+
+def test_sort_and_pages(sample_db):
+    first = sample_db.get_filtered_data(None, ['salaire'], 'salaire', False, limit=2, offset=0)
+    second = sample_db.get_filtered_data(None, ['salaire'], 'salaire', False, limit=2, offset=2)
+    assert list(first['salaire']) == [1200000.0, 800000.0]
+    assert list(second['salaire']) == [650000.0, 500000.0]
+
+
+def test_statistics(sample_db):
+    stats = ExcelController(sample_db).get_statistics()
+    assert stats['total_employes'] == 5
+    assert stats['salaire_min'] == 450000.0
+    assert stats['salaire_max'] == 1200000.0
+    assert stats['salaire_moyen'] == pytest.approx(720000.0)
+    assert stats['nombre_departements'] == 3
+    assert stats['nombre_postes'] == 4
+    # Médiane estimée par le sketch : erreur relative d'au plus 1 %
+    assert stats['salaire_median'] == pytest.approx(650000.0, rel=0.01)
+
+
+def test_distinct_values(sample_db):
+    assert sorted(sample_db.get_distinct_values('departement')) == ['Finance', 'Informatique', 'RH']
+
+
+def test_export_filtered_sorted(sample_db, tmp_path):
+    path = str(tmp_path / 'export.xlsx')
+    result = ExcelController(sample_db).export_to_excel(
+        path, {'departement': ['Finance', 'Informatique']}, ['nom', 'salaire'], 'salaire', use_cache=False
+    )
+    assert result['success'], result['message']
+    rows = list(load_workbook(path, read_only=True).active.iter_rows(values_only=True))
+    assert rows[0] == ('nom', 'salaire')
+    assert [row[1] for row in rows[1:]] == [450000.0, 650000.0, 800000.0, 1200000.0]
+
+
+def test_export_without_rows(db, tmp_path):
+    result = ExcelController(db).export_to_excel(str(tmp_path / 'vide.xlsx'), use_cache=False)
+    assert not result['success']
+    assert result['path'] is None
+
+
+def test_report_sheets(sample_db, tmp_path):
+    path = str(tmp_path / 'rapport.xlsx')
+    result = ExcelController(sample_db).export_report(path, use_cache=False)
+    assert result['success'], result['message']
+    workbook = load_workbook(path, read_only=True)
+    assert workbook.sheetnames == ['Stats Départements', 'Stats Postes', 'Données', 'Finance', 'Informatique', 'RH']
+    summary = list(workbook['Stats Départements'].iter_rows(values_only=True))
+    assert summary[1] == ('Finance', 2, 825000, 1200000, 450000)
+
+
+def test_report_without_rows(db, tmp_path):
+    result = ExcelController(db).export_report(str(tmp_path / 'vide.xlsx'), use_cache=False)
+    assert not result['success']
+    assert not (tmp_path / 'vide.xlsx').exists()
+
+
+def test_salary_histogram(sample_db):
+    bins = sample_db.get_salary_histogram(3)
+    assert list(bins.columns) == ['debut', 'fin', 'effectif']
+    # Tranches de 250 000 à partir de 450 000 ; le maximum tombe dans la dernière
+    assert list(bins['debut']) == [450000.0, 700000.0, 950000.0]
+    assert list(bins['effectif']) == [3, 1, 1]
+
+
+def test_salary_histogram_without_rows(db):
+    assert db.get_salary_histogram(3).empty
+
+
+def test_salary_sample(sample_db):
+    sample = sample_db.get_salary_sample(max_rows=2)
+    assert list(sample.columns) == ['salaire', 'departement', 'poste']
+    assert len(sample) <= 2
+    assert set(sample['salaire']) <= set(SAMPLE_EMPLOYEES['salaire'])
@@ -0,0 +1,121 @@
+"""
+Rotation des instantanés : les sauvegardes périodiques n'effacent pas les
+instantanés manuels ou de sécurité. Restauration : données et lectures
+analytiques remplacées, journal et compteur d'IDs qui ne reculent pas.
+"""
+import os
+import sqlite3
+import time
+
+import pytest
+
+from models.backup import BackupManager
+from models.database import EmployeeDatabase, RESET_OPERATION
+from tests.conftest import SAMPLE_EMPLOYEES, first_employee_id
+
+
+def test_auto_snapshots_do_not_rotate_labeled_ones(tmp_path):
+    db = EmployeeDatabase(str(tmp_path / 'employees.db'), analytics_backend='sqlite')
+    backups = BackupManager(db, retention=2, labeled_retention=5)
+    try:
+        backups.backup('avant-vidage').result()
+        backups.backup().result()
+        for _ in range(4):
+            backups.backup('auto').result()
+
+        labels = [snapshot['libelle'] for snapshot in backups.list_backups()]
+        assert labels.count('auto') == 2
+        assert 'avant-vidage' in labels
+        assert None in labels
+    finally:
+        backups.stop()
+        db.close()
+
+
+def test_labeled_snapshots_expire_by_age(tmp_path):
+    db = EmployeeDatabase(str(tmp_path / 'employees.db'), analytics_backend='sqlite')
+    backups = BackupManager(db, labeled_max_age_days=30)
+    try:
+        old = backups.backup('avant-restauration').result()
+        # Instantané daté d'il y a 40 jours (la date est lue dans le nom du fichier)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(time.time() - 40 * 86400))
+        aged = os.path.join(backups.backup_dir, f"{backups.base_name}-{stamp}-000000-avant-restauration.db")
+        os.replace(old['chemin'], aged)
+
+        backups.backup('avant-vidage').result()
+        assert [snapshot['libelle'] for snapshot in backups.list_backups()] == ['avant-vidage']
+    finally:
+        backups.stop()
+        db.close()
+
+
+def test_snapshot_is_standalone_copy(sqlite_db):
+    backups = BackupManager(sqlite_db)
+    try:
+        snapshot = backups.backup().result()
+        # Journal classique : pas de fichiers -wal/-shm à conserver avec l'instantané
+        assert not os.path.exists(snapshot['chemin'] + '-wal')
+        conn = sqlite3.connect(snapshot['chemin'])
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'delete'
+        assert conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0] == len(SAMPLE_EMPLOYEES)
+        conn.close()
+    finally:
+        backups.stop()
+
+
+def test_restore_replaces_rows_and_logs_reset(db):
+    db.insert_from_dataframe(SAMPLE_EMPLOYEES)
+    backups = BackupManager(db)
+    try:
+        snapshot = backups.backup().result()
+        db.clear_all_data()
+        db.insert_from_dataframe(SAMPLE_EMPLOYEES.head(1))
+        last_id = first_employee_id(db)
+        seq = db.get_change_seq()
+
+        assert backups.restore(snapshot['nom']) == len(SAMPLE_EMPLOYEES)
+        # Lectures analytiques à jour quel que soit le moteur
+        assert db.get_employee_count() == len(SAMPLE_EMPLOYEES)
+        assert sorted(db.get_all_data()['email']) == sorted(SAMPLE_EMPLOYEES['email'])
+        assert db.get_filtered_data({'recherche': 'obiang'}, ['email'])['email'].tolist() == ['paul.obiang@exemple.ga']
+
+        # Le journal continue sa séquence avec un RESET ; le compteur d'IDs ne recule pas
+        assert [change['operation'] for change in db.changes_since(seq)] == [RESET_OPERATION]
+        db.insert_from_dataframe(SAMPLE_EMPLOYEES.head(1))
+        assert db.get_filtered_data(None, ['id'], 'id', False, limit=1)['id'].iloc[0] > last_id
+
+        # État écrasé conservé par l'instantané de sécurité
+        assert [item['libelle'] for item in backups.list_backups()][:1] == ['avant-restauration']
+    finally:
+        backups.stop()
+
+
+def test_restore_rejects_unknown_snapshots(sqlite_db, tmp_path):
+    backups = BackupManager(sqlite_db)
+    try:
+        outside = tmp_path / 'employees-20240101-000000-000000.db'
+        outside.write_bytes(b'')
+        for name in ['inconnu.db', '../' + outside.name, 'employees-20240101-000000-000001.db']:
+            with pytest.raises(ValueError):
+                backups.restore(name, safety_backup=False)
+        assert sqlite_db.get_employee_count() == len(SAMPLE_EMPLOYEES)
+    finally:
+        backups.stop()
+
+
+def test_failed_restore_leaves_data_untouched(sqlite_db):
+    backups = BackupManager(sqlite_db)
+    try:
+        os.makedirs(backups.backup_dir, exist_ok=True)
+        name = f"{backups.base_name}-20240101-000000-000000.db"
+        conn = sqlite3.connect(os.path.join(backups.backup_dir, name))
+        conn.execute("CREATE TABLE autre (valeur INTEGER)")
+        conn.close()
+        seq = sqlite_db.get_change_seq()
+
+        with pytest.raises(ValueError):
+            backups.restore(name, safety_backup=False)
+        assert sqlite_db.get_employee_count() == len(SAMPLE_EMPLOYEES)
+        assert sqlite_db.get_change_seq() == seq
+    finally:
+        backups.stop()
@@ -0,0 +1,60 @@
+"""
+Chargement en masse : index et triggers du journal restaurés après le
+chargement ou après un échec, une seule entrée RESET au journal.
+"""
+import sqlite3
+
+import pytest
+
+from models.database import EMPLOYEE_INDEXES, RESET_OPERATION
+from tests.conftest import SAMPLE_EMPLOYEES, first_employee_id
+
+
+def _schema(db, kind):
+    conn = sqlite3.connect(db.db_path)
+    names = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = ? AND tbl_name = 'employees'", (kind,)
+    )}
+    conn.close()
+    return names
+
+
+def test_bulk_load_restores_indexes_and_triggers(sqlite_db):
+    triggers = _schema(sqlite_db, 'trigger')
+    seq = sqlite_db.get_change_seq()
+
+    assert sqlite_db.bulk_load(SAMPLE_EMPLOYEES) == len(SAMPLE_EMPLOYEES)
+    assert sqlite_db.get_employee_count() == 2 * len(SAMPLE_EMPLOYEES)
+    assert set(EMPLOYEE_INDEXES) <= _schema(sqlite_db, 'index')
+    assert _schema(sqlite_db, 'trigger') == triggers
+
+    # Une seule entrée RESET pour tout le chargement
+    assert [change['operation'] for change in sqlite_db.changes_since(seq)] == [RESET_OPERATION]
+
+    # Les triggers rétablis journalisent de nouveau les écritures suivantes
+    seq = sqlite_db.get_change_seq()
+    sqlite_db.update_employee(first_employee_id(sqlite_db), 'salaire', 460000.0)
+    assert [change['operation'] for change in sqlite_db.changes_since(seq)] == ['UPDATE']
+
+
+def test_bulk_load_failure_rolls_back_everything(sqlite_db):
+    indexes, triggers = _schema(sqlite_db, 'index'), _schema(sqlite_db, 'trigger')
+    seq = sqlite_db.get_change_seq()
+
+    def failing(conn, count):
+        raise ValueError("registre indisponible")
+    with pytest.raises(ValueError):
+        sqlite_db.bulk_load(SAMPLE_EMPLOYEES, on_insert=failing)
+
+    assert sqlite_db.get_employee_count() == len(SAMPLE_EMPLOYEES)
+    assert _schema(sqlite_db, 'index') == indexes
+    assert _schema(sqlite_db, 'trigger') == triggers
+    assert sqlite_db.changes_since(seq) == []
+
+
+def test_bulk_load_restores_writer_pragmas(sqlite_db):
+    def settings(conn):
+        return [conn.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in ('synchronous', 'cache_size')]
+    before = sqlite_db.writer.execute(settings)
+    sqlite_db.bulk_load(SAMPLE_EMPLOYEES)
+    assert sqlite_db.writer.execute(settings) == before
@@ -0,0 +1,57 @@
+"""
+Journal des modifications : deltas de changes_since, entrée RESET des
+opérations en bloc et des consommateurs en retard après une purge.
+"""
+from models.database import RESET_OPERATION
+from tests.conftest import first_employee_id
+
+
+def test_changes_since_returns_deltas_in_order(sqlite_db):
+    seq = sqlite_db.get_change_seq()
+    employee_id = first_employee_id(sqlite_db)
+    sqlite_db.update_employee(employee_id, 'salaire', 460000.0)
+    sqlite_db.delete_employee(employee_id)
+
+    changes = sqlite_db.changes_since(seq)
+    assert [change['operation'] for change in changes] == ['UPDATE', 'DELETE']
+    assert [change['id'] for change in changes] == [employee_id, employee_id]
+    assert changes[0]['old']['salaire'] == 450000.0
+    assert changes[0]['new']['salaire'] == 460000.0
+    assert changes[1]['new'] is None
+    assert changes[-1]['seq'] == sqlite_db.get_change_seq()
+
+
+def test_clear_logs_a_single_reset(sqlite_db):
+    seq = sqlite_db.get_change_seq()
+    sqlite_db.clear_all_data()
+    changes = sqlite_db.changes_since(seq)
+    assert [change['operation'] for change in changes] == [RESET_OPERATION]
+
+
+def test_pruned_log_reports_reset_to_late_consumers(sqlite_db):
+    start = sqlite_db.get_change_seq()
+    for salary in (1.0, 2.0, 3.0):
+        sqlite_db.update_employee(first_employee_id(sqlite_db), 'salaire', salary)
+    last = sqlite_db.get_change_seq()
+    assert sqlite_db.prune_changes(last) > 0
+
+    # Consommateur en retard : RESET à la dernière séquence purgée, puis la suite
+    changes = sqlite_db.changes_since(start)
+    assert changes[0]['operation'] == RESET_OPERATION
+    assert changes[0]['seq'] == last - 1
+    assert [change['seq'] for change in changes[1:]] == [last]
+
+    # Consommateur à jour : aucun RESET
+    assert sqlite_db.changes_since(last) == []
+    # La séquence ne recule pas après la purge
+    assert sqlite_db.get_change_seq() == last
+
+
+def test_changes_since_honours_limit(sqlite_db):
+    seq = sqlite_db.get_change_seq()
+    employee_id = first_employee_id(sqlite_db)
+    for salary in (1.0, 2.0, 3.0):
+        sqlite_db.update_employee(employee_id, 'salaire', salary)
+    changes = sqlite_db.changes_since(seq, limit=2)
+    assert [change['new']['salaire'] for change in changes] == [1.0, 2.0]
+    assert [change['new']['salaire'] for change in sqlite_db.changes_since(changes[-1]['seq'])] == [3.0]
@@ -0,0 +1,55 @@
+"""
+Contrôle de concurrence optimiste : compare-and-set sur la version des lignes.
+"""
+import pytest
+
+from models.database import ConcurrentModificationError
+from tests.conftest import first_employee_id
+
+
+def test_cas_rejects_stale_version(sqlite_db):
+    employee_id = first_employee_id(sqlite_db)
+    original = sqlite_db.get_employee(employee_id)
+    sqlite_db.update_employee_checked(employee_id, {'poste': 'Chef comptable'}, original)
+
+    # Seconde modification à partir de la même lecture : périmée
+    with pytest.raises(ConcurrentModificationError) as error:
+        sqlite_db.update_employee_checked(employee_id, {'poste': 'Auditeur'}, original)
+    conflict = error.value.conflicts[0]
+    assert conflict['version_lue'] == original['version']
+    assert conflict['version_actuelle'] == original['version'] + 1
+    assert conflict['differences']['poste']['conflit']
+    assert sqlite_db.get_employee(employee_id)['poste'] == 'Chef comptable'
+
+
+def test_cas_bulk_update_is_all_or_nothing(sqlite_db):
+    ids = list(sqlite_db.get_filtered_data(None, ['id'], 'id')['id'][:2])
+    first, second = (sqlite_db.get_employee(int(employee_id)) for employee_id in ids)
+    sqlite_db.update_employee(second['id'], 'salaire', 1.0)
+
+    with pytest.raises(ConcurrentModificationError) as error:
+        sqlite_db.bulk_update_employees([
+            (first['id'], {'salaire': 2.0}, first),
+            (second['id'], {'salaire': 3.0}, second),
+        ])
+    assert [conflict['id'] for conflict in error.value.conflicts] == [second['id']]
+    # La ligne à jour n'a pas été modifiée non plus
+    assert sqlite_db.get_employee(first['id']) == first
+
+
+def test_cas_delete_with_stale_version(sqlite_db):
+    employee_id = first_employee_id(sqlite_db)
+    original = sqlite_db.get_employee(employee_id)
+    sqlite_db.update_employee(employee_id, 'nom', 'Ndong Marie-Claire')
+    with pytest.raises(ConcurrentModificationError):
+        sqlite_db.delete_employee(employee_id, expected_version=original['version'])
+    assert sqlite_db.get_employee(employee_id) is not None
+
+
+def test_deleted_row_is_reported_as_conflict(sqlite_db):
+    employee_id = first_employee_id(sqlite_db)
+    original = sqlite_db.get_employee(employee_id)
+    sqlite_db.delete_employee(employee_id)
+    with pytest.raises(ConcurrentModificationError) as error:
+        sqlite_db.update_employee_checked(employee_id, {'poste': 'Auditeur'}, original)
+    assert error.value.conflicts[0]['version_actuelle'] is None
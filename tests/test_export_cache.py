@@ -0,0 +1,121 @@
+"""
+Cache disque des exports : clé (révision, type, paramètres), génération unique,
+éviction LRU par taille et régénération d'un fichier évincé avant le téléchargement.
+"""
+import io
+import os
+import zipfile
+
+import pytest
+from openpyxl import load_workbook
+
+from controllers.excel_controller import ExcelController
+from models.export_cache import ExportCache
+from tests.conftest import first_employee_id
+
+
+def _writer(content, calls=None):
+    def build(path):
+        if calls is not None:
+            calls.append(path)
+        with open(path, 'wb') as output:
+            output.write(content)
+        return {'lignes': len(content)}
+    return build
+
+
+def test_key_depends_on_revision_kind_and_params():
+    key = ExportCache.make_key(3, 'donnees.xlsx', {'colonnes': ['nom'], 'tri': None})
+    assert key == ExportCache.make_key(3, 'donnees.xlsx', {'tri': None, 'colonnes': ['nom']})
+    assert key != ExportCache.make_key(4, 'donnees.xlsx', {'colonnes': ['nom'], 'tri': None})
+    assert key != ExportCache.make_key(3, 'donnees.zip', {'colonnes': ['nom'], 'tri': None})
+    assert key != ExportCache.make_key(3, 'donnees.xlsx', {'colonnes': ['email'], 'tri': None})
+
+
+def test_file_is_built_once_then_reused(tmp_path):
+    cache = ExportCache(str(tmp_path))
+    calls = []
+    path, info, cached = cache.get_or_create('cle', '.xlsx', _writer(b'abc', calls))
+    assert (info, cached) == ({'lignes': 3}, False)
+    again = cache.get_or_create('cle', '.xlsx', _writer(b'abc', calls))
+    assert again == (path, info, True)
+    assert len(calls) == 1
+    # Génération dans un fichier temporaire, aucun reste après publication
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.')]
+
+
+def test_nothing_kept_when_builder_returns_none(tmp_path):
+    cache = ExportCache(str(tmp_path))
+    assert cache.get_or_create('vide', '.xlsx', lambda path: None) == (None, None, False)
+    assert cache.size() == 0
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=250)
+    first, _, _ = cache.get_or_create('a', '.xlsx', _writer(b'x' * 100))
+    second, _, _ = cache.get_or_create('b', '.xlsx', _writer(b'x' * 100))
+    os.utime(first, (1, 1))
+    os.utime(second, (2, 2))
+    # Réutilisation : 'a' devient le plus récent
+    cache.get('a', '.xlsx')
+    cache.get_or_create('c', '.xlsx', _writer(b'x' * 100))
+
+    assert cache.get('b', '.xlsx') is None
+    assert cache.get('a', '.xlsx') is not None
+    assert cache.stats['evictions'] == 1
+    assert cache.size() <= 250
+
+
+def test_read_regenerates_an_evicted_file(tmp_path):
+    cache = ExportCache(str(tmp_path))
+    calls = []
+
+    def rebuild():
+        return cache.get_or_create('cle', '.xlsx', _writer(b'contenu', calls))[0]
+    path = rebuild()
+    cache.clear()
+
+    assert cache.read(path, rebuild) == b'contenu'
+    assert len(calls) == 2
+
+
+def test_read_without_anything_to_rebuild(tmp_path):
+    cache = ExportCache(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        cache.read(str(tmp_path / 'absent.xlsx'), lambda: None)
+
+
+def test_export_reused_until_data_changes(sqlite_db, tmp_path):
+    controller = ExcelController(sqlite_db)
+    controller.export_cache = ExportCache(str(tmp_path / 'exports'))
+    first = controller.export_to_excel('export.xlsx', columns=['nom'])
+    second = controller.export_to_excel('export.xlsx', columns=['nom'])
+    assert (first['cached'], second['cached']) == (False, True)
+    assert second['path'] == first['path']
+
+    sqlite_db.update_employee(first_employee_id(sqlite_db), 'nom', 'Autre')
+    third = controller.export_to_excel('export.xlsx', columns=['nom'])
+    assert not third['cached']
+    assert third['path'] != first['path']
+
+
+def test_split_export_streams_the_archive_into_the_cache(sqlite_db, tmp_path):
+    controller = ExcelController(sqlite_db)
+    controller.export_cache = ExportCache(str(tmp_path / 'exports'))
+    progress = []
+    result = controller.export_to_excel('export.xlsx', columns=['nom', 'salaire'], sort_by='salaire',
+                                        rows_per_part=2, progress=lambda done, total: progress.append((done, total)))
+    assert result['success'], result['message']
+    assert (result['filename'], result['format'], result['parts']) == ('export.zip', 'zip', 3)
+    assert os.path.dirname(result['path']) == str(tmp_path / 'exports')
+    assert progress[-1] == (5, 5)
+
+    with zipfile.ZipFile(result['path']) as archive:
+        names = archive.namelist()
+        assert names == ['export-partie-001.xlsx', 'export-partie-002.xlsx', 'export-partie-003.xlsx']
+        with archive.open(names[-1]) as part:
+            rows = list(load_workbook(io.BytesIO(part.read()), read_only=True).active.iter_rows(values_only=True))
+    assert rows == [('nom', 'salaire'), ('Obiang Paul', 1200000.0)]
+
+    again = controller.export_to_excel('export.xlsx', columns=['nom', 'salaire'], sort_by='salaire', rows_per_part=2)
+    assert again['cached'] and again['path'] == result['path']
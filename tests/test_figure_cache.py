@@ -0,0 +1,60 @@
+"""
+Cache des figures du tableau de bord : réutilisation par clé, budget en octets
+et éviction LRU.
+"""
+import plotly.graph_objects as go
+
+from components.figure_cache import FigureCache
+
+
+def _figure(points):
+    return go.Figure(data=[go.Bar(x=list(range(points)), y=list(range(points)))])
+
+
+def _size(points):
+    return len(_figure(points).to_json())
+
+
+def test_same_key_reuses_the_figure():
+    cache = FigureCache()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return _figure(3)
+    first = cache.get_or_build('histogram', 1, {'variante': 0}, build)
+    second = cache.get_or_build('histogram', 1, {'variante': 0}, build)
+    assert first is second
+    assert len(calls) == 1
+    assert cache.stats['hits'] == 1
+
+    # Nouvelle révision des données : figure reconstruite
+    cache.get_or_build('histogram', 2, {'variante': 0}, build)
+    assert len(calls) == 2
+
+
+def test_eviction_by_byte_budget():
+    cache = FigureCache(max_bytes=int(_size(50) * 2.5))
+    for revision in range(3):
+        cache.get_or_build('scatter', revision, None, lambda: _figure(50))
+    # Les deux figures les plus récentes tiennent dans le budget
+    assert cache.stats['evictions'] == 1
+    assert cache._size <= cache.max_bytes
+    assert [key[1] for key in cache._entries] == [1, 2]
+
+
+def test_recently_used_entry_survives_eviction():
+    cache = FigureCache(max_bytes=int(_size(50) * 2.5))
+    cache.get_or_build('scatter', 0, None, lambda: _figure(50))
+    cache.get_or_build('scatter', 1, None, lambda: _figure(50))
+    cache.get_or_build('scatter', 0, None, lambda: _figure(50))
+    cache.get_or_build('scatter', 2, None, lambda: _figure(50))
+    assert [key[1] for key in cache._entries] == [0, 2]
+
+
+def test_figure_larger_than_budget_is_not_kept():
+    cache = FigureCache(max_bytes=_size(50) // 2)
+    figure = cache.get_or_build('scatter', 0, None, lambda: _figure(50))
+    assert figure is not None
+    assert not cache._entries
+    assert cache._size == 0
@@ -0,0 +1,96 @@
+"""
+Dossier de dépôt : délai de stabilité avant import, doublons reconnus à leur
+empreinte SHA-256, fichiers déplacés dans traites/ ou echecs/ avec leur rapport.
+"""
+import json
+import os
+
+import pytest
+
+from controllers.excel_controller import ExcelController
+from controllers.ingestion import DropFolderIngester, REPORT_SUFFIX
+from models.database import EmployeeDatabase
+from tests.conftest import SAMPLE_EMPLOYEES
+
+# En-têtes du format standard des exports du SIRH
+EXCEL_HEADERS = {'nom': 'Nom', 'email': 'Email', 'telephone': 'Téléphone',
+                 'departement': 'Département', 'poste': 'Poste', 'salaire': 'Salaire'}
+
+
+@pytest.fixture
+def ingester(tmp_path):
+    db = EmployeeDatabase(str(tmp_path / 'employees.db'), analytics_backend='sqlite')
+    watch_dir = tmp_path / 'depot'
+    watch_dir.mkdir()
+    ingester = DropFolderIngester(ExcelController(db), str(watch_dir), workers=2,
+                                  settle_seconds=0, poll_interval=0.01)
+    yield ingester
+    ingester.stop()
+    db.close()
+
+
+def _drop(ingester, name):
+    path = os.path.join(ingester.watch_dir, name)
+    SAMPLE_EMPLOYEES.rename(columns=EXCEL_HEADERS).to_excel(path, index=False)
+    return path
+
+
+def _moved(directory):
+    return sorted(name for name in os.listdir(directory) if not name.endswith(REPORT_SUFFIX))
+
+
+def test_file_waits_until_stable(ingester):
+    ingester.settle_seconds = 60
+    _drop(ingester, 'employees-1.xlsx')
+    # Première scrutation : le fichier commence son délai ; la seconde le trouve encore trop récent
+    assert ingester.scan() == []
+    assert ingester.scan() == []
+
+    ingester.settle_seconds = 0
+    assert [os.path.basename(path) for path in ingester.scan()] == ['employees-1.xlsx']
+
+
+def test_imported_file_moves_with_its_report(ingester):
+    _drop(ingester, 'employees-1.xlsx')
+    _drop(ingester, 'autre.xlsx')
+
+    reports = ingester.run_once(timeout=10)
+    assert [(report['fichier'], report['statut']) for report in reports] == [('employees-1.xlsx', 'importé')]
+    assert ingester.controller.db.get_employee_count() == len(SAMPLE_EMPLOYEES)
+
+    # Fichier hors motif laissé en place ; le fichier importé est dans traites/ avec son rapport
+    assert sorted(os.listdir(ingester.watch_dir)) == ['autre.xlsx', 'traites']
+    destination = reports[0]['destination']
+    assert os.path.dirname(destination) == ingester.processed_dir
+    with open(destination + REPORT_SUFFIX, encoding='utf-8') as source:
+        saved = json.load(source)
+    assert saved['sha256'] == reports[0]['sha256']
+    assert saved['importes'] == len(SAMPLE_EMPLOYEES)
+
+
+def test_same_content_is_imported_once(ingester):
+    _drop(ingester, 'employees-1.xlsx')
+    first = ingester.run_once(timeout=10)
+
+    # Même contenu déposé sous un autre nom : doublon, non réimporté
+    with open(first[0]['destination'], 'rb') as source:
+        content = source.read()
+    with open(os.path.join(ingester.watch_dir, 'employees-2.xlsx'), 'wb') as copy:
+        copy.write(content)
+    second = ingester.run_once(timeout=10)
+
+    assert [report['statut'] for report in second] == ['doublon']
+    assert second[0]['sha256'] == first[0]['sha256']
+    assert ingester.controller.db.get_employee_count() == len(SAMPLE_EMPLOYEES)
+    assert len(_moved(ingester.processed_dir)) == 2
+
+
+def test_unreadable_file_moves_to_failed(ingester):
+    with open(os.path.join(ingester.watch_dir, 'employees-1.xlsx'), 'wb') as broken:
+        broken.write(b"pas un classeur")
+
+    reports = ingester.run_once(timeout=10)
+    assert [report['statut'] for report in reports] == ['échec']
+    assert _moved(ingester.failed_dir) == [os.path.basename(reports[0]['destination'])]
+    assert not os.path.exists(ingester.processed_dir)
+    assert ingester.controller.db.get_employee_count() == 0
@@ -0,0 +1,90 @@
+"""
+Maintenance planifiée : mesure du churn depuis la dernière exécution, déclenchement
+au seuil après une période d'inactivité, rapports consignés et pages libres récupérées.
+"""
+import time
+
+import pandas as pd
+
+from tests.conftest import SAMPLE_EMPLOYEES, first_employee_id
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_churn_counts_changes_since_last_run(sqlite_db):
+    maintenance = sqlite_db.maintenance
+    assert maintenance.churn() == len(SAMPLE_EMPLOYEES)
+
+    report = maintenance.run()
+    assert report['churn'] == len(SAMPLE_EMPLOYEES)
+    assert [step['etape'] for step in report['etapes']] == ['ANALYZE', 'VACUUM', 'CHECKPOINT']
+    assert not any(str(step['detail']).startswith('Erreur') for step in report['etapes'])
+    assert maintenance.churn() == 0
+
+    sqlite_db.update_employee(first_employee_id(sqlite_db), 'salaire', 460000.0)
+    assert maintenance.churn() == 1
+
+
+def test_bulk_reset_counts_as_the_whole_threshold(sqlite_db):
+    maintenance = sqlite_db.maintenance
+    maintenance.run()
+    sqlite_db.clear_all_data()
+    assert maintenance.churn() >= maintenance.churn_threshold
+
+
+def test_due_only_after_threshold_and_idle_period(sqlite_db):
+    maintenance = sqlite_db.maintenance
+    maintenance.churn_threshold = len(SAMPLE_EMPLOYEES)
+    maintenance.idle_seconds = 3600
+    assert not maintenance.is_due()
+
+    maintenance.idle_seconds = 0
+    assert maintenance.is_due()
+    maintenance.churn_threshold = len(SAMPLE_EMPLOYEES) + 1
+    assert not maintenance.is_due()
+
+
+def test_writes_restart_the_idle_period(sqlite_db):
+    maintenance = sqlite_db.maintenance
+    time.sleep(0.05)
+    assert maintenance.idle_for() >= 0.05
+    sqlite_db.update_employee(first_employee_id(sqlite_db), 'poste', 'Auditrice')
+    assert maintenance.idle_for() < 0.05
+
+
+def test_scheduler_runs_when_due_and_records_the_report(sqlite_db):
+    maintenance = sqlite_db.maintenance
+    maintenance.churn_threshold = 1
+    maintenance.idle_seconds = 0
+    maintenance.check_interval = 0.02
+    maintenance.start()
+    try:
+        assert _wait_for(lambda: maintenance.reports())
+    finally:
+        maintenance.stop()
+    report = maintenance.reports()[0]
+    assert report['raison'] == 'planifié'
+    assert report['churn'] == len(SAMPLE_EMPLOYEES)
+    assert maintenance.last_error is None
+    # Churn remis à zéro : pas de nouvelle exécution sans modification
+    assert not maintenance.is_due()
+
+
+def test_free_pages_are_reclaimed(db):
+    db.insert_from_dataframe(pd.DataFrame({
+        'nom': [f"Employé {i}" for i in range(3000)],
+        'email': [f"employe{i}@exemple.ga" for i in range(3000)],
+        'salaire': [300000.0 + i for i in range(3000)],
+    }))
+    db.clear_all_data()
+    report = db.maintenance.run()
+    assert report['pages_libres_avant'] > 0
+    assert report['pages_libres_apres'] == 0
+    assert report['taille_apres'] < report['taille_avant']
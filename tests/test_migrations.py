@@ -0,0 +1,95 @@
+"""
+Migrations du schéma : mise à niveau d'une base en version 1 jusqu'à la version
+courante, sans perte de lignes ni réattribution d'IDs, et refus d'une base plus récente.
+"""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from models.database import EMPLOYEE_INDEXES, SCHEMA_VERSION, EmployeeDatabase, _migration_base_schema
+from models.writer import DatabaseWriter
+
+
+def _create_v1_database(path):
+    """Base en version 1 : typage souple, salaire non numérique, IDs non contigus."""
+    conn = sqlite3.connect(path)
+    _migration_base_schema(conn)
+    conn.executemany(
+        "INSERT INTO employees (id, nom, email, departement, salaire) VALUES (?, ?, ?, ?, ?)",
+        [
+            (5, 'Ndong Marie', 'marie.ndong@exemple.ga', 'Finance', 450000),
+            (9, 'Obiang Paul', 'paul.obiang@exemple.ga', 'Finance', 'N/A'),
+            (12, 'Mba Claire', 'claire.mba@exemple.ga', 'RH', '500000'),
+        ]
+    )
+    # Employés supprimés après le dernier ID : le compteur AUTOINCREMENT est plus loin
+    conn.execute("UPDATE sqlite_sequence SET seq = 20 WHERE name = 'employees'")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+
+def test_upgrade_from_version_1(tmp_path, capsys):
+    path = str(tmp_path / 'ancienne.db')
+    _create_v1_database(path)
+
+    db = EmployeeDatabase(path, analytics_backend='sqlite')
+    try:
+        output = capsys.readouterr().out
+        assert [f"Migration {version} appliquée" in output for version in range(2, SCHEMA_VERSION + 1)] == \
+            [True] * (SCHEMA_VERSION - 1)
+        assert "Migration 1 appliquée" not in output
+        assert db.get_schema_version() == SCHEMA_VERSION
+
+        # Lignes conservées avec leurs IDs ; salaire non numérique -> NULL, texte numérique conservé
+        rows = db.storage.fetchall("SELECT id, salaire, typeof(salaire) FROM employees ORDER BY id")
+        assert rows == [(5, 450000.0, 'real'), (9, None, 'null'), (12, 500000.0, 'real')]
+
+        # Compteur AUTOINCREMENT conservé : pas de réattribution d'un ID supprimé
+        db.insert_from_dataframe(pd.DataFrame([{'nom': 'Nze Jean', 'email': 'jean.nze@exemple.ga'}]))
+        assert db.storage.fetchone("SELECT MAX(id) FROM employees")[0] == 21
+
+        # Colonne dérivée remplie, tables et index des migrations suivantes présents
+        db.backfill_derived_columns()
+        assert db.storage.fetchone("SELECT COUNT(*) FROM employees WHERE cle_recherche IS NULL")[0] == 0
+        tables = {name for (name,) in db.storage.fetchall("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {'maintenance_runs', 'ingested_files'} <= tables
+        indexes = {name for (name,) in db.storage.fetchall("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert set(EMPLOYEE_INDEXES) <= indexes
+    finally:
+        db.close()
+
+
+def test_current_database_is_not_migrated_again(tmp_path, capsys):
+    path = str(tmp_path / 'courante.db')
+    EmployeeDatabase(path, analytics_backend='sqlite').close()
+    capsys.readouterr()
+
+    db = EmployeeDatabase(path, analytics_backend='sqlite')
+    db.close()
+    assert "Migration" not in capsys.readouterr().out
+
+
+def test_typed_table_rejects_invalid_versions(tmp_path):
+    db = EmployeeDatabase(str(tmp_path / 'typee.db'), analytics_backend='sqlite')
+    try:
+        with pytest.raises(sqlite3.IntegrityError):
+            db.writer.execute(lambda conn: conn.execute(
+                "INSERT INTO employees (nom, version) VALUES ('Test', 0)"
+            ))
+    finally:
+        db.close()
+
+
+def test_newer_database_is_refused(tmp_path):
+    path = str(tmp_path / 'future.db')
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    conn.close()
+    with pytest.raises(RuntimeError, match="plus récente"):
+        EmployeeDatabase(path, analytics_backend='sqlite')
+    # L'écrivain du fichier refusé est arrêté
+    writer = DatabaseWriter.for_path(path)
+    assert writer._refs == 1
+    writer.release()
@@ -0,0 +1,79 @@
+"""
+Canonicalisation des valeurs importées ou saisies (voir ExcelController.normalize_data).
+"""
+import pandas as pd
+import pytest
+
+from controllers.excel_controller import ExcelController, _canonical_phones, _collapse_labels, _collapse_whitespace
+from models.search import search_key, search_key_series
+
+
+@pytest.mark.parametrize('raw, expected', [
+    # Gabon : pas de préfixe national, le 0 initial fait partie du numéro et est conservé
+    ('06 12 34 01 00', '+2410612340100'),
+    ('077 12 34 56', '+241077123456'),
+    ('+241 077 12 34 56', '+241077123456'),
+    ('00241 077 12 34 56', '+241077123456'),
+    ('241077123456', '+241077123456'),
+    ('+33 6 12 34 56 78', '+33612345678'),
+    ('  ', None),
+    (None, None),
+    # Cellules numériques Excel : le 0 initial perdu est rétabli
+    (77123456.0, '+241077123456'),
+    (77123456, '+241077123456'),
+    ('77123456.0', '+241077123456'),
+    (241077123456.0, '+241077123456'),
+])
+def test_canonical_phones(raw, expected):
+    assert _canonical_phones(pd.Series([raw], dtype=object)).iloc[0] == expected
+
+
+def test_numeric_phone_column():
+    phones = _canonical_phones(pd.Series([77123456.0, None, 61234010.0]))
+    assert list(phones) == ['+241077123456', None, '+241061234010']
+
+
+@pytest.mark.parametrize('nom, email', [
+    ('Ndong Marie', 'marie.ndong@exemple.ga'),
+    ('  Hélène  Éloïse-Mba ', 'Helene.MBA@exemple.ga'),
+    (None, 'seul@exemple.ga'),
+    ('Nom seul', None),
+    (None, None),
+    ('Ångström_ﬁ', '...'),
+    ('Łukasz Ørsted', 'łukasz@exemple.pl'),
+])
+def test_search_key_series_matches_search_key(nom, email):
+    keys = search_key_series(pd.Series([nom], dtype=object), pd.Series([email], dtype=object))
+    assert keys.iloc[0] == search_key(nom, email)
+
+
+def test_form_fields_follow_import_rules():
+    canonical = ExcelController.canonicalize_employee_fields({
+        'nom': '  Ndong   Marie ',
+        'email': ' Marie.NDONG@Exemple.GA ',
+        'telephone': '06 12 34 01 00',
+        'poste': '',
+        'salaire': 450000.0,
+    })
+    assert canonical == {
+        'nom': 'Ndong Marie',
+        'email': 'marie.ndong@exemple.ga',
+        'telephone': '+2410612340100',
+        'poste': None,
+        'salaire': 450000.0,
+    }
+
+
+def test_cleared_phone_is_stored_as_null():
+    assert ExcelController.canonicalize_employee_fields({'telephone': ''}) == {'telephone': None}
+
+
+def test_empty_name_is_rejected():
+    with pytest.raises(ValueError):
+        ExcelController.canonicalize_employee_fields({'nom': '   '})
+
+
+def test_labels_canonicalized_once_per_distinct_value():
+    values = pd.Series([' RH', None, 'Ressources  Humaines', '', 'RH', 3.0], dtype=object)
+    assert list(_collapse_labels(values)) == list(_collapse_whitespace(values))
+    assert list(_collapse_labels(values)) == ['RH', None, 'Ressources Humaines', None, 'RH', '3.0']
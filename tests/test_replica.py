@@ -0,0 +1,68 @@
+"""
+Réplique en mémoire : copie limitée à la table employees, clé de recherche
+recalculée lors de l'application des deltas, parcours abandonné non bloquant.
+"""
+import threading
+
+import pytest
+
+from models.database import EmployeeDatabase
+from tests.conftest import SAMPLE_EMPLOYEES, first_employee_id
+
+
+@pytest.fixture
+def replica_db(tmp_path):
+    database = EmployeeDatabase(str(tmp_path / 'employees.db'), analytics_backend='memory')
+    database.analytics.sync_timeout = 0.2
+    database.insert_from_dataframe(SAMPLE_EMPLOYEES)
+    yield database
+    database.close()
+
+
+def _replica_rows(db, sql, params=()):
+    return db.analytics._conn.execute(sql, list(params)).fetchall()
+
+
+def test_reload_copies_only_employees_and_its_indexes(replica_db):
+    replica_db.clear_all_data()
+    replica_db.insert_from_dataframe(SAMPLE_EMPLOYEES)
+    replica_db.get_employee_count()
+
+    objects = _replica_rows(replica_db, "SELECT type, tbl_name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'")
+    assert {tbl_name for _, tbl_name in objects} == {'employees'}
+    source_indexes = replica_db.storage.fetchall(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'employees' AND sql IS NOT NULL"
+    )
+    replica_indexes = _replica_rows(replica_db, "SELECT name FROM sqlite_master WHERE type = 'index'")
+    assert sorted(replica_indexes) == sorted(source_indexes)
+    assert replica_db.get_employee_count() == len(SAMPLE_EMPLOYEES)
+
+
+def test_applied_changes_keep_the_search_key(replica_db):
+    employee_id = first_employee_id(replica_db)
+    replica_db.update_employee(employee_id, 'nom', 'Ndong-Éyi Marie')
+    assert replica_db.get_employee(employee_id)['nom'] == 'Ndong-Éyi Marie'
+
+    keys = dict(_replica_rows(replica_db, "SELECT id, cle_recherche FROM employees"))
+    assert None not in keys.values()
+    expected = replica_db.storage.fetchone("SELECT cle_recherche FROM employees WHERE id = ?", [employee_id])[0]
+    assert keys[employee_id] == expected
+
+
+def test_abandoned_iteration_does_not_block_reads(replica_db):
+    batches = replica_db.analytics.iter_batches("SELECT id FROM employees", batch_size=1)
+    next(batches)
+    employee_id = first_employee_id(replica_db)
+    replica_db.update_employee(employee_id, 'salaire', 999000.0)
+
+    # Lecture d'un autre thread : servie après le délai, sur l'état précédent
+    result = {}
+    reader = threading.Thread(target=lambda: result.update(count=replica_db.get_employee_count()))
+    reader.start()
+    reader.join(5)
+    assert not reader.is_alive()
+    assert result['count'] == len(SAMPLE_EMPLOYEES)
+
+    # Parcours fermé : la modification est appliquée à la lecture suivante
+    batches.close()
+    assert replica_db.get_employee(employee_id)['salaire'] == 999000.0
@@ -0,0 +1,106 @@
+"""
+Recherche approximative par trigrammes : indexation, classement, tolérance aux
+fautes et aux accents, maintenance des fréquences et recherche de repli.
+"""
+import pytest
+
+from models import search
+from models.search import text_trigrams
+from tests.conftest import SAMPLE_EMPLOYEES
+
+
+@pytest.fixture
+def indexed_db(sqlite_db):
+    sqlite_db.search_index.refresh()
+    return sqlite_db
+
+
+def _emails(results):
+    return list(results['email'])
+
+
+def _count(db, gram):
+    row = db.storage.fetchone("SELECT count FROM search_trigram_counts WHERE trigram = ?", [gram])
+    return row[0] if row else None
+
+
+def test_every_employee_is_indexed(indexed_db):
+    assert indexed_db.search_index.is_current()
+    keys = indexed_db.storage.fetchall("SELECT cle, nb_trigrams FROM search_keys")
+    assert len(keys) == len(SAMPLE_EMPLOYEES)
+    postings = indexed_db.storage.fetchone("SELECT COUNT(*) FROM search_trigrams")[0]
+    assert postings == sum(nb for _, nb in keys)
+
+
+def test_exact_name_ranks_first(indexed_db):
+    results = indexed_db.search_employees('Moussavou Léa', columns=['email'])
+    assert _emails(results)[0] == 'lea.moussavou@exemple.ga'
+    assert results['score'].iloc[0] == 1.0
+    assert list(results['score']) == sorted(results['score'], reverse=True)
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('moussavo lea', 'lea.moussavou@exemple.ga'),   # lettre manquante
+    ('Obiamg', 'paul.obiang@exemple.ga'),           # lettre erronée
+    ('ndong marei', 'marie.ndong@exemple.ga'),
+    ('LEA', 'lea.moussavou@exemple.ga'),            # casse et accents
+    ('clai', 'claire.mba@exemple.ga'),              # mot en cours de saisie
+])
+def test_typos_and_accents_are_tolerated(indexed_db, query, expected):
+    assert _emails(indexed_db.search_employees(query, threshold=0.4, columns=['email']))[0] == expected
+
+
+def test_unrelated_query_finds_nothing(indexed_db):
+    assert indexed_db.search_employees('zzqxw', columns=['email']).empty
+
+
+def test_updates_and_deletes_maintain_the_index(indexed_db):
+    employee_id = int(indexed_db.search_employees('Obiang', columns=['id'])['id'].iloc[0])
+    indexed_db.update_employee(employee_id, 'nom', 'Essono Paul')
+    indexed_db.update_employee(employee_id, 'email', 'paul.essono@exemple.ga')
+    results = indexed_db.search_employees('Essono', columns=['id'])
+    assert list(results['id']) == [employee_id]
+    # Trigrammes propres à l'ancien nom retirés des fréquences
+    assert _count(indexed_db, 'obi') is None
+    assert indexed_db.search_employees('Obiang', columns=['id']).empty
+
+    indexed_db.delete_employee(employee_id)
+    assert indexed_db.search_employees('Essono', columns=['id']).empty
+    assert _count(indexed_db, 'sso') is None
+    # Trigramme partagé avec d'autres employés : fréquence décrémentée, pas retirée
+    assert _count(indexed_db, 'ga ') == len(SAMPLE_EMPLOYEES) - 1
+
+
+def test_counts_match_postings(indexed_db):
+    indexed_db.update_employee(int(indexed_db.search_employees('Nze', columns=['id'])['id'].iloc[0]),
+                               'email', 'jean.nze@autre.ga')
+    indexed_db.search_index.refresh()
+    mismatches = indexed_db.storage.fetchall("""
+        SELECT c.trigram FROM search_trigram_counts c
+        LEFT JOIN (SELECT trigram, COUNT(*) AS n FROM search_trigrams GROUP BY trigram) p USING (trigram)
+        WHERE p.n IS NULL OR p.n != c.count
+    """)
+    assert mismatches == []
+
+
+def test_fallback_scan_while_rebuilding(sqlite_db, monkeypatch):
+    # Index considéré comme en retard : la recherche parcourt cle_recherche
+    monkeypatch.setattr(sqlite_db.search_index, '_ensure_current', lambda: False)
+    assert _emails(sqlite_db.search_employees('moussavou', columns=['email'])) == ['lea.moussavou@exemple.ga']
+    # Fautes non tolérées, saisie trop courte ignorée
+    assert _emails(sqlite_db.search_employees('lea mouss', columns=['email'])) == ['lea.moussavou@exemple.ga']
+    assert sqlite_db.search_employees('obiamg', columns=['email']).empty
+    assert sqlite_db.search_employees('le', columns=['email']).empty
+
+
+def test_fallback_scan_is_bounded(sqlite_db, monkeypatch):
+    monkeypatch.setattr(sqlite_db.search_index, '_ensure_current', lambda: False)
+    monkeypatch.setattr(search, 'SCAN_MAX_ROWS', 2)
+    # Seules les deux premières lignes (ordre des IDs) sont parcourues
+    assert _emails(sqlite_db.search_employees('exemple', columns=['email'])) == list(SAMPLE_EMPLOYEES['email'][:2])
+
+
+def test_partial_last_word_trigrams():
+    assert '  c' in text_trigrams('clai', partial_last=True)
+    assert 'ai ' not in text_trigrams('clai', partial_last=True)
+    assert 'ai ' in text_trigrams('clai')
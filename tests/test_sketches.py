@@ -0,0 +1,60 @@
+"""
+Sketches de quantiles : borne d'erreur relative, suppressions et fusions,
+suivi des modifications de la base.
+"""
+import random
+
+import pytest
+
+from models.sketches import SalarySketch
+from tests.conftest import first_employee_id
+
+
+def _exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize('relative_accuracy', [0.01, 0.05])
+def test_sketch_relative_error_bound(relative_accuracy):
+    generator = random.Random(7)
+    values = [generator.lognormvariate(13, 0.8) for _ in range(20000)]
+    sketch = SalarySketch(relative_accuracy)
+    for value in values:
+        sketch.add(value)
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        exact = _exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= relative_accuracy * exact
+
+
+def test_sketch_bound_holds_after_removals_and_merge():
+    generator = random.Random(11)
+    values = [generator.uniform(150000, 3000000) for _ in range(5000)]
+    removed, kept = values[:2000], values[2000:]
+
+    left, right = SalarySketch(), SalarySketch()
+    for value in values[:2500]:
+        left.add(value)
+    for value in values[2500:]:
+        right.add(value)
+    left.merge(right)
+    for value in removed:
+        left.remove(value)
+
+    assert left.count == len(kept)
+    for q in (0.1, 0.5, 0.9):
+        exact = _exact_quantile(kept, q)
+        assert abs(left.quantile(q) - exact) <= 0.01 * exact
+
+
+def test_sketch_rejects_merge_of_different_accuracy():
+    with pytest.raises(ValueError):
+        SalarySketch(0.01).merge(SalarySketch(0.02))
+
+
+def test_database_quantiles_follow_updates(sqlite_db):
+    sqlite_db.update_employee(first_employee_id(sqlite_db), 'salaire', 5000000.0)
+    salaries = list(sqlite_db.get_all_data()['salaire'])
+    estimates = sqlite_db.get_salary_quantiles((0.5, 1.0))
+    assert estimates[0.5] == pytest.approx(_exact_quantile(salaries, 0.5), rel=0.01)
+    assert estimates[1.0] == pytest.approx(5000000.0, rel=0.01)
@@ -0,0 +1,135 @@
+"""
+Écrivain unique : regroupement des écritures, isolation des opérations,
+arrêt partagé entre bases et comportement après une transaction annulée.
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from models.writer import DatabaseWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    path = str(tmp_path / 'writer.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (value INTEGER)")
+    conn.close()
+    writer = DatabaseWriter(path)
+    yield writer
+    writer.close()
+
+
+def _insert(value):
+    def operation(conn):
+        conn.execute("INSERT INTO t (value) VALUES (?)", (value,))
+        return value
+    return operation
+
+
+def _values(writer):
+    conn = sqlite3.connect(writer.db_path)
+    values = [row[0] for row in conn.execute("SELECT value FROM t ORDER BY value")]
+    conn.close()
+    return values
+
+
+def _blocked(writer):
+    """Occupe le thread d'écriture : les opérations soumises ensuite forment un seul lot."""
+    started, release = threading.Event(), threading.Event()
+
+    def wait(conn):
+        started.set()
+        release.wait(5)
+    writer.submit(wait)
+    started.wait(5)
+    return release
+
+
+def test_failed_operation_only_rolls_back_itself(writer):
+    release = _blocked(writer)
+
+    def failing(conn):
+        conn.execute("INSERT INTO t (value) VALUES (99)")
+        raise ValueError("refusé")
+    futures = [writer.submit(_insert(1)), writer.submit(failing), writer.submit(_insert(2))]
+    release.set()
+
+    assert futures[0].result(5) == 1
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    assert futures[2].result(5) == 2
+    assert _values(writer) == [1, 2]
+
+
+def test_aborted_transaction_fails_the_rest_of_the_batch(writer):
+    release = _blocked(writer)
+
+    # Transaction annulée sous l'opération (comme SQLite après SQLITE_FULL)
+    def abort(conn):
+        conn.execute("INSERT INTO t (value) VALUES (1)")
+        conn.execute("ROLLBACK")
+    futures = [writer.submit(abort), writer.submit(_insert(2))]
+    release.set()
+
+    for future in futures:
+        with pytest.raises(sqlite3.Error):
+            future.result(5)
+    # Aucune écriture validée hors transaction, et l'écrivain reste utilisable
+    assert _values(writer) == []
+    assert writer.execute(_insert(3)) == 3
+    assert _values(writer) == [3]
+
+
+def test_unexpected_error_stops_the_writer_without_hanging(writer, monkeypatch):
+    def broken(conn, batch):
+        raise sqlite3.OperationalError("disque indisponible")
+    monkeypatch.setattr(writer, '_execute_batch', broken)
+
+    with pytest.raises(sqlite3.OperationalError):
+        writer.submit(_insert(1)).result(5)
+    writer._thread.join(5)
+    assert writer._closed
+    assert isinstance(writer.last_error, sqlite3.OperationalError)
+    with pytest.raises(RuntimeError):
+        writer.submit(_insert(2))
+
+
+def test_shared_writer_stops_with_its_last_user(tmp_path):
+    path = str(tmp_path / 'partage.db')
+    first = DatabaseWriter.for_path(path)
+    second = DatabaseWriter.for_path(path)
+    assert first is second
+
+    first.release()
+    assert not second._closed
+    second.execute(lambda conn: conn.execute("CREATE TABLE t (value INTEGER)"))
+    second.release()
+    assert second._closed
+    assert DatabaseWriter.for_path(path) is not second
+    DatabaseWriter.for_path(path).release()
+
+
+def test_submit_racing_close_never_hangs(tmp_path):
+    writer = DatabaseWriter(str(tmp_path / 'course.db'))
+    futures = []
+
+    def submit_many():
+        for _ in range(200):
+            try:
+                futures.append(writer.submit(lambda conn: None))
+            except RuntimeError:
+                return
+    threads = [threading.Thread(target=submit_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    writer.close()
+    for thread in threads:
+        thread.join()
+
+    for future in futures:
+        try:
+            future.result(5)
+        except RuntimeError:
+            pass